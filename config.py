@@ -14,13 +14,49 @@ BASE_END_TIME = "15:00:00"    # Hora de salida base (HH:MM:SS)
 # 300 segundos = ±5 minutos
 RANDOM_VARIATION_SECONDS = 300
 
+# Tolerancia de --sync al comparar con los fichajes existentes (ambos llevan variación ±)
+SYNC_TOLERANCE_SECONDS = 2 * RANDOM_VARIATION_SECONDS
+VERIFY_TOLERANCE_SECONDS = 60  # --verify: diferencia admitida entre lo enviado y lo que muestra Woffu
+VERIFY_RETRIES = 1             # --verify: reenvíos de los días que no coinciden antes de darlos por erróneos
+
 # === OPCIONES DE PROCESAMIENTO ===
 SKIP_WEEKENDS = True          # Saltar fines de semana automáticamente
 SKIP_FUTURE_DATES = True      # Saltar fechas donde la hora de salida aún no ha pasado
+SKIP_HOLIDAYS = True          # Saltar festivos del país/región de data.json (sin llamadas de red)
+MAX_WORKERS = 1               # Días enviados en paralelo en el fichaje mensual (1 = secuencial)
+BATCH_MAX_CONCURRENCY = 4     # Usuarios procesados a la vez en el modo batch
 
 # === ARCHIVOS DEL SISTEMA ===
 WOFFU_SCRIPT = "woffu.py"     # Nombre del script principal de Woffu
+WORKER_PYTHON = None          # Intérprete del proceso auxiliar si woffu.py no se puede importar (None: el mismo)
 DATA_FILE = "data.json"       # Archivo de datos de usuario
+LEDGER_FILE = "woffu_ledger.db" # Registro local de días fichados (junto a DATA_FILE)
+LEDGER_RESUME = False         # Saltar siempre los días ya confirmados en el registro (como --resume)
+
+# === CONEXIONES HTTP ===
+HTTP_POOL_SIZE = 10           # Conexiones keep-alive reutilizables por host
+HTTP_TIMEOUT_SECONDS = 30     # Timeout por defecto de cada petición
+HTTP_MAX_ATTEMPTS = 4         # Intentos por petición idempotente ante 429/5xx o fallos de red
+HTTP_BACKOFF_BASE_SECONDS = 0.5 # Base del backoff exponencial con jitter (se respeta Retry-After)
+CIRCUIT_BREAKER_THRESHOLD = 5 # Fallos seguidos de un host que pausan las peticiones a ese host
+CIRCUIT_BREAKER_RESET_SECONDS = 30 # Pausa antes de volver a probar un host caído
+ADAPTIVE_CONCURRENCY = True   # Ajustar las peticiones en vuelo por host (AIMD) según latencia, 429 y 5xx
+ADAPTIVE_MIN_CONCURRENCY = 1  # Límite inferior del control adaptativo
+ADAPTIVE_MAX_CONCURRENCY = 32 # Límite superior (los hilos los fijan --workers / --max-concurrency)
+ADAPTIVE_INITIAL_CONCURRENCY = 4 # Límite con el que empieza cada host
+ADAPTIVE_LATENCY_TARGET_SECONDS = 2.0 # p95 por encima del cual se recorta el límite
+HTTP_CACHE = True             # Guardar las respuestas GET de sólo lectura en woffu_cache.db (junto a DATA_FILE)
+HTTP_CACHE_MAX_BYTES = 16 * 1024 * 1024 # Tamaño máximo; se expulsan las entradas menos usadas
+HTTP_CACHE_TTL_SECONDS = {    # Vigencia por endpoint (después se revalida con ETag/Last-Modified)
+    "users": 24 * 3600,
+    "company": 7 * 24 * 3600,
+    "presence": 300           # Los días pasados ya aceptados no caducan
+}
+
+# === DAEMON DE FICHAJE EN TIEMPO REAL ===
+DAEMON_WARMUP_SECONDS = 60    # Antelación con la que se renueva el token y se abre la conexión
+DAEMON_TICK_SECONDS = 30      # Espera máxima entre comprobaciones del reloj (detecta suspensiones)
+DAEMON_MISSED_GRACE_SECONDS = 300 # Retraso máximo con el que aún se ficha; si no, se omite el intervalo
 
 # === CONFIGURACIÓN DE SALIDA ===
 SHOW_PROGRESS = True          # Mostrar progreso detallado
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import woffu
+import woffu_cache
+from woffu_http import configure_default_client
+from woffu_mock import MockWoffuServer, MockWoffuState
+
+
+@pytest.fixture
+def mock_woffu():
+    """Mock de Woffu en un hilo, con el cliente HTTP compartido apuntando a él."""
+    server = MockWoffuServer().start()
+    configure_default_client(base_url=server.url)
+    woffu._token_cache.clear()
+    woffu._clients.clear()
+    yield server
+    server.stop()
+    woffu_cache.close_response_caches()
+    woffu._clients.clear()
+    configure_default_client()
+
+
+@pytest.fixture
+def data_file(mock_woffu, tmp_path):
+    """data.json de un usuario registrado en el mock (empresa en ES/MD)."""
+    path = str(tmp_path / "data.json")
+    domain = "alice.woffu.test"
+    woffu.saveData("alice", "secret", mock_woffu.state.user_id_for("alice"), MockWoffuState.COMPANY_ID,
+                   "ES", "MD", domain, domain, path)
+    return path
+
+
+def filed_days(server, user_id):
+    """{YYYY-MM-DD: (entrada, salida)} de los días con slots en el mock."""
+    return {diary["date"][:10]: (diary["in"], diary["out"])
+            for diary in server.state.diaries.values() if diary["userId"] == user_id and diary["in"]}
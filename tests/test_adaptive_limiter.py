@@ -0,0 +1,40 @@
+from woffu_http import AdaptiveLimiter, ConcurrencyPolicy
+
+
+def fill(limiter):
+    """Ocupa todos los huecos y los libera con respuestas sanas."""
+    epochs = [limiter.acquire() for _ in range(limiter.limit)]
+    for epoch in epochs:
+        limiter.release(epoch, 0.01, 200)
+
+
+def test_grows_while_limit_is_used():
+    limiter = AdaptiveLimiter(ConcurrencyPolicy(min_limit=1, max_limit=16, initial_limit=4))
+    for _ in range(4):
+        fill(limiter)
+    assert limiter.limit > 4
+
+
+def test_does_not_grow_when_limit_is_not_used():
+    limiter = AdaptiveLimiter(ConcurrencyPolicy(min_limit=1, max_limit=16, initial_limit=4))
+    for _ in range(100):
+        limiter.release(limiter.acquire(), 0.01, 200)
+    assert limiter.limit == 4
+
+
+def test_saturation_is_cleared_after_recovering_from_429():
+    limiter = AdaptiveLimiter(ConcurrencyPolicy(min_limit=1, max_limit=16, initial_limit=4))
+    epochs = [limiter.acquire() for _ in range(4)]
+    limiter.release(epochs.pop(), 0.01, 429)
+    for epoch in epochs:
+        limiter.release(epoch, 0.01, 200)
+    assert limiter.limit == 2
+
+    # Recupera un hueco llenando el límite recortado...
+    while limiter.limit == 2:
+        fill(limiter)
+    recovered = limiter.limit
+    # ...pero una petición cada vez ya no lo hace crecer
+    for _ in range(100):
+        limiter.release(limiter.acquire(), 0.01, 200)
+    assert limiter.limit == recovered
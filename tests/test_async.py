@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import woffu_async
+from conftest import filed_days
+from woffu_async import AsyncWoffuClient
+
+DAYS = [(work_date, [("08:00:00", "15:00:00")]) for work_date in ("2024-04-30", "2024-05-01", "2024-05-02")]
+
+
+class ThreadRecordingLedger:
+    """Ledger falso que anota en qué hilo se escribe cada día."""
+
+    def __init__(self):
+        self.threads = {}
+
+    def record(self, user_id, work_date, intervals, diary_id=None, status=None):
+        self.threads[work_date] = threading.current_thread()
+
+
+def _backfill(server, data_file, **options):
+    async def run():
+        async with AsyncWoffuClient(base_url=server.url) as client:
+            return await client.backfill(data_file, DAYS, **options)
+    return asyncio.run(run())
+
+
+def test_backfill_skips_holidays_like_the_cli(mock_woffu, data_file):
+    results = _backfill(mock_woffu, data_file)
+    assert results == {"2024-04-30": True, "2024-05-01": None, "2024-05-02": None}
+    assert set(filed_days(mock_woffu, 1)) == {"2024-04-30"}
+
+
+def test_backfill_files_holidays_when_asked(mock_woffu, data_file):
+    results = _backfill(mock_woffu, data_file, skip_holidays=False)
+    assert results == {"2024-04-30": True, "2024-05-01": True, "2024-05-02": True}
+
+
+def test_disk_io_runs_off_the_event_loop(mock_woffu, data_file, monkeypatch):
+    io_threads = []
+    store_token = woffu_async._store_token
+    monkeypatch.setattr(woffu_async, "_store_token",
+                        lambda *args: io_threads.append(threading.current_thread()) or store_token(*args))
+    ledger = ThreadRecordingLedger()
+    _backfill(mock_woffu, data_file, ledger=ledger, skip_holidays=False)
+
+    loop_thread = threading.current_thread()  # asyncio.run ejecuta el loop en este hilo
+    assert io_threads and all(thread is not loop_thread for thread in io_threads)
+    assert len(ledger.threads) == 3
+    assert all(thread is not loop_thread for thread in ledger.threads.values())
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+import requests
+
+from woffu_http import CircuitBreaker, CircuitOpenError, RetryPolicy, WoffuHttpClient
+
+RESET_SECONDS = 0.05
+
+
+def _open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=RESET_SECONDS)
+    _open_breaker(breaker)
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(RESET_SECONDS)
+    assert breaker.state == "half-open"
+    assert breaker.allow()          # la petición de prueba
+    assert not breaker.allow()      # el resto espera a su resultado
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=RESET_SECONDS)
+    _open_breaker(breaker)
+    time.sleep(RESET_SECONDS)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+class _RaisingSession:
+    def __init__(self, error):
+        self.error = error
+
+    def request(self, *args, **kwargs):
+        raise self.error
+
+
+def _half_open_client(error):
+    client = WoffuHttpClient(retry_policy=RetryPolicy(max_attempts=1), breaker_threshold=1,
+                             breaker_reset_seconds=RESET_SECONDS)
+    host = "app.woffu.test"
+    client._sessions[host] = _RaisingSession(error)
+    breaker = client.breaker_for(host)
+    _open_breaker(breaker)
+    time.sleep(RESET_SECONDS)
+    return client, breaker, f"https://{host}/api/users"
+
+
+def test_probe_with_other_request_error_reopens_the_circuit():
+    client, breaker, url = _half_open_client(requests.exceptions.ChunkedEncodingError("cortado"))
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.get(url)
+    assert breaker.state == "open"
+    time.sleep(RESET_SECONDS)
+    assert breaker.allow()
+
+
+def test_interrupted_probe_does_not_block_the_host():
+    client, breaker, url = _half_open_client(KeyboardInterrupt())
+    with pytest.raises(KeyboardInterrupt):
+        client.get(url)
+    assert breaker.allow()
+
+
+def test_open_circuit_rejects_without_sending():
+    client, breaker, url = _half_open_client(requests.exceptions.ConnectionError("caído"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get(url)
+    with pytest.raises(CircuitOpenError):
+        client.get(url)
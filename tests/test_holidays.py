@@ -0,0 +1,37 @@
+import sys
+
+import woffu
+import woffu_cli
+from conftest import filed_days
+
+# 2024-05-01 es festivo nacional y 2024-05-02 festivo en la Comunidad de Madrid
+RANGE = {"from_date": "2024-04-30", "to_date": "2024-05-02", "same_schedule": "08:00-15:00"}
+
+
+def _runner(data_file):
+    return woffu_cli.WoffuAutologin(data_file=data_file, show_progress=False, show_statistics=False)
+
+
+def test_file_entry_files_a_holiday(mock_woffu, data_file):
+    client = woffu.WoffuClient.from_file(data_file)
+    assert client.file_entry("2024-05-01", [("08:00:00", "15:00:00")])
+    assert "2024-05-01" in filed_days(mock_woffu, client.user_id)
+
+
+def test_planner_skips_holidays(mock_woffu, data_file, monkeypatch):
+    monkeypatch.setattr(woffu_cli, "SKIP_HOLIDAYS", True)
+    stats = _runner(data_file).execute_monthly_filing(**RANGE)
+    assert stats == {"success": 1, "skipped": 2, "errors": 0}
+
+
+def test_skip_holidays_disabled_files_every_day(mock_woffu, data_file, monkeypatch):
+    monkeypatch.setattr(woffu_cli, "SKIP_HOLIDAYS", False)
+    stats = _runner(data_file).execute_monthly_filing(**RANGE)
+    assert stats == {"success": 3, "skipped": 0, "errors": 0}
+
+
+def test_missing_holidays_package_files_every_day(mock_woffu, data_file, monkeypatch):
+    monkeypatch.setattr(woffu_cli, "SKIP_HOLIDAYS", True)
+    monkeypatch.setitem(sys.modules, "holidays", None)
+    stats = _runner(data_file).execute_monthly_filing(**RANGE)
+    assert stats == {"success": 3, "skipped": 0, "errors": 0}
@@ -0,0 +1,25 @@
+import argparse
+from datetime import date
+
+import pytest
+
+import woffu_cli
+
+
+def _args(**values):
+    defaults = {"month": None, "year": None, "year_all": False, "from_date": None, "to_date": None}
+    return argparse.Namespace(**{**defaults, **values})
+
+
+@pytest.mark.parametrize("values", [{"from_date": "2024-03-01"}, {"to_date": "2024-03-31"}])
+def test_from_and_to_go_together(values):
+    with pytest.raises(SystemExit):
+        woffu_cli._validate_period(_args(**values))
+
+
+def test_resolve_period_range():
+    autologin = woffu_cli.WoffuAutologin.__new__(woffu_cli.WoffuAutologin)
+    start, end, _ = autologin._resolve_period(from_date="2024-03-01", to_date="2024-03-31")
+    assert (start, end) == (date(2024, 3, 1), date(2024, 3, 31))
+    with pytest.raises(ValueError):
+        autologin._resolve_period(from_date="2024-03-01")
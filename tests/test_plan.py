@@ -0,0 +1,41 @@
+import json
+
+import woffu_cli
+from conftest import filed_days
+from woffu_plan import iter_plan_days
+
+
+def _runner(data_file):
+    return woffu_cli.WoffuAutologin(data_file=data_file, show_progress=False, show_statistics=False)
+
+
+def test_apply_files_the_plan_exactly(mock_woffu, data_file, tmp_path, monkeypatch):
+    plan_file = str(tmp_path / "mayo.plan.jsonl")
+    # Plan con los festivos incluidos: apply no debe volver a decidir sobre ellos
+    monkeypatch.setattr(woffu_cli, "SKIP_HOLIDAYS", False)
+    _runner(data_file).write_plan(plan_file, from_date="2024-04-29", to_date="2024-05-05",
+                                  same_schedule="08:00-15:00")
+    monkeypatch.setattr(woffu_cli, "SKIP_HOLIDAYS", True)
+
+    planned = {record["date"]: tuple(record["intervals"][0])
+               for record in iter_plan_days(plan_file) if record["action"] == "file"}
+    assert "2024-05-01" in planned and "2024-05-02" in planned
+
+    stats = _runner(data_file).apply_plan(plan_file)
+    assert stats == {"success": len(planned), "skipped": 2, "errors": 0}
+    with open(data_file) as f:
+        user_id = json.load(f)["user_id"]
+    assert filed_days(mock_woffu, user_id) == planned
+
+
+def test_overlapping_days_fail_on_apply(mock_woffu, data_file, tmp_path, monkeypatch):
+    plan_file = str(tmp_path / "solapado.plan.jsonl")
+    monkeypatch.setattr(woffu_cli, "RANDOM_VARIATION_SECONDS", 0)
+    _runner(data_file).write_plan(plan_file, from_date="2024-03-04", to_date="2024-03-05",
+                                  same_schedule="08:00-12:00,11:00-15:00")
+
+    actions = [record["action"] for record in iter_plan_days(plan_file)]
+    assert actions == ["fail", "fail"]
+    stats = _runner(data_file).apply_plan(plan_file)
+    assert stats == {"success": 0, "skipped": 0, "errors": 2}
+    assert mock_woffu.counts["slots"] == 0
@@ -0,0 +1,32 @@
+from woffu_cli import WoffuAutologin
+from woffu_interval import Interval
+
+to_seconds = WoffuAutologin._presence_time_to_seconds
+
+
+def test_plain_time():
+    assert to_seconds("08:01") == 8 * 3600 + 60
+    assert to_seconds("15:30:12") == 15 * 3600 + 30 * 60 + 12
+
+
+def test_iso_timestamp_with_offset():
+    assert to_seconds("2024-03-04T08:01:00+01:00") == 28860
+    assert to_seconds("2024-03-04T17:45:30-05:00") == 17 * 3600 + 45 * 60 + 30
+
+
+def test_iso_timestamp_without_offset():
+    assert to_seconds("2024-03-04 08:01:00") == 28860
+    assert to_seconds("2024-03-04T08:01:00Z") == 28860
+
+
+def test_empty_values():
+    assert to_seconds(None) is None
+    assert to_seconds("") is None
+    assert to_seconds("sin fichajes") is None
+
+
+def test_classify_day_with_offset_timestamps():
+    autologin = WoffuAutologin.__new__(WoffuAutologin)
+    diary = {"in": "2024-03-04T08:01:00+01:00", "out": "2024-03-04T15:00:00+01:00"}
+    intervals = [Interval.parse("08:00:00", "15:00:00")]
+    assert autologin._classify_day(diary, intervals, tolerance=120) == "unchanged"
@@ -0,0 +1,56 @@
+import pytest
+
+import woffu
+import woffu_cache
+from woffu_cache import KIND_USERS, ResponseCache, cache_stats
+from woffu_http import get_default_client
+
+
+@pytest.fixture
+def auth_headers(mock_woffu):
+    return woffu.getAuthHeaders("alice", "secret")
+
+
+def _cache(tmp_path, **options):
+    return ResponseCache(str(tmp_path / woffu_cache.RESPONSE_CACHE_FILE), "alice", **options)
+
+
+def _get_users(cache, auth_headers):
+    return cache.get(get_default_client(), woffu.USERS_URL, auth_headers, KIND_USERS)
+
+
+def test_fresh_entry_is_served_without_a_request(mock_woffu, auth_headers, tmp_path):
+    cache = _cache(tmp_path)
+    before = cache_stats()
+    assert _get_users(cache, auth_headers).json() == _get_users(cache, auth_headers).json()
+    assert mock_woffu.counts["users"] == 1
+    assert cache_stats()["hits"] == before["hits"] + 1
+
+
+def test_expired_entry_is_revalidated_with_its_etag(mock_woffu, auth_headers, tmp_path):
+    cache = _cache(tmp_path, ttls={KIND_USERS: 0})
+    before = cache_stats()
+    first = _get_users(cache, auth_headers).json()
+    assert _get_users(cache, auth_headers).json() == first
+    assert mock_woffu.counts["users"] == 2
+    assert cache_stats()["revalidated"] == before["revalidated"] + 1
+
+
+def test_invalidate_forces_a_download(mock_woffu, auth_headers, tmp_path):
+    cache = _cache(tmp_path)
+    _get_users(cache, auth_headers)
+    cache.invalidate(KIND_USERS)
+    _get_users(cache, auth_headers)
+    assert mock_woffu.counts["users"] == 2
+
+
+def test_entries_are_evicted_beyond_max_bytes(mock_woffu, auth_headers, tmp_path):
+    cache = _cache(tmp_path, max_bytes=1)
+    _get_users(cache, auth_headers)
+    assert cache._lookup(woffu.USERS_URL) is None
+
+
+def test_caches_of_one_file_share_a_connection(tmp_path):
+    alice, bob = _cache(tmp_path), ResponseCache(str(tmp_path / woffu_cache.RESPONSE_CACHE_FILE), "bob")
+    assert alice._conn is bob._conn
+    woffu_cache.close_response_caches()
@@ -0,0 +1,45 @@
+import woffu_cli
+from woffu_interval import DayPlan, Interval
+
+RANGE = {"from_date": "2024-03-04", "to_date": "2024-03-08"}
+
+
+def _runner(data_file):
+    return woffu_cli.WoffuAutologin(data_file=data_file, show_progress=False, show_statistics=False)
+
+
+def test_resume_skips_days_filed_with_the_same_schedule(mock_woffu, data_file):
+    assert _runner(data_file).execute_monthly_filing(same_schedule="08:00-15:00", **RANGE)["success"] == 5
+    stats = _runner(data_file).execute_monthly_filing(same_schedule="08:00-15:00", resume=True, **RANGE)
+    assert stats == {"success": 0, "skipped": 5, "errors": 0}
+
+
+def test_resume_resends_days_after_a_schedule_change(mock_woffu, data_file, monkeypatch):
+    monkeypatch.setattr(woffu_cli, "RANDOM_VARIATION_SECONDS", 60)
+    _runner(data_file).execute_monthly_filing(same_schedule="08:00-15:00", **RANGE)
+    stats = _runner(data_file).execute_monthly_filing(same_schedule="08:10-15:10", resume=True, **RANGE)
+    assert stats == {"success": 5, "skipped": 0, "errors": 0}
+
+
+def test_without_resume_every_day_is_sent(mock_woffu, data_file, monkeypatch):
+    monkeypatch.setattr(woffu_cli, "LEDGER_RESUME", False)
+    _runner(data_file).execute_monthly_filing(same_schedule="08:00-15:00", **RANGE)
+    stats = _runner(data_file).execute_monthly_filing(same_schedule="08:00-15:00", **RANGE)
+    assert stats["success"] == 5
+
+
+def test_plan_days_are_compared_exactly():
+    filed = [("08:01:00", "15:02:00")]
+    plan_day = DayPlan("2024-03-04", [Interval.parse("08:01:00", "15:02:00")])
+    assert woffu_cli.WoffuAutologin._same_schedule(filed, plan_day)
+    plan_day = DayPlan("2024-03-04", [Interval.parse("08:01:00", "15:02:01")])
+    assert not woffu_cli.WoffuAutologin._same_schedule(filed, plan_day)
+
+
+def test_sync_classification():
+    autologin = woffu_cli.WoffuAutologin.__new__(woffu_cli.WoffuAutologin)
+    intervals = [Interval.parse("08:00:00", "15:00:00")]
+    assert autologin._classify_day({"in": None, "out": None}, intervals) == "missing"
+    assert autologin._classify_day({"in": "08:04:00", "out": "14:57:00"}, intervals) == "unchanged"
+    assert autologin._classify_day({"in": "09:30:00", "out": "15:00:00"}, intervals) == "different"
+    assert autologin._classify_day({"in": "08:00:00", "out": None}, intervals) == "different"
@@ -0,0 +1,22 @@
+import pytest
+
+from woffu_cli import WoffuAutologin
+from woffu_interval import Interval
+
+autologin = WoffuAutologin.__new__(WoffuAutologin)
+
+
+def test_parse_interval_accepts_minutes_and_seconds():
+    assert autologin._parse_interval("08:00-14:30") == Interval.parse("08:00:00", "14:30:00")
+    assert autologin._parse_interval(" 08:00:15 - 14:30:45 ") == Interval.parse("08:00:15", "14:30:45")
+
+
+@pytest.mark.parametrize("value", ["08:00", "8-14", "08:00-24:00", "08:60-14:00", "14:00-08:00", "aa:bb-14:00"])
+def test_parse_interval_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        autologin._parse_interval(value)
+
+
+def test_parse_same_schedule():
+    assert autologin._parse_same_schedule("08:00-14:30,15:00-17:00") == [
+        Interval.parse("08:00:00", "14:30:00"), Interval.parse("15:00:00", "17:00:00")]
@@ -0,0 +1,44 @@
+import json
+import threading
+
+import woffu
+
+
+def test_token_is_reused_from_memory_and_disk(mock_woffu, tmp_path):
+    cache_file = str(tmp_path / woffu.TOKEN_CACHE_FILE)
+    token = woffu.getAccessToken("alice", "secret", cache_file)
+    assert woffu.getAccessToken("alice", "secret", cache_file) == token
+    woffu._token_cache.clear()
+    assert woffu.getAccessToken("alice", "secret", cache_file) == token
+    assert mock_woffu.counts["token"] == 1
+
+
+def test_expired_token_is_refreshed_with_the_refresh_token(mock_woffu, tmp_path, monkeypatch):
+    cache_file = str(tmp_path / woffu.TOKEN_CACHE_FILE)
+    token = woffu.getAccessToken("alice", "secret", cache_file)
+    with open(cache_file) as f:
+        cached = json.load(f)
+    cached["alice"]["expires_at"] = 0
+    with open(cache_file, "w") as f:
+        json.dump(cached, f)
+    woffu._token_cache.clear()
+
+    grants = []
+    request_token = woffu._request_token
+    monkeypatch.setattr(woffu, "_request_token", lambda form, http=None: grants.append(form["grant_type"])
+                        or request_token(form, http))
+    assert woffu.getAccessToken("alice", "secret", cache_file) != token
+    assert grants == ["refresh_token"]
+
+
+def test_concurrent_users_keep_each_others_tokens(mock_woffu, tmp_path):
+    cache_file = str(tmp_path / woffu.TOKEN_CACHE_FILE)
+    users = [f"user{i}" for i in range(8)]
+    threads = [threading.Thread(target=woffu.getAccessToken, args=(user, "secret", cache_file)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(cache_file) as f:
+        assert sorted(json.load(f)) == users
+    assert mock_woffu.counts["token"] == len(users)
@@ -0,0 +1,39 @@
+import pytest
+
+import woffu_cli
+from woffu_ledger import FilingLedger
+from woffu_mock import MockWoffuState
+
+RANGE = {"from_date": "2024-03-04", "to_date": "2024-03-06", "same_schedule": "08:00-15:00"}
+
+
+def _runner(data_file):
+    return woffu_cli.WoffuAutologin(data_file=data_file, show_progress=False, show_statistics=False)
+
+
+@pytest.fixture(params=["direct", "worker"])
+def mode(request, mock_woffu, monkeypatch):
+    """Envío con woffu.py importado o a través del proceso auxiliar."""
+    if request.param == "worker":
+        monkeypatch.setattr(woffu_cli, "WOFFU_AVAILABLE", False)
+        monkeypatch.setenv("WOFFU_BASE_URL", mock_woffu.url)
+    return request.param
+
+
+def test_verified_days_count_once(mode, data_file):
+    stats = _runner(data_file).execute_monthly_filing(verify=True, **RANGE)
+    assert stats == {"success": 3, "skipped": 0, "errors": 0, "verified": 3}
+
+
+def test_unverified_days_move_from_success_to_errors(mode, data_file, tmp_path, monkeypatch):
+    # Woffu acepta el PUT pero no muestra los fichajes
+    monkeypatch.setattr(MockWoffuState, "set_slots", lambda self, diary_id, slots: diary_id in self.diaries)
+    stats = _runner(data_file).execute_monthly_filing(verify=True, **RANGE)
+    assert stats == {"success": 0, "skipped": 0, "errors": 3}
+
+    ledger = FilingLedger(str(tmp_path / woffu_cli.LEDGER_FILE))
+    try:
+        user_id = _runner(data_file)._load_user_data()["user_id"]
+        assert ledger.confirmed_filings(user_id, "2024-03-04", "2024-03-06") == {}
+    finally:
+        ledger.close()
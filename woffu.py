@@ -5,21 +5,26 @@ Versión simplificada para usar con woffu_unified.py
 """
 
 import sys
-import holidays
 import requests
 import json
+import os
 import os.path
 import getpass
-from datetime import date, datetime
-from dateutil.tz import tzlocal
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
 from operator import itemgetter
-from typing import List, Tuple
+from typing import Dict, List, Optional
+from woffu_http import get_default_client
+from woffu_calendar import get_calendar, holidays_cache_path
+from woffu_interval import Interval, IntervalLike, as_intervals, first_overlap
+from woffu_cache import open_response_cache, RESPONSE_CACHE_FILE, KIND_USERS, KIND_COMPANY, KIND_PRESENCE
+from woffu_trace import trace_phase
 
-def _build_slot(start_time: str, end_time: str, order: int) -> dict:
-    """Construye un slot Woffu a partir de horas texto."""
-    t1 = datetime.strptime(start_time, "%H:%M:%S")
-    t2 = datetime.strptime(end_time, "%H:%M:%S")
-    total_minutes = int((t2 - t1).total_seconds() / 60)
+def _build_slot(interval: Interval, order: int) -> dict:
+    """Construye un slot Woffu; las horas se formatean como texto sólo aquí."""
+    start_time, end_time = interval
     return {
         "id": None,
         "motive": None,
@@ -54,112 +59,293 @@ def _build_slot(start_time: str, end_time: str, order: int) -> dict:
             "userId": 0
         },
         "order": order,
-        "totalMin": total_minutes,
+        "totalMin": interval.minutes,
         "deleted": False,
         "new": True
     }
 
-def setPresenceFlexible(auth_headers, user_id, diary_id, start_time, end_time, woffu_url, existing_slots=None):
+def _slots_url(woffu_url, diary_id):
+    return f"https://{woffu_url}/api/diaries/{diary_id}/workday/slots/self"
+
+def _slots_payload(user_id, diary_id, work_date, intervals: List[IntervalLike]) -> dict:
+    """Cuerpo del PUT de slots: todos los intervalos del día, en orden."""
+    return {
+        "userId": user_id,
+        "comments": "",
+        "date": work_date,
+        "slots": [_build_slot(interval, idx) for idx, interval in enumerate(as_intervals(intervals), start=1)],
+        "diaryId": diary_id
+    }
+
+def setPresenceFlexible(auth_headers, user_id, diary_id, start_time, end_time, woffu_url, existing_slots=None, http=None,
+                        work_date=None, ledger=None):
     """Crea un solo intervalo (retrocompatibilidad)."""
-    return setPresenceFlexibleMultiple(auth_headers, user_id, diary_id, [(start_time, end_time)], woffu_url)
+    return setPresenceFlexibleMultiple(auth_headers, user_id, diary_id, [(start_time, end_time)], woffu_url, http=http,
+                                       work_date=work_date, ledger=ledger)
 
-def setPresenceFlexibleMultiple(auth_headers, user_id, diary_id, intervals: List[Tuple[str,str]], woffu_url):
+def setPresenceFlexibleMultiple(auth_headers, user_id, diary_id, intervals: List[IntervalLike], woffu_url, http=None,
+                                work_date=None, ledger=None):
     """Envía un PUT con todos los intervalos del día en una sola llamada.
 
     IMPORTANTE: Esta llamada reemplaza los slots existentes del día en el diario.
     Por eso se utiliza sólo cuando queremos establecer todos los intervalos previstos.
+    Si se indica un ledger (FilingLedger), se registra el resultado del envío.
     """
-    url = f"https://{woffu_url}/api/diaries/{diary_id}/workday/slots/self"
-    # Fecha del día que estamos procesando (variable global establecida en woffu_file_entry* )
-    work_date = date_to_update if 'date_to_update' in globals() else datetime.now().strftime("%Y-%m-%d")
-
-    slots = []
-    for idx, (s,e) in enumerate(intervals, start=1):
-        slots.append(_build_slot(s, e, idx))
+    # Fecha del día que estamos procesando (por defecto, hoy)
+    if work_date is None:
+        work_date = datetime.now().strftime("%Y-%m-%d")
 
-    payload = {
-        "userId": user_id,
-        "comments": "",
-        "date": work_date,
-        "slots": slots,
-        "diaryId": diary_id
-    }
+    payload = _slots_payload(user_id, diary_id, work_date, intervals)
     try:
-        response = requests.put(url, headers=auth_headers, json=payload)
+        response = (http or get_default_client()).put(_slots_url(woffu_url, diary_id), headers=auth_headers, json=payload)
+        if ledger is not None:
+            ledger.record(user_id, work_date, intervals, diary_id, response.status_code)
         response.raise_for_status()
-        print(f"✅ Fichajes creados ({len(slots)} intervalo(s)). Status: {response.status_code}")
+        print(f"✅ Fichajes creados ({len(payload['slots'])} intervalo(s)). Status: {response.status_code}")
     except requests.exceptions.RequestException as e:
         print(f"❌ Error creando fichajes múltiples: {e}")
         if hasattr(e.response, 'text'):
             print(f"Response text: {e.response.text}")
+        if ledger is not None and e.response is None:
+            ledger.record(user_id, work_date, intervals, diary_id, None)
         raise
 
 # aux functions
-def getHolidays(company_country, company_subdivision):
-    today = date.today().strftime("%Y-%m-%d")
-    check_holidays = holidays.CountryHoliday(company_country)
-    get_holidays = check_holidays.get(today)
-    if (get_holidays):
-        print(get_holidays)
+def holidaysCachePath(data_file='data.json'):
+    """Ruta del fichero de caché de festivos, en el mismo directorio que data_file."""
+    return holidays_cache_path(data_file)
+
+def getHolidays(company_country, company_subdivision, on_date=None, cache_file=None):
+    """Indica si on_date (YYYY-MM-DD, por defecto hoy) es festivo en el país/región de la empresa."""
+    check_date = on_date or date.today().strftime("%Y-%m-%d")
+    holiday_name = get_calendar(company_country, company_subdivision, cache_file).holiday_name(check_date)
+    if holiday_name:
+        print(holiday_name)
         return True
     else:
         return False
 
-def getAuthHeaders(username, password):
-    # we need to get the Bearer access token for every request we make to Woffu
-    print("Getting access token...\n")
-    access_token = requests.post(
-        "https://app.woffu.com/token",
-        data = f"grant_type=password&username={username}&password={password}"
-    ).json()['access_token']
+# === TOKEN DE ACCESO ===
+TOKEN_URL = "https://app.woffu.com/token"
+TOKEN_CACHE_FILE = "token_cache.json"   # Se guarda junto a data.json
+TOKEN_EXPIRY_MARGIN_SECONDS = 120        # Renovar el token un poco antes de que caduque
+DEFAULT_TOKEN_LIFETIME_SECONDS = 3600    # Si el servidor no envía expires_in
+
+# Caché en memoria: username -> {"access_token", "refresh_token", "expires_at"}
+_token_cache = {}
+_token_lock = threading.Lock()
+
+def tokenCachePath(data_file='data.json'):
+    """Ruta del fichero de caché de tokens, en el mismo directorio que data_file."""
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), TOKEN_CACHE_FILE)
+
+def responseCachePath(data_file='data.json'):
+    """Ruta de la caché de respuestas GET (woffu_cache.py), en el mismo directorio que data_file."""
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), RESPONSE_CACHE_FILE)
+
+def _get(url, auth_headers, http=None, cache=None, kind=KIND_USERS, immutable=None):
+    """GET de un endpoint de sólo lectura, a través de la caché de respuestas si se indica."""
+    http = http or get_default_client()
+    if cache is None:
+        return http.get(url, headers=auth_headers)
+    return cache.get(http, url, auth_headers, kind, immutable)
+
+def _load_token_cache(cache_file):
+    try:
+        with open(cache_file, "r") as f:
+            cached = json.load(f)
+        return cached if isinstance(cached, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_token_cache(cache_file, cache):
+    """Escribe la caché de forma atómica y con permisos restringidos (contiene tokens)."""
+    tmp_file = f"{cache_file}.tmp"
+    try:
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la caché de tokens: {e}")
+
+def _token_is_valid(entry):
+    return bool(entry and entry.get("access_token")) and \
+        entry.get("expires_at", 0) - TOKEN_EXPIRY_MARGIN_SECONDS > time.time()
+
+def _password_grant(username, password):
+    return {"grant_type": "password", "username": username, "password": password}
+
+def _refresh_grant(refresh_token):
+    return {"grant_type": "refresh_token", "refresh_token": refresh_token}
+
+def _cached_token(username, cache_file=None):
+    """Busca el token en memoria y, si no es válido, en disco."""
+    with _token_lock:
+        entry = _token_cache.get(username)
+        if not _token_is_valid(entry) and cache_file:
+            entry = _load_token_cache(cache_file).get(username) or entry
+        if _token_is_valid(entry):
+            _token_cache[username] = entry
+        return entry
+
+def _store_token(username, entry, cache_file=None):
+    with _token_lock:
+        _token_cache[username] = entry
+        if cache_file:
+            # Se relee el fichero: otros usuarios pueden haber guardado su token mientras tanto
+            disk_cache = _load_token_cache(cache_file)
+            disk_cache[username] = entry
+            _save_token_cache(cache_file, disk_cache)
+
+def _token_entry(token):
+    """Normaliza la respuesta de /token con su instante de caducidad."""
+    try:
+        expires_in = int(token.get("expires_in", DEFAULT_TOKEN_LIFETIME_SECONDS))
+    except (TypeError, ValueError):
+        expires_in = DEFAULT_TOKEN_LIFETIME_SECONDS
+    return {
+        "access_token": token["access_token"],
+        "refresh_token": token.get("refresh_token"),
+        "expires_at": time.time() + expires_in
+    }
+
+def _request_token(form, http=None):
+    """Llama al endpoint /token y normaliza la respuesta con su instante de caducidad."""
+    # El grant no tiene efectos secundarios: se puede reintentar aunque sea un POST
+    response = (http or get_default_client()).post(TOKEN_URL, data=form, retry=True)
+    response.raise_for_status()
+    return _token_entry(response.json())
+
+# Un lock por usuario: varios hilos no piden a la vez un grant para el mismo usuario,
+# pero los usuarios de un lote renuevan sus tokens en paralelo
+_token_refresh_locks: Dict[str, threading.Lock] = {}
+_token_refresh_locks_lock = threading.Lock()
+
+def _token_refresh_lock(username):
+    with _token_refresh_locks_lock:
+        return _token_refresh_locks.setdefault(username, threading.Lock())
+
+def getAccessToken(username, password, cache_file=None, http=None):
+    """Devuelve un access token válido reutilizando la caché siempre que sea posible.
+
+    Orden de preferencia: caché en memoria, caché en disco, refresh_token y,
+    sólo como último recurso, el grant de contraseña.
+    """
+    with _token_refresh_lock(username):
+        entry = _cached_token(username, cache_file)
+        if _token_is_valid(entry):
+            return entry["access_token"]
+
+        new_entry = None
+        if entry and entry.get("refresh_token"):
+            print("Refreshing access token...\n")
+            try:
+                new_entry = _request_token(_refresh_grant(entry["refresh_token"]), http)
+                new_entry["refresh_token"] = new_entry["refresh_token"] or entry["refresh_token"]
+            except (requests.exceptions.RequestException, KeyError, ValueError):
+                new_entry = None
+        if new_entry is None:
+            print("Getting access token...\n")
+            new_entry = _request_token(_password_grant(username, password), http)
+
+        _store_token(username, new_entry, cache_file)
+        return new_entry["access_token"]
+
+def invalidateAccessToken(username, cache_file=None):
+    """Descarta el token cacheado (p.ej. tras un 401) para forzar uno nuevo."""
+    with _token_lock:
+        _token_cache.pop(username, None)
+        if cache_file:
+            disk_cache = _load_token_cache(cache_file)
+            if disk_cache.pop(username, None) is not None:
+                _save_token_cache(cache_file, disk_cache)
+
+def getAuthHeaders(username, password, cache_file=None, http=None):
+    # we need a Bearer access token for every request we make to Woffu,
+    # but the same token is reused until shortly before it expires
+    return _auth_headers(getAccessToken(username, password, cache_file, http))
+
+def _auth_headers(access_token):
     return {
         'Authorization': 'Bearer ' + access_token,
         'Accept': 'application/json',
         'Content-Type': 'application/json;charset=utf-8'
     }
 
-def getDomainUserCompanyId(auth_headers):
+USERS_URL = "https://app.woffu.com/api/users"
+
+def _company_url(company_id):
+    return f"https://app.woffu.com/api/companies/{company_id}"
+
+def getDomainUserCompanyId(auth_headers, http=None, cache=None):
     # This function should only be called the first time the script runs.
     # We'll store the results for subsequent executions
     print("Getting IDs...\n")
-    users = requests.get(
-        "https://app.woffu.com/api/users", 
-        headers = auth_headers
-    ).json()
-    company = requests.get(
-        f"https://app.woffu.com/api/companies/{users['CompanyId']}", 
-        headers = auth_headers
-    ).json()
+    users = _get(USERS_URL, auth_headers, http, cache, KIND_USERS).json()
+    company = _get(_company_url(users['CompanyId']), auth_headers, http, cache, KIND_COMPANY).json()
     return company['Domain'], users['UserId'], users['CompanyId']
 
-def signIn(domain, user_id, auth_headers):
+def _sign_url(domain):
+    return f"https://{domain}/api/svc/signs/signs"
+
+def _sign_payload(user_id):
+    """Cuerpo de un fichaje en tiempo real con la hora y zona horaria locales actuales."""
+    from dateutil.tz import tzlocal  # Sólo hace falta para fichar en tiempo real
     current_time = datetime.now(tzlocal())
     offset_seconds=current_time.utcoffset().total_seconds()
     offset_minutes=offset_seconds/60
     utc_timezone=int(offset_seconds/3600)
     timezone_offset=- + int(offset_minutes)
     utc_timezone_hours='+0{:}'.format(utc_timezone) + ":00"
+    return {
+        'StartDate': datetime.now().replace(microsecond=0).isoformat() + utc_timezone_hours,
+        'EndDate': datetime.now().replace(microsecond=0).isoformat() + utc_timezone_hours,
+        'TimezoneOffset': timezone_offset,
+        'UserId': user_id
+    }
+
+def signIn(domain, user_id, auth_headers, http=None):
     #Actually log in
     print("Sending sign request...\n")
-    final_url = f"https://{domain}/api/svc/signs/signs"
-    return requests.post(
-        f"https://{domain}/api/svc/signs/signs",
-        json={
-            'StartDate': datetime.now().replace(microsecond=0).isoformat() + utc_timezone_hours,
-            'EndDate': datetime.now().replace(microsecond=0).isoformat() + utc_timezone_hours,
-            'TimezoneOffset': timezone_offset,
-            'UserId': user_id
-        },
+    return (http or get_default_client()).post(
+        _sign_url(domain),
+        json=_sign_payload(user_id),
         headers = auth_headers
     ).ok
 
 # Fetch presences
-def getPrensence(user_id, auth_headers, woffu_url):
-    # Define the date to search
-    fromDate = date_to_update
-    toDate = date_to_update
-    url = f"https://{woffu_url}/api/svc/core/diariesquery/users/{user_id}/diaries/summary/presence?userId={user_id}&fromDate={fromDate}&toDate={toDate}&pageSize=31&includeHourTypes=true&includeNotHourTypes=true&includeDifference=true"
-    response = requests.get(url, headers=auth_headers)
+PRESENCE_PAGE_SIZE = 31  # Máximo de diarios por consulta (uno por día)
+
+def _presence_url(woffu_url, user_id, from_date, to_date):
+    return f"https://{woffu_url}/api/svc/core/diariesquery/users/{user_id}/diaries/summary/presence?userId={user_id}&fromDate={from_date}&toDate={to_date}&pageSize={PRESENCE_PAGE_SIZE}&includeHourTypes=true&includeNotHourTypes=true&includeDifference=true"
+
+def _presence_range_urls(woffu_url, user_id, from_date, to_date) -> List[str]:
+    """URLs de presencia que cubren el rango en ventanas de PRESENCE_PAGE_SIZE días."""
+    start = datetime.strptime(from_date, "%Y-%m-%d").date()
+    end = datetime.strptime(to_date, "%Y-%m-%d").date()
+    urls = []
+    while start <= end:
+        window_end = min(end, start + timedelta(days=PRESENCE_PAGE_SIZE - 1))
+        urls.append(_presence_url(woffu_url, user_id, start.isoformat(), window_end.isoformat()))
+        start = window_end + timedelta(days=1)
+    return urls
+
+def _presence_is_final(response) -> bool:
+    """Una página de presencia ya no cambia si todos sus días son pasados y están aceptados."""
+    diaries = response.json().get("diaries") or []
+    today = date.today().isoformat()
+    return bool(diaries) and all(
+        str(diary.get("date"))[:10] < today and diary.get("accepted") and not diary.get("isPending")
+        for diary in diaries
+    )
+
+def getPrensence(user_id, auth_headers, woffu_url, http=None, work_date=None, cache=None):
+    # Define the date to search (por defecto, hoy)
+    fromDate = work_date or datetime.now().strftime("%Y-%m-%d")
+    toDate = fromDate
+    url = _presence_url(woffu_url, user_id, fromDate, toDate)
+    response = _get(url, auth_headers, http, cache, KIND_PRESENCE, _presence_is_final)
 
     if response.status_code == 200:
         presence_data = response.json()
@@ -186,6 +372,58 @@ def getPrensence(user_id, auth_headers, woffu_url):
         print(f"Error {response.status_code}: {response.text}")
         return None
 
+def getPresenceRange(user_id, auth_headers, woffu_url, from_date, to_date, http=None,
+                     cache=None) -> Optional[List[dict]]:
+    """Obtiene los diarios de presencia de todo un rango de fechas.
+
+    El endpoint devuelve como máximo PRESENCE_PAGE_SIZE diarios por página, así que
+    los rangos largos se recorren en ventanas de ese número de días. Con cache, las
+    ventanas de días pasados ya aceptados no se vuelven a pedir.
+
+    Returns:
+        Lista de diarios o None si alguna de las consultas falla
+    """
+    diaries = []
+    for url in _presence_range_urls(woffu_url, user_id, from_date, to_date):
+        response = _get(url, auth_headers, http, cache, KIND_PRESENCE, _presence_is_final)
+        if response.status_code != 200:
+            print(f"Error {response.status_code}: {response.text}")
+            return None
+        diaries.extend(response.json().get("diaries", []))
+    return diaries
+
+def buildPresenceIndex(diaries: List[dict]) -> Dict[str, dict]:
+    """Indexa los diarios por fecha (YYYY-MM-DD) con los campos que usamos."""
+    index = {}
+    for diary in diaries:
+        index[str(diary["date"])[:10]] = {
+            "diaryId": diary["diaryId"],
+            "in": diary.get("in"),
+            "out": diary.get("out"),
+            "accepted": diary.get("accepted"),
+            "isPending": diary.get("isPending")
+        }
+    return index
+
+def _load_login_info(data_file):
+    with open(data_file, "r") as json_data:
+        return json.load(json_data)
+
+def loadPresenceIndex(from_date: str, to_date: str, data_file='data.json',
+                      use_cache=True) -> Optional[Dict[str, dict]]:
+    """Descarga una sola vez la presencia del rango y devuelve el índice fecha -> diario.
+
+    Con use_cache=False se pide siempre a Woffu (p.ej. para verificar lo enviado).
+
+    Returns:
+        dict fecha -> diario o None si no se pudo obtener
+    """
+    try:
+        return getWoffuClient(data_file).presence_index(from_date, to_date, use_cache)
+    except Exception as e:
+        print(f"❌ Error obteniendo la presencia de {from_date} a {to_date}: {e}")
+        return None
+
 def saveData(username, password, user_id, company_id, company_country, company_subdivision, domain, woffu_url, data_file='data.json'):
     """Guarda los datos de usuario para futuras ejecuciones"""
     with open(data_file, "w") as login_info:
@@ -204,7 +442,150 @@ def saveData(username, password, user_id, company_id, company_country, company_s
             indent=2
         )
 
-def woffu_file_entry(filing_date, start_time, end_time, data_file='data.json'):
+class WoffuClient:
+    """Operaciones de Woffu de un usuario con las credenciales leídas una sola vez.
+
+    No guarda la fecha en curso: cada operación la recibe como argumento, así que
+    una misma instancia se puede usar a la vez desde varios hilos (el token se
+    comparte a través de la caché de getAccessToken).
+    """
+
+    def __init__(self, login_info: dict, data_file: Optional[str] = None, http=None):
+        self.login_info = login_info
+        self.data_file = data_file
+        self.http = http
+        self.domain, self.username, self.password, self.user_id, self.company_id, \
+            self.company_country, self.company_subdivision, self.woffu_url = itemgetter(
+                "domain", "username", "password", "user_id", "company_id",
+                "company_country", "company_subdivision", "woffu_url"
+            )(login_info)
+        self.token_cache = tokenCachePath(data_file) if data_file else None
+        self.response_cache = open_response_cache(responseCachePath(data_file), self.username) if data_file else None
+        self.source_mtime = None
+        self._auth_verified = False
+        self._auth_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, data_file='data.json', http=None) -> "WoffuClient":
+        client = cls(_load_login_info(data_file), data_file, http)
+        client.source_mtime = os.stat(data_file).st_mtime_ns
+        return client
+
+    def auth_headers(self) -> dict:
+        return getAuthHeaders(self.username, self.password, self.token_cache, self.http)
+
+    def verified_auth_headers(self) -> Optional[dict]:
+        """Cabeceras con un token que Woffu acepta, comprobado una sola vez por cliente.
+
+        La comprobación es un GET a /api/users sin efectos; ante un 401 se descarta el
+        token cacheado y se pide otro. Devuelve None si las credenciales no sirven.
+        """
+        with self._auth_lock:
+            if not self._auth_verified:
+                # Siempre contra Woffu, sin caché: es lo que comprueba el token
+                http = self.http or get_default_client()
+                response = http.get(USERS_URL, headers=self.auth_headers())
+                if response.status_code == 401:
+                    invalidateAccessToken(self.username, self.token_cache)
+                    response = http.get(USERS_URL, headers=self.auth_headers())
+                if not response.ok:
+                    return None
+                self._auth_verified = True
+                print("✅ Login exitoso")
+        return self.auth_headers()
+
+    def sign(self, auth_headers: Optional[dict] = None) -> bool:
+        """Fichaje en tiempo real (entrada o salida) con la hora actual; no se usa al rellenar días."""
+        return signIn(self.domain, self.user_id, auth_headers or self.auth_headers(), self.http)
+
+    def presence(self, work_date: str, auth_headers: Optional[dict] = None) -> Optional[dict]:
+        return getPrensence(self.user_id, auth_headers or self.auth_headers(), self.woffu_url, self.http, work_date,
+                            self.response_cache)
+
+    def presence_index(self, from_date: str, to_date: str, use_cache=True) -> Optional[Dict[str, dict]]:
+        """Índice fecha -> diario de todo el rango (ver loadPresenceIndex)."""
+        with trace_phase("token"):
+            auth_headers = self.auth_headers()
+        with trace_phase("presence", from_date=from_date, to_date=to_date):
+            diaries = getPresenceRange(self.user_id, auth_headers, self.woffu_url, from_date, to_date, self.http,
+                                       self.response_cache if use_cache else None)
+        return None if diaries is None else buildPresenceIndex(diaries)
+
+    def set_slots(self, diary_id, intervals: List[IntervalLike], work_date: str,
+                  auth_headers: Optional[dict] = None, ledger=None):
+        try:
+            setPresenceFlexibleMultiple(auth_headers or self.auth_headers(), self.user_id, diary_id, intervals,
+                                        self.woffu_url, http=self.http, work_date=work_date, ledger=ledger)
+        finally:
+            # La presencia cacheada del usuario ya no refleja lo que hay en Woffu
+            if self.response_cache is not None:
+                self.response_cache.invalidate(KIND_PRESENCE)
+
+    def file_entry(self, work_date: str, intervals: List[IntervalLike], diary: Optional[dict] = None,
+                   ledger=None) -> bool:
+        """Fichaje de un día con uno o varios intervalos (ver woffu_file_entry_multi).
+
+        Sólo escribe los slots del diario (token, presencia y PUT): no envía un fichaje en
+        tiempo real, que quedaría con la hora actual en lugar de la del día rellenado.
+        Ficha el día que recibe: saltar fines de semana y festivos lo decide quien planifica.
+        """
+        try:
+            with trace_phase("token", date=work_date):
+                auth_headers = self.verified_auth_headers()
+            if auth_headers is None:
+                print("❌ Error al hacer login en Woffu")
+                return False
+
+            if diary is None:
+                with trace_phase("presence", date=work_date):
+                    presence_data = self.presence(work_date, auth_headers)
+                if not presence_data or not presence_data.get("diaries"):
+                    print("❌ No se pudo obtener información de presencia")
+                    return False
+                diary = presence_data["diaries"][0]
+
+            # Ordenar y asegurar no solapamiento (seguridad extra)
+            sorted_intervals = sorted(as_intervals(intervals))
+            overlap = first_overlap(sorted_intervals)
+            if overlap:
+                raise ValueError(f"Intervalos solapados: {tuple(overlap[0])} y {tuple(overlap[1])}")
+
+            with trace_phase("put", date=work_date, intervals=len(sorted_intervals)):
+                self.set_slots(diary["diaryId"], sorted_intervals, work_date, auth_headers, ledger)
+            joined = ", ".join([f"{a}-{b}" for a,b in sorted_intervals])
+            print(f"✅ Fichajes completados para {work_date}: {joined}")
+            return True
+        except Exception as e:
+            print(f"❌ Error durante el fichaje de {work_date}: {e}")
+            return False
+
+# Clientes compartidos por ruta de data.json (los MAX_CACHED_CLIENTS usados más recientemente)
+MAX_CACHED_CLIENTS = 64
+_clients: "OrderedDict[str, WoffuClient]" = OrderedDict()
+_clients_lock = threading.Lock()
+
+def getWoffuClient(data_file='data.json') -> WoffuClient:
+    """Cliente compartido para un data.json: se lee una sola vez (y otra vez si cambia en disco)."""
+    path = os.path.abspath(data_file)
+    mtime = os.stat(path).st_mtime_ns
+    with _clients_lock:
+        client = _clients.get(path)
+        if client is None or client.source_mtime != mtime:
+            with trace_phase("credentials"):
+                client = _clients[path] = WoffuClient.from_file(path)
+        _clients.move_to_end(path)
+        while len(_clients) > MAX_CACHED_CLIENTS:
+            _clients.popitem(last=False)
+        return client
+
+def _client_or_error(data_file, action) -> Optional[WoffuClient]:
+    try:
+        return getWoffuClient(data_file)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error durante {action}: no se pudieron leer las credenciales de {data_file}: {e}")
+        return None
+
+def woffu_file_entry(filing_date, start_time, end_time, data_file='data.json', ledger=None):
     """
     Función principal para realizar un fichaje en Woffu
     
@@ -213,103 +594,49 @@ def woffu_file_entry(filing_date, start_time, end_time, data_file='data.json'):
         start_time (str): Hora de entrada en formato HH:MM:SS
         end_time (str): Hora de salida en formato HH:MM:SS
         data_file (str): Archivo de datos de usuario
+        ledger (FilingLedger): Registro local donde anotar el resultado (opcional)
     
     Returns:
         bool: True si el fichaje fue exitoso, False en caso contrario
     """
-    global date_to_update
-    date_to_update = filing_date
-    
-    try:
-        # Cargar credenciales
-        with open(data_file, "r") as json_data:
-            login_info = json.load(json_data)
-            domain, username, password, user_id, company_id, company_country, company_subdivision, woffu_url = itemgetter(
-                "domain", "username", "password", "user_id", "company_id",
-                "company_country", "company_subdivision", "woffu_url"
-            )(login_info)
-        
-        # Obtener token de autorización
-        auth_headers = getAuthHeaders(username, password)
-        
-        # Verificar si es día festivo
-        if getHolidays(company_country, company_subdivision):
-            print("⚠️ Hoy es día festivo. ¿Qué haces trabajando?")
-            return False
-        
-        # Realizar login
-        if not signIn(domain, user_id, auth_headers):
-            print("❌ Error al hacer login en Woffu")
-            return False
-        
-        print("✅ Login exitoso")
-        
-        # Obtener información de presencia
-        presence_data = getPrensence(user_id, auth_headers, woffu_url)
-        if not presence_data or not presence_data.get("diaries"):
-            print("❌ No se pudo obtener información de presencia")
-            return False
-        
-        # Obtener el diary para el día específico
-        first_diary = presence_data["diaries"][0]
-        diary_id = first_diary["diaryId"]
-        # Crear el fichaje (sin verificar fichajes existentes)
-        setPresenceFlexible(auth_headers, user_id, diary_id, start_time, end_time, woffu_url)
-        print(f"✅ Fichaje completado para {filing_date}: {start_time} - {end_time}")
-        return True
-    except Exception as e:
-        print(f"❌ Error durante el fichaje: {e}")
-        return False
-def woffu_file_entry_multi(filing_date: str, intervals: List[Tuple[str,str]], data_file='data.json') -> bool:
+    client = _client_or_error(data_file, "el fichaje")
+    return client is not None and client.file_entry(filing_date, [(start_time, end_time)], ledger=ledger)
+
+def woffu_file_entry_multi(filing_date: str, intervals: List[IntervalLike], data_file='data.json',
+                           diary: Optional[dict] = None, ledger=None) -> bool:
     """Fichaje múltiple para un mismo día con varios intervalos.
 
     Args:
         filing_date: YYYY-MM-DD
-        intervals: lista de tuplas (inicio, fin) en formato HH:MM:SS
+        intervals: lista de Interval o de tuplas (inicio, fin) en formato HH:MM:SS
         data_file: archivo con credenciales
+        diary: diario del día ya obtenido con loadPresenceIndex (evita consultar la presencia)
+        ledger: FilingLedger donde anotar el resultado (opcional)
     """
-    global date_to_update
-    date_to_update = filing_date
-    try:
-        with open(data_file, "r") as json_data:
-            login_info = json.load(json_data)
-        domain, username, password, user_id, company_id, company_country, company_subdivision, woffu_url = itemgetter(
-            "domain", "username", "password", "user_id", "company_id",
-            "company_country", "company_subdivision", "woffu_url"
-        )(login_info)
-
-        auth_headers = getAuthHeaders(username, password)
-
-        if getHolidays(company_country, company_subdivision):
-            print("⚠️ Hoy es día festivo. ¿Qué haces trabajando?")
-            return False
-
-        if not signIn(domain, user_id, auth_headers):
-            print("❌ Error al hacer login en Woffu")
-            return False
-
-        print("✅ Login exitoso")
+    client = _client_or_error(data_file, "el fichaje múltiple")
+    return client is not None and client.file_entry(filing_date, intervals, diary=diary, ledger=ledger)
 
-        presence_data = getPrensence(user_id, auth_headers, woffu_url)
-        if not presence_data or not presence_data.get("diaries"):
-            print("❌ No se pudo obtener información de presencia")
-            return False
-
-        diary_id = presence_data["diaries"][0]["diaryId"]
-
-        # Ordenar y asegurar no solapamiento (seguridad extra)
-        sorted_intervals = sorted(intervals, key=lambda x: x[0])
-        for i in range(1, len(sorted_intervals)):
-            if sorted_intervals[i-1][1] > sorted_intervals[i][0]:
-                raise ValueError(f"Intervalos solapados: {sorted_intervals[i-1]} y {sorted_intervals[i]}")
-
-        setPresenceFlexibleMultiple(auth_headers, user_id, diary_id, sorted_intervals, woffu_url)
-        joined = ", ".join([f"{a}-{b}" for a,b in sorted_intervals])
-        print(f"✅ Fichajes múltiples completados para {filing_date}: {joined}")
-        return True
-    except Exception as e:
-        print(f"❌ Error durante el fichaje múltiple: {e}")
+def woffu_sign(data_file='data.json') -> bool:
+    """
+    Fichaje en tiempo real: registra ahora una entrada o salida, como el botón de Woffu
+    
+    Args:
+        data_file (str): Archivo de datos de usuario
+    
+    Returns:
+        bool: True si Woffu aceptó el fichaje
+    """
+    client = _client_or_error(data_file, "el fichaje en tiempo real")
+    if client is None:
+        return False
+    try:
+        with trace_phase("sign"):
+            signed = client.sign()
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Error al fichar: {e}")
         return False
+    print("✅ Fichaje registrado" if signed else "❌ Woffu rechazó el fichaje")
+    return signed
 
 def main():
     """Función principal para compatibilidad con llamadas directas"""
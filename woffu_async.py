@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Woffu Async - Cliente asyncio para la API de Woffu
+Las mismas operaciones que woffu.py (token, descubrimiento de IDs, fichaje, presencia
+de un rango y PUT de slots) como corrutinas sobre un pool de conexiones aiohttp
+compartido, con límites de concurrencia por semáforo. URLs, cuerpos y caché de
+tokens son los de woffu.py, así que ambos clientes envían exactamente lo mismo.
+La E/S de disco (data.json, caché de tokens, festivos y registro local) va a un hilo
+con asyncio.to_thread para no bloquear el event loop.
+
+Requiere aiohttp (opcional: pip install aiohttp).
+
+Uso:
+    async with AsyncWoffuClient(max_concurrency=50) as client:
+        results = await asyncio.gather(*(client.backfill(data_file, days) for data_file, days in users))
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from woffu import (TOKEN_URL, USERS_URL, _auth_headers, _cached_token, _company_url, _load_login_info,
+                   _password_grant, _presence_range_urls, _refresh_grant, _sign_payload, _sign_url,
+                   _slots_payload, _slots_url, _store_token, _token_entry, _token_is_valid,
+                   buildPresenceIndex, tokenCachePath)
+from woffu_calendar import get_calendar, holidays_cache_path
+from woffu_http import (DEFAULT_BREAKER_RESET_SECONDS, DEFAULT_BREAKER_THRESHOLD, DEFAULT_POOL_SIZE,
+                        DEFAULT_TIMEOUT_SECONDS, IDEMPOTENT_METHODS, RETRYABLE_STATUSES, CircuitBreaker,
+                        CircuitOpenError, ResponseListener, RetryPolicy, rewrite_url)
+
+DEFAULT_MAX_CONCURRENCY = 20    # Peticiones en vuelo en todo el cliente
+DEFAULT_USER_CONCURRENCY = 4    # Peticiones en vuelo por usuario dentro de backfill()
+
+
+def _holidays_in(login_info: dict, data_file: str, dates: List[str]) -> Dict[str, str]:
+    """Festivos de la empresa del usuario entre las fechas dadas ({fecha: nombre})."""
+    country = login_info.get("company_country")
+    if not country:
+        return {}
+    holiday_calendar = get_calendar(country, login_info.get("company_subdivision"), holidays_cache_path(data_file))
+    holidays = {}
+    try:
+        for work_date in dates:
+            name = holiday_calendar.holiday_name(work_date)
+            if name:
+                holidays[work_date] = name
+    except ImportError:
+        print("⚠️ No está instalado el paquete 'holidays' (pip install holidays); no se omiten los festivos")
+        return {}
+    return holidays
+
+
+class AsyncResponse:
+    """Respuesta ya leída, con la parte de la interfaz de requests.Response que usa el core."""
+
+    def __init__(self, method: str, url: str, status_code: int, headers, content: bytes):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content or b"null")
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error para {self.method} {self.url}",
+                                                response=self)
+
+
+class AsyncWoffuClient:
+    """Cliente asyncio con un pool de conexiones compartido por todas las corrutinas.
+
+    max_concurrency limita las peticiones en vuelo del cliente; pool_size, las
+    conexiones keep-alive por host. Reintentos, circuito por host, listeners y
+    base_url (X-Woffu-Host) se comportan igual que en WoffuHttpClient. Los errores
+    se lanzan como excepciones de requests para tratarlos igual que en el cliente síncrono.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS, base_url: Optional[str] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+                 breaker_reset_seconds: float = DEFAULT_BREAKER_RESET_SECONDS):
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("El cliente asíncrono necesita aiohttp: pip install aiohttp")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._listeners: List[ResponseListener] = []
+        self._token_locks: Dict[str, asyncio.Lock] = {}
+
+    async def __aenter__(self) -> "AsyncWoffuClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def breaker_for(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_reset_seconds)
+        return breaker
+
+    def add_listener(self, listener: ResponseListener):
+        """Registra una función a la que se notifica cada respuesta (métricas, trazas...)."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ResponseListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, method, url, status_code, elapsed, nbytes, attempt):
+        for listener in list(self._listeners):
+            listener(method, url, status_code, elapsed, nbytes, attempt)
+
+    async def request(self, method: str, url: str, retry: Optional[bool] = None,
+                      headers: Optional[dict] = None, **kwargs) -> AsyncResponse:
+        """Envía la petición reintentando errores transitorios (misma política que WoffuHttpClient.request)."""
+        host = urlsplit(url).netloc
+        breaker = self.breaker_for(host)
+        headers = dict(headers or {})
+        target = rewrite_url(self.base_url, url, headers)
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        max_attempts = self.retry_policy.max_attempts
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuito abierto para {host}: demasiados fallos seguidos")
+            started = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    async with self._get_session().request(method, target, headers=headers, **kwargs) as raw:
+                        response = AsyncResponse(method, url, raw.status, raw.headers, await raw.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._notify(method, url, None, time.perf_counter() - started, 0, attempt)
+                breaker.record_failure()
+                attempt += 1
+                if not retry or attempt >= max_attempts:
+                    raise requests.exceptions.ConnectionError(f"{method} {url}: {e!r}") from e
+                await asyncio.sleep(self.retry_policy.delay(attempt))
+                continue
+            except BaseException:
+                # Cancelación u otro error sin respuesta: no deja la prueba del circuito bloqueada
+                breaker.abandon_probe()
+                raise
+            self._notify(method, url, response.status_code, time.perf_counter() - started,
+                         len(response.content), attempt)
+
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                # 429 indica que el host está vivo pero nos limita: no abre el circuito
+                breaker.record_success()
+            attempt += 1
+            retryable = response.status_code == 429 or (retry and response.status_code in RETRYABLE_STATUSES)
+            if not retryable or attempt >= max_attempts:
+                return response
+            await asyncio.sleep(self.retry_policy.delay(attempt, response))
+
+    # --- operaciones de Woffu ---
+    async def get_access_token(self, username: str, password: str, cache_file: Optional[str] = None) -> str:
+        """Como woffu.getAccessToken, compartiendo su caché en memoria y en disco."""
+        lock = self._token_locks.setdefault(username, asyncio.Lock())
+        async with lock:
+            entry = await asyncio.to_thread(_cached_token, username, cache_file)
+            if _token_is_valid(entry):
+                return entry["access_token"]
+
+            new_entry = None
+            if entry and entry.get("refresh_token"):
+                try:
+                    new_entry = await self._request_token(_refresh_grant(entry["refresh_token"]))
+                    new_entry["refresh_token"] = new_entry["refresh_token"] or entry["refresh_token"]
+                except (requests.exceptions.RequestException, KeyError, ValueError):
+                    new_entry = None
+            if new_entry is None:
+                new_entry = await self._request_token(_password_grant(username, password))
+
+            await asyncio.to_thread(_store_token, username, new_entry, cache_file)
+            return new_entry["access_token"]
+
+    async def _request_token(self, form: dict) -> dict:
+        # El grant no tiene efectos secundarios: se puede reintentar aunque sea un POST
+        response = await self.request("POST", TOKEN_URL, data=form, retry=True)
+        response.raise_for_status()
+        return _token_entry(response.json())
+
+    async def get_auth_headers(self, username: str, password: str, cache_file: Optional[str] = None) -> dict:
+        return _auth_headers(await self.get_access_token(username, password, cache_file))
+
+    async def get_domain_user_company_id(self, auth_headers: dict) -> Tuple[str, int, int]:
+        """Como woffu.getDomainUserCompanyId: (dominio, user_id, company_id)."""
+        users = await self.request("GET", USERS_URL, headers=auth_headers)
+        users.raise_for_status()
+        users = users.json()
+        company = await self.request("GET", _company_url(users["CompanyId"]), headers=auth_headers)
+        company.raise_for_status()
+        return company.json()["Domain"], users["UserId"], users["CompanyId"]
+
+    async def sign_in(self, domain: str, user_id: int, auth_headers: dict) -> bool:
+        """Como woffu.signIn: fichaje en tiempo real con la hora actual."""
+        response = await self.request("POST", _sign_url(domain), json=_sign_payload(user_id), headers=auth_headers)
+        return response.ok
+
+    async def get_presence_range(self, user_id: int, auth_headers: dict, woffu_url: str,
+                                 from_date: str, to_date: str) -> Optional[List[dict]]:
+        """Como woffu.getPresenceRange, pero con las ventanas del rango en paralelo."""
+        responses = await asyncio.gather(*(
+            self.request("GET", url, headers=auth_headers)
+            for url in _presence_range_urls(woffu_url, user_id, from_date, to_date)))
+        diaries = []
+        for response in responses:
+            if response.status_code != 200:
+                print(f"Error {response.status_code}: {response.text}")
+                return None
+            diaries.extend(response.json().get("diaries", []))
+        return diaries
+
+    async def set_presence_slots(self, auth_headers: dict, user_id: int, diary_id: int,
+                                 intervals: List[Tuple[str, str]], woffu_url: str, work_date: str,
+                                 ledger=None) -> AsyncResponse:
+        """Como woffu.setPresenceFlexibleMultiple: reemplaza los slots del día con un solo PUT."""
+        try:
+            response = await self.request("PUT", _slots_url(woffu_url, diary_id), headers=auth_headers,
+                                          json=_slots_payload(user_id, diary_id, work_date, intervals))
+        except requests.exceptions.RequestException:
+            if ledger is not None:
+                await asyncio.to_thread(ledger.record, user_id, work_date, intervals, diary_id, None)
+            raise
+        if ledger is not None:
+            await asyncio.to_thread(ledger.record, user_id, work_date, intervals, diary_id, response.status_code)
+        response.raise_for_status()
+        return response
+
+    async def backfill(self, data_file: str, planned_days: List[Tuple[str, List[Tuple[str, str]]]],
+                       ledger=None, concurrency: int = DEFAULT_USER_CONCURRENCY,
+                       skip_holidays: bool = True) -> Dict[str, Optional[bool]]:
+        """Rellena los días planificados de un usuario: un token, una consulta de presencia
+        para todo el rango y un PUT por día, con como mucho `concurrency` PUTs a la vez.
+
+        Args:
+            data_file (str): Fichero de credenciales del usuario
+            planned_days (list): [(YYYY-MM-DD, [(entrada, salida), ...])] en orden de fecha
+            ledger (FilingLedger): Registro local donde anotar cada envío (opcional)
+            skip_holidays (bool): Saltar los festivos de la empresa, como SKIP_HOLIDAYS en la CLI
+
+        Returns:
+            dict: fecha -> True si el PUT fue aceptado, False si falló, None si se saltó por festivo
+        """
+        if not planned_days:
+            return {}
+        login_info = await asyncio.to_thread(_load_login_info, data_file)
+        holidays = {}
+        if skip_holidays:
+            holidays = await asyncio.to_thread(_holidays_in, login_info, data_file,
+                                               [work_date for work_date, _ in planned_days])
+            for work_date, name in holidays.items():
+                print(f"⏭️ {work_date} es festivo ({name}), no se ficha")
+        skipped = {work_date: None for work_date in holidays}
+        planned_days = [day for day in planned_days if day[0] not in holidays]
+        if not planned_days:
+            return skipped
+        user_id, woffu_url = login_info["user_id"], login_info["woffu_url"]
+        auth_headers = await self.get_auth_headers(login_info["username"], login_info["password"],
+                                                   tokenCachePath(data_file))
+        diaries = await self.get_presence_range(user_id, auth_headers, woffu_url,
+                                                planned_days[0][0], planned_days[-1][0])
+        if diaries is None:
+            return {**skipped, **{work_date: False for work_date, _ in planned_days}}
+        presence_index = buildPresenceIndex(diaries)
+        user_semaphore = asyncio.Semaphore(concurrency)
+
+        async def file_day(work_date, intervals) -> bool:
+            diary = presence_index.get(work_date)
+            if diary is None:
+                print(f"❌ No existe diario en Woffu para {work_date}")
+                return False
+            async with user_semaphore:
+                try:
+                    await self.set_presence_slots(auth_headers, user_id, diary["diaryId"], intervals,
+                                                  woffu_url, work_date, ledger)
+                except requests.exceptions.RequestException as e:
+                    print(f"❌ Error creando fichajes de {work_date}: {e}")
+                    return False
+            return True
+
+        results = await asyncio.gather(*(file_day(work_date, intervals) for work_date, intervals in planned_days))
+        return {**skipped, **{work_date: ok for (work_date, _), ok in zip(planned_days, results)}}
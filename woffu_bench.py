@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Woffu Bench - Benchmark de extremo a extremo contra woffu_mock.py
+Ejecuta el fichaje de un mes, de un año y de un lote de usuarios contra el
+servidor mock y muestra peticiones por endpoint, tiempo total y latencias p50/p99.
+El escenario startup mide el arranque de woffu_cli.py en procesos nuevos (como desde cron).
+
+Uso:
+    python woffu_bench.py
+    python woffu_bench.py --scenario month --latency 0.05 --workers 4
+    python woffu_bench.py --scenario startup --runs 10
+    python woffu_bench.py --scenario year --workers 16 --max-in-flight 6 --adaptive
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import woffu
+import woffu_cli
+from woffu_http import configure_default_client, ConcurrencyPolicy
+from woffu_mock import MockWoffuServer, MockWoffuState
+
+BENCH_YEAR = 2024   # Año pasado completo: ningún día se salta por ser futuro
+BENCH_MONTH = 3
+SCENARIOS = ("month", "year", "batch", "startup")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# Arranques medidos: (nombre, argumentos de python). import-woffu es la referencia de cargarlo todo
+STARTUP_COMMANDS = (
+    ("help", [os.path.join(BENCH_DIR, "woffu_cli.py"), "--help"]),
+    ("dry-run", [os.path.join(BENCH_DIR, "woffu_cli.py"), "monthly", "--year", str(BENCH_YEAR),
+                 "--month", str(BENCH_MONTH), "--dry-run"]),
+    ("import-woffu", ["-c", "import woffu"]),
+)
+HEAVY_MODULES = ("requests", "holidays", "dateutil", "sqlite3")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _write_profile(server: MockWoffuServer, directory: str, username: str) -> str:
+    """Crea un data.json para un usuario registrado en el mock."""
+    data_file = os.path.join(directory, f"{username}.json")
+    domain = f"{username}.woffu.test"
+    woffu.saveData(username, "secret", server.state.user_id_for(username), MockWoffuState.COMPANY_ID,
+                   "ES", "MD", domain, domain, data_file)
+    return data_file
+
+
+class LatencyRecorder:
+    """Listener del cliente HTTP que acumula latencias de cada respuesta."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+
+    def __call__(self, method, url, status_code, elapsed, nbytes, attempt=0):
+        with self._lock:
+            self.latencies.append(elapsed)
+
+
+def _run_month(server, workdir, args):
+    data_file = _write_profile(server, workdir, "bench")
+    runner = woffu_cli.WoffuAutologin(data_file=data_file, show_progress=False, show_statistics=False)
+    return runner.execute_monthly_filing(year=BENCH_YEAR, month=BENCH_MONTH, workers=args.workers)
+
+
+def _run_year(server, workdir, args):
+    data_file = _write_profile(server, workdir, "bench")
+    runner = woffu_cli.WoffuAutologin(data_file=data_file, show_progress=False, show_statistics=False)
+    return runner.execute_monthly_filing(year=BENCH_YEAR, year_all=True, workers=args.workers)
+
+
+def _run_batch(server, workdir, args):
+    profiles_dir = os.path.join(workdir, "profiles")
+    os.makedirs(profiles_dir)
+    for i in range(args.users):
+        _write_profile(server, profiles_dir, f"user{i:03d}")
+    runner = woffu_cli.WoffuAutologin(show_progress=False, show_statistics=False)
+    return runner.execute_batch_filing(profiles_dir, max_concurrency=args.concurrency,
+                                       year=BENCH_YEAR, month=BENCH_MONTH)
+
+
+RUNNERS = {"month": _run_month, "year": _run_year, "batch": _run_batch}
+
+
+def run_scenario(name: str, server: MockWoffuServer, args) -> Dict:
+    """Ejecuta un escenario en un directorio temporal limpio y devuelve sus métricas."""
+    server.counts.clear()
+    server.state.throttled = 0
+    woffu._token_cache.clear()
+    policy = None
+    if args.adaptive:
+        policy = ConcurrencyPolicy(max_limit=max(args.workers, args.concurrency),
+                                   initial_limit=woffu_cli.ADAPTIVE_INITIAL_CONCURRENCY)
+    http = configure_default_client(pool_size=max(args.workers, args.concurrency, 10), base_url=server.url,
+                                    concurrency_policy=policy)
+    recorder = LatencyRecorder()
+    http.add_listener(recorder)
+
+    with tempfile.TemporaryDirectory(prefix=f"woffu-bench-{name}-") as workdir:
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        started = time.perf_counter()
+        with quiet:
+            stats = RUNNERS[name](server, workdir, args)
+        wall = time.perf_counter() - started
+    http.remove_listener(recorder)
+
+    return {
+        "scenario": name,
+        "wall_seconds": round(wall, 3),
+        "requests": sum(server.counts.values()),
+        "per_endpoint": dict(sorted(server.counts.items())),
+        "p50_ms": round(_percentile(recorder.latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(recorder.latencies, 99) * 1000, 2),
+        "throttled": server.state.throttled,
+        "concurrency": http.concurrency_stats(),
+        "stats": stats
+    }
+
+
+def _heavy_modules_loaded(argv: List[str], workdir: str, env: dict) -> List[str]:
+    """Módulos pesados que importa el comando (según python -X importtime)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=workdir, env=env,
+                          capture_output=True, text=True)
+    return [name for name in HEAVY_MODULES if re.search(rf"\|\s*{name}$", proc.stderr, re.MULTILINE)]
+
+
+def run_startup(args) -> Dict:
+    """Mide el arranque de woffu_cli.py en procesos nuevos, con un data.json y cachés reales."""
+    env = dict(os.environ, PYTHONPATH=BENCH_DIR, PYTHONDONTWRITEBYTECODE="1")
+    commands = {}
+    with tempfile.TemporaryDirectory(prefix="woffu-bench-startup-") as workdir:
+        domain = "bench.woffu.test"
+        woffu.saveData("bench", "secret", 1, MockWoffuState.COMPANY_ID, "ES", "MD", domain, domain,
+                       os.path.join(workdir, "data.json"))
+        for name, argv in STARTUP_COMMANDS:
+            # Un arranque previo sin medir deja las cachés (festivos, .pyc) como en uso normal
+            subprocess.run([sys.executable, *argv], cwd=workdir, env=env, capture_output=True)
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                subprocess.run([sys.executable, *argv], cwd=workdir, env=env, capture_output=True)
+                timings.append(time.perf_counter() - started)
+            commands[name] = {
+                "median_ms": round(statistics.median(timings) * 1000, 1),
+                "min_ms": round(min(timings) * 1000, 1),
+                "heavy_modules": _heavy_modules_loaded(argv, workdir, env)
+            }
+    return {"scenario": "startup", "runs": args.runs, "commands": commands}
+
+
+def _print_startup(result: Dict):
+    print("=" * 60)
+    print(f"[BENCH] startup: mediana de {result['runs']} arranques por comando")
+    for name, command in result["commands"].items():
+        heavy = ", ".join(command["heavy_modules"]) or "-"
+        print(f"        {name:<13} {command['median_ms']:>7.1f} ms (mín. {command['min_ms']:.1f} ms)  "
+              f"importa: {heavy}")
+
+
+def _print_result(result: Dict):
+    print("=" * 60)
+    print(f"[BENCH] {result['scenario']}: {result['wall_seconds']:.3f}s, {result['requests']} peticiones, "
+          f"p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms")
+    for endpoint, count in result["per_endpoint"].items():
+        print(f"        {endpoint:<10} {count:>6}")
+    if result["throttled"]:
+        print(f"        429 por límite del tenant: {result['throttled']}")
+    for host, limit in result["concurrency"].items():
+        print(f"        límite {host}: {limit['limit']} (mín. {limit['min']}, máx. {limit['max']}, "
+              f"{limit['decreases']} recorte(s))")
+    stats = result["stats"]
+    print(f"        ok={stats['success']} saltados={stats['skipped']} errores={stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo contra el mock de Woffu")
+    parser.add_argument('--scenario', choices=SCENARIOS + ("all",), default="all", help='Escenario a ejecutar')
+    parser.add_argument('--latency', type=float, default=0.02, help='Latencia media del mock (segundos)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Proporción de respuestas 502')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Proporción de respuestas 429')
+    parser.add_argument('--max-in-flight', type=int, default=0,
+                        help='Peticiones simultáneas que admite el mock; el resto recibe 429 (0: sin límite)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Limitar la concurrencia con el control adaptativo (hasta --workers/--concurrency)')
+    parser.add_argument('--workers', type=int, default=1, help='Días en paralelo por usuario')
+    parser.add_argument('--users', type=int, default=10, help='Usuarios del escenario batch')
+    parser.add_argument('--concurrency', type=int, default=4, help='Usuarios en paralelo del escenario batch')
+    parser.add_argument('--runs', type=int, default=5, help='Arranques medidos por comando en el escenario startup')
+    parser.add_argument('--json', action='store_true', help='Salida JSON (una línea por escenario)')
+    parser.add_argument('--verbose', action='store_true', help='No ocultar la salida del fichaje')
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    server = None
+    if any(name in RUNNERS for name in scenarios):
+        server = MockWoffuServer(latency=args.latency, error_rate=args.error_rate,
+                                 throttle_rate=args.throttle_rate, max_in_flight=args.max_in_flight).start()
+    try:
+        for name in scenarios:
+            if name == "startup":
+                result, printer = run_startup(args), _print_startup
+            else:
+                result, printer = run_scenario(name, server, args), _print_result
+            if args.json:
+                print(json.dumps(result))
+            else:
+                printer(result)
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Woffu Cache - Caché persistente de respuestas GET
+Guarda en SQLite, junto a data.json, las respuestas de los endpoints de sólo lectura
+(/api/users, /api/companies/{id} y los resúmenes de presencia) para no volver a
+pedirlas en cada ejecución.
+
+- Cada tipo de endpoint tiene su TTL. Pasado el TTL, si el servidor envió ETag o
+  Last-Modified la entrada se revalida con If-None-Match / If-Modified-Since y un 304
+  la renueva sin descargar el cuerpo.
+- Las páginas de presencia de días pasados y ya aceptados se marcan inmutables: no caducan.
+- Las entradas van separadas por usuario (scope); un fichaje invalida la presencia del usuario.
+- Si la caché supera su tamaño máximo se expulsan las entradas usadas hace más tiempo (LRU).
+- Todas las cachés de un mismo fichero comparten una sola conexión SQLite (un lote de
+  cientos de perfiles no abre un descriptor por usuario).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+RESPONSE_CACHE_FILE = "woffu_cache.db"  # Se guarda junto a data.json
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Tipos de entrada y su TTL por defecto (segundos)
+KIND_USERS = "users"
+KIND_COMPANY = "company"
+KIND_PRESENCE = "presence"
+DEFAULT_TTLS = {
+    KIND_USERS: 24 * 3600,
+    KIND_COMPANY: 7 * 24 * 3600,
+    KIND_PRESENCE: 300,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    scope         TEXT    NOT NULL,
+    url           TEXT    NOT NULL,
+    kind          TEXT    NOT NULL,
+    body          BLOB    NOT NULL,
+    content_type  TEXT,
+    etag          TEXT,
+    last_modified TEXT,
+    expires_at    REAL    NOT NULL,
+    immutable     INTEGER NOT NULL DEFAULT 0,
+    size          INTEGER NOT NULL,
+    last_used     REAL    NOT NULL,
+    PRIMARY KEY (scope, url)
+)
+"""
+
+# immutable(respuesta) -> True si la respuesta ya no puede cambiar
+ImmutablePredicate = Callable[[requests.Response], bool]
+
+_settings = {"enabled": True, "max_bytes": DEFAULT_MAX_BYTES, "ttls": dict(DEFAULT_TTLS)}
+_stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+# Ruta absoluta -> (conexión, lock) compartidos por las cachés de todos los usuarios
+_connections: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+_connections_lock = threading.Lock()
+
+
+def _shared_connection(path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+    path = os.path.abspath(path)
+    with _connections_lock:
+        shared = _connections.get(path)
+        if shared is None:
+            conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(_SCHEMA)
+                conn.commit()
+            except sqlite3.Error:
+                conn.close()
+                raise
+            shared = _connections[path] = (conn, threading.Lock())
+        return shared
+
+
+def close_response_caches():
+    """Cierra las conexiones compartidas (las cachés abiertas dejan de poder usarse)."""
+    with _connections_lock:
+        for conn, lock in _connections.values():
+            with lock:
+                conn.close()
+        _connections.clear()
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats() -> Dict[str, int]:
+    """Aciertos, revalidaciones (304) y descargas de todas las cachés de este proceso."""
+    with _stats_lock:
+        return {"hits": _stats["hits"], "revalidated": _stats["revalidated"], "misses": _stats["misses"]}
+
+
+class ResponseCache:
+    """Caché de respuestas GET de un usuario (scope), segura entre hilos.
+
+    Es una vista sobre la conexión compartida del fichero: no hay que cerrarla.
+    """
+
+    def __init__(self, path: str, scope: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.scope = scope
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._conn, self._lock = _shared_connection(path)
+
+    def get(self, http, url: str, headers: Optional[dict] = None, kind: str = KIND_USERS,
+            immutable: Optional[ImmutablePredicate] = None) -> requests.Response:
+        """GET a través de la caché: entrada vigente, revalidación condicional o descarga."""
+        now = time.time()
+        entry = self._lookup(url)
+        if entry is not None and (entry["immutable"] or entry["expires_at"] > now):
+            self._touch(url, now)
+            _count("hits")
+            return self._cached_response(url, entry)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+        response = http.get(url, headers=request_headers)
+        if response.status_code == 304 and entry is not None:
+            self._renew(url, now + self.ttls[kind], now)
+            _count("revalidated")
+            return self._cached_response(url, entry)
+        _count("misses")
+        if response.status_code == 200:
+            self._store(url, kind, response, now, bool(immutable and immutable(response)))
+        return response
+
+    def invalidate(self, kind: str):
+        """Descarta las entradas de un tipo (p.ej. la presencia tras un fichaje)."""
+        self._execute("DELETE FROM responses WHERE scope = ? AND kind = ?", (self.scope, kind))
+
+    # --- almacenamiento ---
+    def _execute(self, sql: str, params=()) -> list:
+        """Ejecuta una sentencia; un error de la caché nunca interrumpe la petición."""
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+                self._conn.commit()
+            return rows
+        except sqlite3.Error:
+            return []
+
+    def _lookup(self, url: str) -> Optional[dict]:
+        rows = self._execute(
+            "SELECT body, content_type, etag, last_modified, expires_at, immutable "
+            "FROM responses WHERE scope = ? AND url = ?", (self.scope, url))
+        if not rows:
+            return None
+        body, content_type, etag, last_modified, expires_at, immutable = rows[0]
+        return {"body": body, "content_type": content_type, "etag": etag, "last_modified": last_modified,
+                "expires_at": expires_at, "immutable": bool(immutable)}
+
+    def _touch(self, url: str, now: float):
+        self._execute("UPDATE responses SET last_used = ? WHERE scope = ? AND url = ?", (now, self.scope, url))
+
+    def _renew(self, url: str, expires_at: float, now: float):
+        self._execute("UPDATE responses SET expires_at = ?, last_used = ? WHERE scope = ? AND url = ?",
+                      (expires_at, now, self.scope, url))
+
+    def _store(self, url: str, kind: str, response: requests.Response, now: float, immutable: bool):
+        body = response.content
+        self._execute(
+            "INSERT OR REPLACE INTO responses (scope, url, kind, body, content_type, etag, last_modified, "
+            "expires_at, immutable, size, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.scope, url, kind, body, response.headers.get("Content-Type"), response.headers.get("ETag"),
+             response.headers.get("Last-Modified"), now + self.ttls[kind], int(immutable), len(body), now))
+        self._evict()
+
+    def _evict(self):
+        """Expulsa las entradas usadas hace más tiempo hasta volver a max_bytes (todo el fichero)."""
+        total = self._execute("SELECT COALESCE(SUM(size), 0) FROM responses")
+        excess = (total[0][0] if total else 0) - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for rowid, size in self._execute("SELECT rowid, size FROM responses ORDER BY last_used"):
+            if excess <= 0:
+                break
+            victims.append(rowid)
+            excess -= size
+        self._execute(f"DELETE FROM responses WHERE rowid IN ({','.join('?' * len(victims))})", victims)
+
+    @staticmethod
+    def _cached_response(url: str, entry: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response._content = entry["body"]
+        response.headers = CaseInsensitiveDict({"Content-Type": entry["content_type"] or "application/json"})
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+        response.url = url
+        return response
+
+
+def configure_response_cache(enabled: bool = True, max_bytes: int = DEFAULT_MAX_BYTES,
+                             ttls: Optional[Dict[str, float]] = None):
+    """Configura las cachés que se abran a partir de ahora (enabled=False las desactiva)."""
+    _settings.update(enabled=enabled, max_bytes=max_bytes, ttls={**DEFAULT_TTLS, **(ttls or {})})
+
+
+def open_response_cache(path: str, scope: str) -> Optional[ResponseCache]:
+    """Abre la caché de un usuario, o None si está desactivada o no se puede abrir."""
+    if not _settings["enabled"]:
+        return None
+    try:
+        return ResponseCache(path, scope, _settings["max_bytes"], _settings["ttls"])
+    except sqlite3.Error as e:
+        print(f"⚠️ No se pudo abrir la caché de respuestas {path}: {e}")
+        return None
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Woffu Calendar - Calendario de festivos precalculado
+Construye los festivos una sola vez por (país, región, año), los guarda en disco
+y responde en O(1) si una fecha es festiva.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple, Union
+
+HOLIDAYS_CACHE_FILE = "holidays_cache.json"  # Se guarda junto a data.json
+
+
+def holidays_cache_path(data_file: str = "data.json") -> str:
+    """Ruta del fichero de caché de festivos, en el mismo directorio que data_file."""
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), HOLIDAYS_CACHE_FILE)
+
+
+class HolidayCalendar:
+    """Festivos de un país (y opcionalmente una región) con caché en memoria y disco."""
+
+    def __init__(self, country: str, subdivision: Optional[str] = None, cache_file: Optional[str] = None):
+        self.country = country
+        self.subdivision = subdivision or None
+        self.cache_file = cache_file
+        self._years: Dict[int, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _cache_key(self, year: int) -> str:
+        return f"{self.country}|{self.subdivision or ''}|{year}"
+
+    def _read_disk_cache(self) -> dict:
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, "r") as f:
+                cached = json.load(f)
+            return cached if isinstance(cached, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_disk_cache(self, year: int, year_holidays: Dict[str, str]):
+        if not self.cache_file:
+            return
+        cached = self._read_disk_cache()
+        cached[self._cache_key(year)] = year_holidays
+        tmp_file = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(cached, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché de festivos: {e}")
+
+    def _build_year(self, year: int) -> Dict[str, str]:
+        # holidays carga tablas de muchos países: sólo se importa si el año no está en caché
+        import holidays
+        try:
+            country_holidays = holidays.country_holidays(self.country, subdiv=self.subdivision, years=year)
+        except NotImplementedError:
+            if not self.subdivision:
+                raise
+            print(f"⚠️ Región '{self.subdivision}' no reconocida para {self.country}, se usan sólo festivos nacionales")
+            country_holidays = holidays.country_holidays(self.country, years=year)
+        return {day.isoformat(): name for day, name in sorted(country_holidays.items())}
+
+    def holidays_for_year(self, year: int) -> Dict[str, str]:
+        """Devuelve {YYYY-MM-DD: nombre} del año, construyéndolo sólo la primera vez."""
+        year_holidays = self._years.get(year)
+        if year_holidays is not None:
+            return year_holidays
+        with self._lock:
+            year_holidays = self._years.get(year)
+            if year_holidays is None:
+                year_holidays = self._read_disk_cache().get(self._cache_key(year))
+                if year_holidays is None:
+                    year_holidays = self._build_year(year)
+                    self._write_disk_cache(year, year_holidays)
+                self._years[year] = year_holidays
+            return year_holidays
+
+    def holiday_name(self, day: Union[date, str]) -> Optional[str]:
+        """Nombre del festivo o None si la fecha (date o YYYY-MM-DD) es laborable."""
+        if isinstance(day, str):
+            day = datetime.strptime(day, "%Y-%m-%d").date()
+        return self.holidays_for_year(day.year).get(day.isoformat())
+
+    def is_holiday(self, day: Union[date, str]) -> bool:
+        return self.holiday_name(day) is not None
+
+
+_calendars: Dict[Tuple[str, Optional[str], Optional[str]], HolidayCalendar] = {}
+_calendars_lock = threading.Lock()
+
+def get_calendar(country: str, subdivision: Optional[str] = None,
+                 cache_file: Optional[str] = None) -> HolidayCalendar:
+    """Calendario compartido para (país, región, fichero de caché)."""
+    key = (country, subdivision or None, cache_file)
+    with _calendars_lock:
+        holiday_calendar = _calendars.get(key)
+        if holiday_calendar is None:
+            holiday_calendar = _calendars[key] = HolidayCalendar(country, subdivision, cache_file)
+        return holiday_calendar
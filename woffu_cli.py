@@ -12,12 +12,20 @@ Funciona de manera idéntica en Windows, macOS y Linux.
 
 import sys
 import os
-import subprocess
 import calendar
 import random
 import argparse
-from typing import List, Dict, Tuple, Optional
-from datetime import datetime, date
+import csv
+import json
+import time
+import re
+import signal
+import threading
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator, List, Dict, Tuple, Optional
+from datetime import datetime, date, timedelta
 from pathlib import Path
 
 # Importar configuración
@@ -28,25 +36,57 @@ except ImportError:
     print("   Asegúrate de que config.py esté en el mismo directorio")
     sys.exit(1)
 
-# Importar la función de woffu
-try:
-    from woffu import woffu_file_entry, woffu_file_entry_multi
-    WOFFU_AVAILABLE = True
-except ImportError:
-    print("⚠️ Advertencia: No se pudo importar woffu.py, usando subprocess como respaldo")
-    WOFFU_AVAILABLE = False
+from woffu_plan import PlanWriter, read_plan_header, iter_plan_days
+from woffu_interval import Interval, DayPlan, as_intervals, parse_time, first_overlap, SECONDS_PER_DAY
+from woffu_events import (day_result, count_result, STATUS_FILED, STATUS_PLANNED, STATUS_SKIPPED, STATUS_FAILED,
+                          STATUS_VERIFIED, STATUS_MISMATCH,
+                          SKIP_WEEKEND, SKIP_HOLIDAY, SKIP_NO_SCHEDULE, SKIP_FUTURE, SKIP_OVERLAP,
+                          SKIP_CONFIRMED, SKIP_UNCHANGED)
+from woffu_calendar import get_calendar, holidays_cache_path
+from woffu_trace import enable_tracing, get_tracer
+
+# Con python -I/-P (o PYTHONSAFEPATH) el directorio del script no está en sys.path:
+# se añade para que woffu.py se importe igualmente en el mismo proceso
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if importlib.util.find_spec("woffu") is None and SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+# woffu.py, requests y dateutil sólo se importan en los caminos que llaman a la API:
+# --help, --dry-run y plan arrancan sin cargarlos (holidays, sólo si falta su caché)
+WOFFU_AVAILABLE = all(importlib.util.find_spec(module) is not None for module in ("woffu", "requests", "dateutil"))
+if not WOFFU_AVAILABLE:
+    print("⚠️ Advertencia: No se pudo importar woffu.py, usando un proceso auxiliar (woffu_worker.py) como respaldo")
+
+# Texto de cada motivo de salto en la salida por consola
+SKIP_DESCRIPTIONS = {
+    SKIP_WEEKEND: "Fin de semana",
+    SKIP_HOLIDAY: "Festivo",
+    SKIP_NO_SCHEDULE: "sin horario configurado",
+    SKIP_FUTURE: "intervalo con salida futura",
+    SKIP_CONFIRMED: "ya fichado según el registro local"
+}
+# Los perfiles de un lote escriben sus resultados JSONL en el mismo stream desde varios hilos
+_RESULT_STREAM_LOCK = threading.Lock()
 
 
 class WoffuAutologin:
     """Clase principal para manejar el autologin de Woffu"""
     
-    def __init__(self):
+    def __init__(self, data_file=None, show_progress=None, show_statistics=None, output="text", result_stream=None):
         self.now = datetime.now()
         self.script_dir = Path(__file__).parent
+        self.data_file = data_file or DATA_FILE
+        self.show_progress = SHOW_PROGRESS if show_progress is None else show_progress
+        self.show_statistics = SHOW_STATISTICS if show_statistics is None else show_statistics
+        # Resultados por día: "text" (mensajes [OK]/[SKIP]...) o "jsonl" (una línea JSON en result_stream)
+        self.output = output
+        self.result_stream = result_stream or sys.stdout
+        self._worker = None
+        self._worker_lock = threading.Lock()
         
     def _print_message(self, message, msg_type="info"):
         """Imprime mensajes con formato consistente"""
-        if not SHOW_PROGRESS:
+        if not self.show_progress:
             return
             
         icons = {
@@ -62,21 +102,6 @@ class WoffuAutologin:
         icon = icons.get(msg_type, "[???]")
         print(f"{icon} {message}")
     
-    def _time_to_seconds(self, time_str):
-        """Convierte una cadena de tiempo HH:MM:SS a segundos desde medianoche"""
-        try:
-            time_obj = datetime.strptime(time_str, "%H:%M:%S")
-            return time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
-        except ValueError:
-            raise ValueError(f"Formato de tiempo inválido: {time_str}. Use HH:MM:SS")
-    
-    def _seconds_to_time(self, seconds):
-        """Convierte segundos desde medianoche a formato HH:MM:SS"""
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        secs = seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
-    
     def _is_weekday(self, year, month, day):
         """Verifica si un día es día laboral (lunes a viernes)"""
         date_obj = date(year, month, day)
@@ -86,43 +111,91 @@ class WoffuAutologin:
         """Obtiene el número de días en un mes específico"""
         return calendar.monthrange(year, month)[1]
     
-    def _generate_random_times(self, base_start, base_end):
+    def _generate_random_times(self, base: Interval) -> Interval:
         """Genera horarios aleatorios basados en la configuración"""
-        base_start_seconds = self._time_to_seconds(base_start)
-        base_end_seconds = self._time_to_seconds(base_end)
-        
         # Aplicar variación aleatoria
         start_offset = random.randint(-RANDOM_VARIATION_SECONDS, RANDOM_VARIATION_SECONDS)
         end_offset = random.randint(-RANDOM_VARIATION_SECONDS, RANDOM_VARIATION_SECONDS)
         
-        random_start_seconds = base_start_seconds + start_offset
-        random_end_seconds = base_end_seconds + end_offset
-        
         # Asegurar que los tiempos estén dentro del día (0-86399 segundos)
-        random_start_seconds = max(0, min(86399, random_start_seconds))
-        random_end_seconds = max(0, min(86399, random_end_seconds))
+        random_start_seconds = max(0, min(SECONDS_PER_DAY - 1, base.start + start_offset))
+        random_end_seconds = max(0, min(SECONDS_PER_DAY - 1, base.end + end_offset))
         
         # Asegurar que la hora de salida sea posterior a la de entrada
         if random_end_seconds <= random_start_seconds:
             random_end_seconds = random_start_seconds + random.randint(3600, 7200)  # +1-2 horas
-            random_end_seconds = min(86399, random_end_seconds)
+            random_end_seconds = min(SECONDS_PER_DAY - 1, random_end_seconds)
         
-        return (self._seconds_to_time(random_start_seconds), 
-                self._seconds_to_time(random_end_seconds))
+        return Interval(random_start_seconds, random_end_seconds)
     
-    def _is_future_time(self, year, month, day, end_time):
-        """Verifica si la hora de salida está en el futuro"""
+    def _is_future_time(self, date_obj: date, end_seconds: int) -> bool:
+        """Verifica si la hora de salida (segundos desde medianoche) de date_obj está en el futuro"""
         if not SKIP_FUTURE_DATES:
             return False
-            
-        try:
-            end_datetime = datetime.strptime(f"{year}-{month:02d}-{day:02d} {end_time}", 
-                                           "%Y-%m-%d %H:%M:%S")
-            return end_datetime > self.now
-        except ValueError:
-            self._print_message(f"Error al parsear la fecha/hora: {year}-{month:02d}-{day:02d} {end_time}", "warning")
-            return True  # En caso de error, asumir que es futuro para evitar ejecución
+        today = self.now.date()
+        if date_obj != today:
+            return date_obj > today
+        return end_seconds > self.now.hour * 3600 + self.now.minute * 60 + self.now.second
     
+    def _load_user_data(self):
+        """Lee data.json (si existe) para conocer país, región e IDs del usuario"""
+        try:
+            with open(self.data_file, "r") as json_data:
+                return json.load(json_data)
+        except (OSError, ValueError):
+            return {}
+
+    def _get_holiday_calendar(self):
+        """Calendario de festivos de la empresa o None si no se puede determinar"""
+        if not SKIP_HOLIDAYS:
+            return None
+        user_data = self._load_user_data()
+        country = user_data.get("company_country")
+        if not country:
+            return None
+        return get_calendar(country, user_data.get("company_subdivision"), holidays_cache_path(self.data_file))
+
+    def _open_ledger(self, create=True):
+        """Abre el registro local de días fichados (junto a data.json)"""
+        ledger_path = self._ledger_path()
+        if not create and not os.path.exists(ledger_path):
+            return None
+        from woffu_ledger import FilingLedger
+        try:
+            return FilingLedger(ledger_path)
+        except Exception as e:
+            self._print_message(f"No se pudo abrir el registro local {ledger_path}: {e}", "warning")
+            return None
+
+    def _get_worker(self):
+        """Proceso auxiliar que sustituye a woffu.py cuando no se puede importar (se arranca una vez)"""
+        with self._worker_lock:
+            if self._worker is None:
+                from woffu_worker import WoffuWorker
+                self._worker = WoffuWorker(python=WORKER_PYTHON, script_dir=str(self.script_dir))
+            return self._worker
+
+    def close_worker(self):
+        with self._worker_lock:
+            if self._worker is not None:
+                self._worker.close()
+                self._worker = None
+
+    def _ledger_path(self):
+        return os.path.join(os.path.dirname(self.data_file), LEDGER_FILE)
+
+    def _load_presence_index(self, from_date: str, to_date: str, use_cache=True):
+        """Presencia del rango indexada por fecha, en este proceso o en el auxiliar"""
+        if WOFFU_AVAILABLE:
+            from woffu import loadPresenceIndex
+            return loadPresenceIndex(from_date, to_date, self.data_file, use_cache)
+        from woffu_worker import WorkerError
+        try:
+            return self._get_worker().presence_index(from_date, to_date, self.data_file, use_cache)
+        except WorkerError as e:
+            self._print_message(f"Error en el proceso auxiliar: {e}", "warning")
+            return None
+
     def _verify_woffu_script(self):
         """Verifica que el script woffu.py existe"""
         woffu_path = self.script_dir / WOFFU_SCRIPT
@@ -149,14 +222,15 @@ class WoffuAutologin:
             return False
         
         if dry_run:
-            command = [sys.executable, WOFFU_SCRIPT, "-d", filing_date, "-s", start_time, "-e", end_time]
+            command = [sys.executable, WOFFU_SCRIPT, "-d", filing_date, "-s", start_time, "-e", end_time, "-i", self.data_file]
             self._print_message(f"[DRY RUN] Comando que se ejecutaría: {' '.join(command)}", "info")
             return True
         
         # Usar importación directa si está disponible (más eficiente)
         if WOFFU_AVAILABLE:
+            from woffu import woffu_file_entry
             try:
-                success = woffu_file_entry(filing_date, start_time, end_time, DATA_FILE)
+                success = woffu_file_entry(filing_date, start_time, end_time, self.data_file)
                 if success:
                     self._print_message(f"Fichaje ejecutado correctamente para {filing_date}", "success")
                 else:
@@ -166,54 +240,71 @@ class WoffuAutologin:
                 self._print_message(f"Error durante el fichaje para {filing_date}: {e}", "error")
                 return False
         
-        # Respaldo usando subprocess
+        # Respaldo: el mismo fichaje en el proceso auxiliar
+        from woffu_worker import WorkerError
+        try:
+            success = self._get_worker().file_entry(filing_date, [(start_time, end_time)], self.data_file,
+                                                    ledger_file=self._ledger_path())
+        except (WorkerError, OSError) as e:
+            self._print_message(f"Error durante el fichaje para {filing_date}: {e}", "error")
+            return False
+        if success:
+            self._print_message(f"Fichaje ejecutado correctamente para {filing_date}", "success")
         else:
-            command = [sys.executable, WOFFU_SCRIPT, "-d", filing_date, "-s", start_time, "-e", end_time]
-            try:
-                result = subprocess.run(command, check=True, capture_output=True, text=True, cwd=self.script_dir)
-                self._print_message(f"Fichaje ejecutado correctamente para {filing_date}", "success")
-                if result.stdout and SHOW_PROGRESS:
-                    print(f"   Salida: {result.stdout.strip()}")
-                return True
-            except subprocess.CalledProcessError as e:
-                self._print_message(f"Error al ejecutar fichaje para {filing_date}: {e}", "error")
-                if e.stderr:
-                    print(f"   Error: {e.stderr.strip()}")
-                return False
-            except FileNotFoundError:
-                self._print_message(f"No se encontró {WOFFU_SCRIPT} o Python", "error")
-                return False
+            self._print_message(f"Error al ejecutar fichaje para {filing_date}", "error")
+        return success
     
-    def _parse_interval(self, interval_str: str) -> Tuple[str, str]:
-        """Parses a single time interval start-end (HH:MM or HH:MM:SS). Returns normalized HH:MM:SS.
+    def execute_sign(self, dry_run=False):
+        """
+        Ficha ahora (entrada o salida) en tiempo real, como el botón de Woffu
+        
+        Los rellenos de días (single, monthly...) sólo escriben los slots de cada diario;
+        ésta es la única operación que envía un fichaje con la hora actual.
+        
+        Args:
+            dry_run (bool): Si True, solo muestra qué se ejecutaría sin hacerlo
+        
+        Returns:
+            bool: True si Woffu aceptó el fichaje
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if dry_run:
+            self._print_message(f"[DRY RUN] Se ficharía ahora ({now}) con {self.data_file}", "info")
+            return True
+
+        if WOFFU_AVAILABLE:
+            from woffu import woffu_sign
+            success = woffu_sign(self.data_file)
+        else:
+            from woffu_worker import WorkerError
+            try:
+                success = self._get_worker().sign(self.data_file)
+            except (WorkerError, OSError) as e:
+                self._print_message(f"Error en el proceso auxiliar: {e}", "error")
+                success = False
+            finally:
+                self.close_worker()
+        if success:
+            self._print_message(f"Fichaje en tiempo real registrado ({now})", "success")
+        else:
+            self._print_message("Error al fichar en tiempo real", "error")
+        return success
+
+    def _parse_interval(self, interval_str: str) -> Interval:
+        """Parses a single time interval start-end (HH:MM or HH:MM:SS) into seconds since midnight.
         Raises ValueError on invalid format."""
         if '-' not in interval_str:
             raise ValueError(f"Intervalo inválido '{interval_str}'. Debe ser start-end")
         start_raw, end_raw = interval_str.split('-', 1)
-        def norm(t: str) -> str:
-            parts = t.strip().split(':')
-            if len(parts) == 1:
-                raise ValueError(f"Hora inválida '{t}'. Use HH:MM o HH:MM:SS")
-            if len(parts) == 2:
-                h, m = parts
-                s = '00'
-            elif len(parts) == 3:
-                h, m, s = parts
-            else:
-                raise ValueError(f"Hora inválida '{t}'")
-            h = int(h); m = int(m); s = int(s)
-            if not (0 <= h < 24 and 0 <= m < 60 and 0 <= s < 60):
-                raise ValueError(f"Hora fuera de rango '{t}'")
-            return f"{h:02d}:{m:02d}:{s:02d}"
-        start = norm(start_raw)
-        end = norm(end_raw)
-        if start >= end:
+        interval = Interval(parse_time(start_raw), parse_time(end_raw))
+        if interval.start >= interval.end:
+            start, end = interval
             raise ValueError(f"Intervalo inválido {start}-{end}: inicio debe ser < fin")
-        return start, end
+        return interval
 
-    def _parse_same_schedule(self, schedule_str: str) -> List[Tuple[str, str]]:
+    def _parse_same_schedule(self, schedule_str: str) -> List[Interval]:
         """Parses a string like '08:00-14:30,15:00-17:00' into list of intervals."""
-        intervals: List[Tuple[str, str]] = []
+        intervals: List[Interval] = []
         for chunk in schedule_str.split(','):
             chunk = chunk.strip()
             if not chunk:
@@ -223,13 +314,13 @@ class WoffuAutologin:
             raise ValueError("Debe especificar al menos un intervalo en --same-schedule")
         return intervals
 
-    def _parse_weekly_schedule(self, weekly_str: str) -> Dict[int, List[Tuple[str, str]]]:
+    def _parse_weekly_schedule(self, weekly_str: str) -> Dict[int, List[Interval]]:
         """Parses weekly schedule like:
         L=08:00-14:30,15:00-17:00;V=08:00-14:00  (Soporte días: L M X J V S D)
         Returns dict weekday_index -> list[(start,end)] where Monday=0.
         """
         day_map = {"L":0, "M":1, "X":2, "J":3, "V":4, "S":5, "D":6}
-        result: Dict[int, List[Tuple[str, str]]] = {}
+        result: Dict[int, List[Interval]] = {}
         for segment in weekly_str.split(';'):
             segment = segment.strip()
             if not segment:
@@ -246,172 +337,1086 @@ class WoffuAutologin:
             raise ValueError("Debe especificar al menos un día en --weekly-schedule")
         return result
 
-    def execute_monthly_filing(self, year=None, month=None, start_time=None, end_time=None, 
-                             skip_weekends=None, dry_run=False,
-                             same_schedule: Optional[str]=None,
-                             weekly_schedule: Optional[str]=None):
+    def _plan_range(self, from_date: date, to_date: date, strategy, base_intervals, weekly_intervals,
+                    skip_weekends, holiday_calendar=None,
+                    include_future=False) -> Tuple[List[DayPlan], List[dict]]:
+        """Decide qué días del rango (ambos incluidos) se fichan y con qué intervalos, sin red.
+
+        Con include_future no se descartan los intervalos que aún no han terminado
+        (fichaje en tiempo real).
+
+        Returns:
+            (días a fichar como lista ordenada de DayPlan (fecha YYYY-MM-DD, intervalos aleatorizados),
+             resultados de los días saltados o inválidos, ver woffu_events)
+        """
+        planned_days = []
+        results = []
+
+        # Fase "plan": sin red (fechas, aleatorización, festivos), visible en --trace/--profile
+        with get_tracer().phase("plan", from_date=from_date.isoformat(), to_date=to_date.isoformat()):
+            for offset in range((to_date - from_date).days + 1):
+                date_obj = from_date + timedelta(days=offset)
+                year, month, day = date_obj.year, date_obj.month, date_obj.day
+                current_date = date_obj.isoformat()
+            
+                # Verificar si es día laboral
+                if skip_weekends and not self._is_weekday(year, month, day):
+                    results.append(day_result(current_date, STATUS_SKIPPED, reason=SKIP_WEEKEND))
+                    continue
+
+                # Verificar si es festivo (calendario local, sin red)
+                if holiday_calendar is not None:
+                    try:
+                        holiday_name = holiday_calendar.holiday_name(current_date)
+                    except ImportError:
+                        # Sin el paquete holidays sólo sirven los años ya guardados en la caché de festivos
+                        self._print_message("No está instalado el paquete 'holidays' (pip install holidays); "
+                                            "no se omiten los festivos", "warning")
+                        holiday_calendar = None
+                        holiday_name = None
+                    except Exception as e:
+                        self._print_message(f"No se pudo consultar el calendario de festivos: {e}", "warning")
+                        holiday_calendar = None
+                        holiday_name = None
+                    if holiday_name:
+                        results.append(day_result(current_date, STATUS_SKIPPED, reason=SKIP_HOLIDAY, detail=holiday_name))
+                        continue
+            
+                # Seleccionar intervalos para el día
+                day_of_week = date_obj.weekday()  # Monday=0
+                if strategy == 'weekly':
+                    if day_of_week in weekly_intervals:
+                        intervals_today = weekly_intervals[day_of_week]
+                    else:
+                        results.append(day_result(current_date, STATUS_SKIPPED, reason=SKIP_NO_SCHEDULE))
+                        continue
+                else:
+                    intervals_today = base_intervals
+
+                # Generar variación para cada intervalo y construir lista consolidada
+                randomized_intervals = []
+                for base_interval in intervals_today:
+                    if RANDOM_VARIATION_SECONDS > 0:
+                        interval = self._generate_random_times(base_interval)
+                    else:
+                        interval = base_interval
+                    if not include_future and self._is_future_time(date_obj, interval.end):
+                        r_start, r_end = interval
+                        self._print_message(f"Saltando intervalo {r_start}-{r_end} de {current_date} (futuro)", "skip")
+                        continue
+                    randomized_intervals.append(interval)
+
+                if not randomized_intervals:
+                    results.append(day_result(current_date, STATUS_SKIPPED, reason=SKIP_FUTURE))
+                    continue
+
+                # Ordenar y validar no solapamiento
+                randomized_intervals.sort()
+                overlap = first_overlap(randomized_intervals)
+                if overlap:
+                    overlap = " y ".join(str(tuple(interval)) for interval in overlap)
+                    results.append(day_result(current_date, STATUS_FAILED, randomized_intervals,
+                                              reason=SKIP_OVERLAP, detail=overlap,
+                                              error=f"Intervalos solapados: {overlap}"))
+                    continue
+
+                # Si cualquier fin cae en futuro, omitir todo el día (consistente)
+                if not include_future and any(self._is_future_time(date_obj, interval.end)
+                                              for interval in randomized_intervals):
+                    results.append(day_result(current_date, STATUS_SKIPPED, randomized_intervals, reason=SKIP_FUTURE))
+                    continue
+
+                planned_days.append(DayPlan(current_date, randomized_intervals, sorted(intervals_today)))
+        return planned_days, results
+
+    def _submit_day(self, current_date, intervals, presence_index=None, ledger=None) -> Optional[str]:
+        """Envía los fichajes de un día usando el diario precargado si está disponible.
+
+        Returns:
+            None si Woffu aceptó el día, o el motivo del error
         """
-        Función 2: Procesa fichajes para un mes completo
+        if WOFFU_AVAILABLE:
+            from woffu import woffu_file_entry_multi
+            diary = None
+            if presence_index is not None:
+                diary = presence_index.get(current_date)
+                if diary is None:
+                    return "No existe diario en Woffu para ese día"
+            try:
+                if woffu_file_entry_multi(current_date, intervals, self.data_file, diary=diary, ledger=ledger):
+                    return None
+                return "Woffu no aceptó los fichajes"
+            except Exception as e:
+                return f"Error en fichaje múltiple: {e}"
+
+        # Respaldo: el día completo (un solo PUT) en el proceso auxiliar
+        from woffu_worker import WorkerError
+        diary = presence_index.get(current_date) if presence_index is not None else None
+        if presence_index is not None and diary is None:
+            return "No existe diario en Woffu para ese día"
+        try:
+            if self._get_worker().file_entry(current_date, intervals, self.data_file, diary=diary,
+                                             ledger_file=self._ledger_path()):
+                return None
+            return "Woffu no aceptó los fichajes"
+        except (WorkerError, OSError) as e:
+            return f"Error en el proceso auxiliar: {e}"
+
+    def _timed_submit(self, current_date, intervals, presence_index=None, ledger=None) -> dict:
+        """_submit_day medido, como resultado de woffu_events"""
+        started = time.perf_counter()
+        try:
+            error = self._submit_day(current_date, intervals, presence_index, ledger)
+        except Exception as e:
+            error = f"Error en fichaje: {e}"
+        latency_ms = (time.perf_counter() - started) * 1000
+        return day_result(current_date, STATUS_FILED if error is None else STATUS_FAILED, intervals,
+                          latency_ms=latency_ms, error=error)
+
+    @staticmethod
+    def _presence_time_to_seconds(value) -> Optional[int]:
+        """Extrae la hora (HH:MM o HH:MM:SS) de un campo in/out del resumen de presencia
+
+        Acepta la hora sola o una marca ISO (2024-03-04T08:01:00+01:00); la hora es la
+        que va al principio o tras la 'T'/espacio, nunca el desfase horario del final.
+        """
+        if not value:
+            return None
+        match = re.search(r"(?:^|[T\s])(\d{1,2}):(\d{2})(?::(\d{2}))?", str(value).strip())
+        if not match:
+            return None
+        h, m, sec = match.groups()
+        return int(h) * 3600 + int(m) * 60 + int(sec or 0)
+
+    @staticmethod
+    def _same_schedule(filed, day_plan: DayPlan) -> bool:
+        """True si los intervalos enviados corresponden al plan del día.
+
+        Un día leído de un fichero de plan se compara exactamente. Uno recién planificado
+        se compara con su horario base admitiendo sólo RANDOM_VARIATION_SECONDS, la
+        variación que pudo tener el envío anterior.
+        """
+        filed = sorted(as_intervals(filed))
+        if day_plan.base is None:
+            return filed == day_plan.intervals
+        return len(filed) == len(day_plan.base) and all(
+            abs(old.start - base.start) <= RANDOM_VARIATION_SECONDS and
+            abs(old.end - base.end) <= RANDOM_VARIATION_SECONDS
+            for old, base in zip(filed, day_plan.base))
+
+    def _classify_day(self, diary, intervals, tolerance=SYNC_TOLERANCE_SECONDS) -> str:
+        """Clasifica un día planificado frente a lo que ya hay en Woffu.
+
+        El resumen de presencia sólo expone la primera entrada y la última salida,
+        así que se comparan con el inicio del primer intervalo y el fin del último.
+        Como ambos lados llevan variación aleatoria, se toleran SYNC_TOLERANCE_SECONDS.
+
+        Returns:
+            'missing', 'unchanged' o 'different'
+        """
+        existing_in = self._presence_time_to_seconds((diary or {}).get("in"))
+        existing_out = self._presence_time_to_seconds((diary or {}).get("out"))
+        if existing_in is None and existing_out is None:
+            return "missing"
+        planned_in = intervals[0].start
+        planned_out = intervals[-1].end
+        if existing_in is None or existing_out is None:
+            return "different"
+        if abs(existing_in - planned_in) <= tolerance and abs(existing_out - planned_out) <= tolerance:
+            return "unchanged"
+        return "different"
+
+    def _verify_day(self, diary, intervals) -> Optional[str]:
+        """Compara un día ya enviado con lo que muestra Woffu; devuelve la discrepancia o None."""
+        if diary is None:
+            return "el día no aparece en la presencia de Woffu"
+        state = self._classify_day(diary, intervals, VERIFY_TOLERANCE_SECONDS)
+        if state == "missing":
+            return "Woffu no muestra fichajes"
+        if state == "different":
+            return f"Woffu muestra {diary.get('in')} - {diary.get('out')}"
+        if not diary.get("accepted") and not diary.get("isPending"):
+            return "el día no está aceptado ni pendiente de aprobación"
+        return None
+
+    def _iter_verify(self, filed_days, workers, ledger=None) -> Iterator[dict]:
+        """Confirma los días enviados con una sola consulta de presencia de todo el rango.
+
+        Los días que no coinciden se reenvían (hasta VERIFY_RETRIES veces) y se vuelven a
+        comprobar; los que siguen sin coincidir se dan por erróneos y dejan de constar como
+        confirmados en el registro local, para que --resume los reintente.
+        """
+        user_id = self._load_user_data().get("user_id")
+        pending = sorted(filed_days, key=lambda day: day.date)
+        for attempt in range(VERIFY_RETRIES + 1):
+            if not pending:
+                return
+            self._print_message(f"Verificando {len(pending)} día(s) del {pending[0].date} al {pending[-1].date}", "progress")
+            # Sin caché: se comprueba lo que Woffu tiene ahora
+            presence_index = self._load_presence_index(pending[0].date, pending[-1].date, use_cache=False)
+            if presence_index is None:
+                yield day_result(None, STATUS_FAILED, error="No se pudo obtener la presencia para verificar")
+                return
+            retry_queue = []
+            for current_date, intervals in pending:
+                problem = self._verify_day(presence_index.get(current_date), intervals)
+                if problem is None:
+                    yield day_result(current_date, STATUS_VERIFIED, intervals)
+                elif attempt < VERIFY_RETRIES:
+                    self._print_message(f"{current_date} no coincide ({problem}), se reenvía", "warning")
+                    retry_queue.append(DayPlan(current_date, intervals))
+                else:
+                    self._unconfirm_day(ledger, user_id, current_date)
+                    yield day_result(current_date, STATUS_MISMATCH, intervals, error=problem)
+            pending = []
+            if not retry_queue:
+                return
+            intervals_by_date = dict(retry_queue)
+            for result in self._iter_submit(retry_queue, presence_index, workers, ledger):
+                if result["status"] == STATUS_FILED:
+                    pending.append(DayPlan(result["date"], intervals_by_date[result["date"]]))
+                else:
+                    # El día ya contó como enviado: el reenvío fallido lo deja como no verificado
+                    self._unconfirm_day(ledger, user_id, result["date"])
+                    yield day_result(result["date"], STATUS_MISMATCH, intervals_by_date[result["date"]],
+                                     error=result["error"])
+
+    def _unconfirm_day(self, ledger, user_id, work_date):
+        """Quita la confirmación de un día del registro local.
+
+        Sin ledger propio (proceso auxiliar) se abre el fichero en el que escribe el worker.
+        """
+        if user_id is None:
+            return
+        owner = ledger or self._open_ledger(create=False)
+        if owner is None:
+            return
+        try:
+            owner.unconfirm(user_id, work_date)
+        finally:
+            if owner is not ledger:
+                owner.close()
+
+    def _sync_diff(self, planned_days, presence_index) -> Tuple[List[DayPlan], List[dict]]:
+        """Muestra el diff del plan frente a Woffu.
+
+        Returns:
+            (días a escribir, resultados de los días que ya coinciden con el plan)
+        """
+        pending_days = []
+        results = []
+        counts = {"unchanged": 0, "missing": 0, "different": 0}
+        for day_plan in planned_days:
+            current_date, intervals = day_plan
+            diary = presence_index.get(current_date)
+            state = self._classify_day(diary, intervals)
+            counts[state] += 1
+            planned_desc = ", ".join([f"{a}-{b}" for a,b in intervals])
+            if state == "unchanged":
+                results.append(day_result(current_date, STATUS_SKIPPED, intervals, reason=SKIP_UNCHANGED,
+                                          detail=f"{diary.get('in')} - {diary.get('out')}"))
+                continue
+            if state == "missing":
+                self._print_message(f"+ {current_date} sin fichajes -> {planned_desc}", "info")
+            else:
+                self._print_message(f"~ {current_date} {diary.get('in')} - {diary.get('out')} -> {planned_desc}", "info")
+            pending_days.append(day_plan)
+        self._print_message(
+            f"Sync: {counts['unchanged']} sin cambios, {counts['missing']} sin fichar, {counts['different']} distintos",
+            "stats")
+        return pending_days, results
+
+    def _iter_submit(self, planned_days, presence_index, workers, ledger=None) -> Iterator[dict]:
+        """Envía los días planificados, en paralelo si workers > 1, y genera su resultado.
+
+        Cada día escribe en su propio diario, así que los envíos son independientes.
+        Los resultados salen siempre en orden de fecha; como mucho hay 2 * workers días
+        encargados por delante del último entregado, y si el consumidor deja de iterar
+        (p.ej. tras demasiados errores) los que aún no han empezado se cancelan.
+        """
+        if workers <= 1:
+            for current_date, intervals in planned_days:
+                interval_desc = ", ".join([f"{a}-{b}" for a,b in intervals])
+                self._print_message(f"Procesando {current_date} -> {interval_desc}", "progress")
+                yield self._timed_submit(current_date, intervals, presence_index, ledger)
+            return
+
+        self._print_message(f"Enviando {len(planned_days)} día(s) con {workers} workers en paralelo", "progress")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            try:
+                for current_date, intervals in planned_days:
+                    in_flight.append(executor.submit(self._timed_submit, current_date, intervals,
+                                                     presence_index, ledger))
+                    if len(in_flight) >= 2 * workers:
+                        yield in_flight.popleft().result()
+                while in_flight:
+                    yield in_flight.popleft().result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    def _resolve_period(self, year=None, month=None, from_date: Optional[str]=None,
+                        to_date: Optional[str]=None, year_all=False) -> Tuple[date, date, str]:
+        """Traduce mes, año completo o rango --from/--to a (inicio, fin, etiqueta)"""
+        year = year or YEAR
+        month = month or MONTH
+        if from_date or to_date:
+            if not (from_date and to_date):
+                raise ValueError("from_date y to_date se indican juntos")
+            start = datetime.strptime(from_date, "%Y-%m-%d").date()
+            end = datetime.strptime(to_date, "%Y-%m-%d").date()
+            return start, end, f"del {start.isoformat()} al {end.isoformat()}"
+        if year_all:
+            return date(year, 1, 1), date(year, 12, 31), f"para el año {year}"
+        start = date(year, month, 1)
+        end = date(year, month, self._get_days_in_month(year, month))
+        return start, end, f"para {month:02d}/{year}"
+
+    def _resolve_schedule(self, start_time, end_time, same_schedule=None, weekly_schedule=None):
+        """Determina la estrategia de horarios: (estrategia, intervalos base, intervalos por día)
+
+        Raises:
+            ValueError: si algún horario tiene un formato inválido
+        """
+        if weekly_schedule:
+            return 'weekly', [], self._parse_weekly_schedule(weekly_schedule)
+        if same_schedule:
+            return 'same', self._parse_same_schedule(same_schedule), {}
+        return 'simple', [Interval.parse(start_time, end_time)], {}
+
+    def _print_schedule(self, strategy, base_intervals, weekly_intervals):
+        if strategy == 'simple':
+            start, end = base_intervals[0]
+            self._print_message(f"Horario base simple: {start} - {end}", "info")
+        elif strategy == 'same':
+            self._print_message(f"Horario uniforme ({len(base_intervals)} intervalo(s)): {', '.join([f'{a}-{b}' for a,b in base_intervals])}", "info")
+        else:
+            desc = []
+            rev_day = {0:'L',1:'M',2:'X',3:'J',4:'V',5:'S',6:'D'}
+            for d, ints in sorted(weekly_intervals.items()):
+                desc.append(f"{rev_day[d]}: {', '.join([f'{a}-{b}' for a,b in ints])}")
+            self._print_message("Horario semanal → " + " | ".join(desc), "info")
+        self._print_message(f"Variación aleatoria: ±{RANDOM_VARIATION_SECONDS//60} minutos", "info")
+
+    def _print_final_stats(self, stats):
+        if self.show_statistics:
+            print("=" * 60)
+            self._print_message("Proceso completado", "success")
+            self._print_message(f"Fichajes procesados: {stats['success']}", "stats")
+            self._print_message(f"Días saltados: {stats['skipped']}", "stats")
+            if "verified" in stats:
+                self._print_message(f"Días verificados en Woffu: {stats['verified']}", "stats")
+            if stats["errors"] > 0:
+                self._print_message(f"Errores: {stats['errors']}", "error")
+            self._print_concurrency_stats()
+            print("=" * 60)
+
+    def _print_concurrency_stats(self):
+        """Límite adaptativo de cada host y uso de la caché (sólo si esta ejecución ya ha usado la red)"""
+        woffu_http = sys.modules.get("woffu_http")
+        if woffu_http is None:
+            return
+        for host, limit in woffu_http.get_default_client().concurrency_stats().items():
+            self._print_message(f"Concurrencia {host}: límite {limit['limit']} (mín. {limit['min']}, "
+                                f"máx. {limit['max']}, {limit['decreases']} recorte(s), "
+                                f"p95 {limit['p95_ms']:.0f} ms)", "stats")
+        woffu_cache = sys.modules.get("woffu_cache")
+        if woffu_cache is not None:
+            cache = woffu_cache.cache_stats()
+            if any(cache.values()):
+                self._print_message(f"Caché de respuestas: {cache['hits']} acierto(s), {cache['revalidated']} "
+                                    f"revalidada(s), {cache['misses']} descarga(s)", "stats")
+
+    def _render_result(self, result: dict):
+        """Muestra un resultado por día como texto (o como una línea JSON con output='jsonl')"""
+        if self.output == "jsonl":
+            line = json.dumps({**result, "data_file": self.data_file}, ensure_ascii=False)
+            with _RESULT_STREAM_LOCK:
+                self.result_stream.write(line + "\n")
+                self.result_stream.flush()
+            return
+
+        current_date, status, reason, detail = result["date"], result["status"], result["reason"], result["detail"]
+        interval_desc = ", ".join([f"{a}-{b}" for a,b in result["intervals"] or []])
+        if current_date is None:
+            self._print_message(result["error"], "error")
+        elif status == STATUS_SKIPPED:
+            if reason == SKIP_UNCHANGED:
+                self._print_message(f"= {current_date} sin cambios ({detail})", "skip")
+            elif reason in SKIP_DESCRIPTIONS:
+                self._print_message(f"Saltando {current_date} ({SKIP_DESCRIPTIONS[reason]}"
+                                    f"{f': {detail}' if detail else ''})", "skip")
+            else:
+                self._print_message(f"Saltando {current_date} ({reason}{f': {detail}' if detail else ''})", "skip")
+        elif status == STATUS_PLANNED:
+            self._print_message(f"Procesando {current_date} -> {interval_desc}", "progress")
+            # Mostrar los comandos que se ejecutarían
+            for s,e in result["intervals"]:
+                cmd = [sys.executable, WOFFU_SCRIPT, '-d', current_date, '-s', s, '-e', e]
+                self._print_message(f"[DRY RUN] Comando que se ejecutaría: {' '.join(cmd)}", "info")
+        elif status == STATUS_FILED:
+            self._print_message(f"{current_date} -> {interval_desc} ({result['latency_ms']:.0f} ms)", "success")
+        elif status == STATUS_VERIFIED:
+            self._print_message(f"{current_date} verificado en Woffu", "success")
+        elif status == STATUS_MISMATCH:
+            self._print_message(f"{current_date} no coincide con lo enviado ({interval_desc}): {result['error']}", "error")
+        elif reason == SKIP_OVERLAP:
+            self._print_message(f"Intervalos solapados detectados en {current_date}: {detail}", "error")
+        else:
+            self._print_message(f"{current_date} -> {interval_desc}: {result['error']}", "error")
+
+    def _consume_results(self, results: Iterator[dict], max_errors: Optional[int]=None) -> dict:
+        """Muestra y contabiliza los resultados de un generador; lo cancela al llegar a max_errors"""
+        stats = {"success": 0, "skipped": 0, "errors": 0}
+        try:
+            for result in results:
+                self._render_result(result)
+                count_result(stats, result)
+                if max_errors and stats["errors"] >= max_errors:
+                    self._print_message(f"Cancelando tras {stats['errors']} errores (--max-errors)", "warning")
+                    break
+        finally:
+            # Cierra el generador: deja de enviar días y cancela los que estaban en cola
+            results.close()
+        self._print_final_stats(stats)
+        return stats
+
+    def execute_monthly_filing(self, year=None, month=None, from_date: Optional[str]=None,
+                             to_date: Optional[str]=None, year_all=False, max_errors: Optional[int]=None,
+                             **options):
+        """
+        Función 2: Procesa fichajes para un mes completo, un año completo o un rango de fechas
         
         Args:
             year (int): Año a procesar (por defecto desde config)
             month (int): Mes a procesar (por defecto desde config)
-            start_time (str): Hora base de entrada (por defecto desde config)
-            end_time (str): Hora base de salida (por defecto desde config)
-            skip_weekends (bool): Saltar fines de semana (por defecto desde config)
-            dry_run (bool): Modo de prueba sin ejecución real
+            from_date (str): Inicio del rango YYYY-MM-DD (junto con to_date, sustituye a year/month)
+            to_date (str): Fin del rango YYYY-MM-DD, incluido
+            year_all (bool): Procesar el año completo en lugar de un mes
+            max_errors (int): Dejar de enviar días al llegar a este número de errores
+            **options: Opciones de iter_range_filing
         
         Returns:
             dict: Estadísticas del procesamiento
         """
+        return self._consume_results(
+            self.iter_monthly_filing(year, month, from_date, to_date, year_all, **options), max_errors)
+
+    def iter_monthly_filing(self, year=None, month=None, from_date: Optional[str]=None,
+                            to_date: Optional[str]=None, year_all=False, **options) -> Iterator[dict]:
+        """Como execute_monthly_filing, pero genera el resultado de cada día (ver woffu_events)"""
+        start, end, label = self._resolve_period(year, month, from_date, to_date, year_all)
+        return self.iter_range_filing(start, end, label=label, **options)
+
+    def iter_range_filing(self, from_date: date, to_date: date, start_time=None, end_time=None,
+                          skip_weekends=None, dry_run=False,
+                          same_schedule: Optional[str]=None,
+                          weekly_schedule: Optional[str]=None,
+                          workers: Optional[int]=None,
+                          resume: Optional[bool]=None, force=False,
+                          sync=False, verify=False, label: Optional[str]=None) -> Iterator[dict]:
+        """
+        Planifica todo el rango de una vez y lo ejecuta en una sola sesión: el token,
+        la consulta de presencia y los festivos se comparten entre meses.
+
+        Genera un resultado por día (woffu_events.day_result) en cuanto se conoce:
+        primero los días saltados al planificar y después los enviados, en orden de fecha.
+        Los errores que afectan a todo el rango se generan con date None.
+        
+        Args:
+            from_date (date): Primer día del rango
+            to_date (date): Último día del rango (incluido)
+            start_time (str): Hora base de entrada (por defecto desde config)
+            end_time (str): Hora base de salida (por defecto desde config)
+            skip_weekends (bool): Saltar fines de semana (por defecto desde config)
+            dry_run (bool): Modo de prueba sin ejecución
+            workers (int): Días enviados en paralelo (por defecto desde config)
+            resume (bool): Saltar días ya confirmados en el registro local (por defecto desde config)
+            force (bool): Reenviar todos los días aunque el registro local los dé por fichados
+            sync (bool): Comparar con los fichajes existentes y enviar sólo los días que faltan o difieren
+            verify (bool): Tras los envíos, comprobar lo escrito con una lectura del rango y reenviar lo que no coincida
+        """
         # Usar valores por defecto de la configuración si no se especifican
-        year = year or YEAR
-        month = month or MONTH
         start_time = start_time or BASE_START_TIME
         end_time = end_time or BASE_END_TIME
         skip_weekends = skip_weekends if skip_weekends is not None else SKIP_WEEKENDS
         
         if not self._verify_woffu_script():
-            return {"success": 0, "skipped": 0, "errors": 0}
-        
-        days_in_month = self._get_days_in_month(year, month)
+            return
         
         # Mostrar información inicial
-        print("=" * 60)
-        self._print_message(f"Procesando fichajes para {month:02d}/{year}", "info")
+        if self.show_progress:
+            print("=" * 60)
+        if to_date < from_date:
+            yield day_result(None, STATUS_FAILED, error=f"Rango inválido: {from_date.isoformat()} "
+                                                        f"es posterior a {to_date.isoformat()}")
+            return
+        label = label or f"del {from_date.isoformat()} al {to_date.isoformat()}"
+        self._print_message(f"Procesando fichajes {label}", "info")
         # Determinar estrategia de horarios
-        weekly_intervals: Dict[int, List[Tuple[str,str]]] = {}
-        base_intervals: List[Tuple[str,str]] = []
-        strategy = 'simple'
         try:
-            if weekly_schedule:
-                weekly_intervals = self._parse_weekly_schedule(weekly_schedule)
-                strategy = 'weekly'
-            elif same_schedule:
-                base_intervals = self._parse_same_schedule(same_schedule)
-                strategy = 'same'
+            strategy, base_intervals, weekly_intervals = self._resolve_schedule(
+                start_time, end_time, same_schedule, weekly_schedule)
+        except ValueError as ve:
+            yield day_result(None, STATUS_FAILED, error=f"Error en horarios: {ve}")
+            return
+        self._print_schedule(strategy, base_intervals, weekly_intervals)
+        if dry_run:
+            self._print_message("MODO DRY RUN - No se ejecutarán los comandos realmente", "warning")
+        if self.show_progress:
+            print("=" * 60)
+
+        # Fase 1: planificar todos los días (sin red)
+        planned_days, results = self._plan_range(from_date, to_date, strategy, base_intervals, weekly_intervals,
+                                                 skip_weekends, self._get_holiday_calendar())
+        yield from results
+
+        # Fases 2 a 4: registro local, presencia y envío
+        yield from self._iter_planned_days(planned_days, dry_run=dry_run, workers=workers,
+                                           resume=resume, force=force, sync=sync, verify=verify)
+
+    def _iter_planned_days(self, planned_days, dry_run=False, workers: Optional[int]=None,
+                           resume: Optional[bool]=None, force=False, sync=False, verify=False) -> Iterator[dict]:
+        """Envía días ya planificados: filtra por el registro local, consulta la presencia y ficha."""
+        workers = max(1, workers or MAX_WORKERS)
+        resume = (resume if resume is not None else LEDGER_RESUME) and not force
+
+        # Fase 2: descartar los días ya confirmados en el registro local (sin red)
+        # Sin woffu.py el registro lo escribe el proceso auxiliar; aquí sólo se consulta
+        ledger = None if dry_run or not WOFFU_AVAILABLE else self._open_ledger()
+        try:
+            user_id = self._load_user_data().get("user_id")
+            if planned_days and resume and user_id is not None:
+                reader = ledger or self._open_ledger(create=False)
+                if reader is not None:
+                    confirmed = reader.confirmed_filings(user_id, planned_days[0].date, planned_days[-1].date)
+                    if reader is not ledger:
+                        reader.close()
+                    pending_days = []
+                    for day_plan in planned_days:
+                        # Un día confirmado con otro horario (p.ej. tras cambiarlo) se vuelve a enviar
+                        filed = confirmed.get(day_plan.date)
+                        if filed is not None and self._same_schedule(filed, day_plan):
+                            yield day_result(day_plan.date, STATUS_SKIPPED, day_plan.intervals, reason=SKIP_CONFIRMED)
+                        else:
+                            pending_days.append(day_plan)
+                    planned_days = pending_days
+
+            # Fase 3: consultar la presencia del rango una sola vez e indexarla por fecha
+            presence_index = None
+            if planned_days and (not dry_run or sync):
+                presence_index = self._load_presence_index(planned_days[0].date, planned_days[-1].date)
+                if presence_index is None:
+                    if sync:
+                        yield day_result(None, STATUS_FAILED,
+                                         error="No se pudo obtener la presencia del rango, imposible sincronizar")
+                        return
+                    self._print_message("No se pudo obtener la presencia del rango, se consultará día a día", "warning")
+
+            # Modo sync: enviar sólo los días que faltan o difieren del plan
+            if sync and presence_index is not None:
+                planned_days, results = self._sync_diff(planned_days, presence_index)
+                yield from results
+
+            # Fase 4: enviar los fichajes
+            if dry_run:
+                for current_date, randomized_intervals in planned_days:
+                    yield day_result(current_date, STATUS_PLANNED, randomized_intervals)
             else:
-                base_intervals = [(start_time, end_time)]
+                filed_days = []
+                intervals_by_date = dict(planned_days)
+                for result in self._iter_submit(planned_days, presence_index, workers, ledger):
+                    if result["status"] == STATUS_FILED:
+                        filed_days.append(DayPlan(result["date"], intervals_by_date[result["date"]]))
+                    yield result
+                # Fase 5: confirmar lo escrito con una sola lectura del rango
+                if verify:
+                    yield from self._iter_verify(filed_days, workers, ledger)
+        finally:
+            if ledger is not None:
+                ledger.close()
+            self.close_worker()
+
+    def write_plan(self, output, year=None, month=None, from_date: Optional[str]=None,
+                   to_date: Optional[str]=None, year_all=False, start_time=None, end_time=None,
+                   skip_weekends=None, same_schedule: Optional[str]=None,
+                   weekly_schedule: Optional[str]=None):
+        """
+        Planifica el periodo sin tocar la red y guarda el resultado en un fichero de plan
+        (horas ya aleatorizadas y motivo de cada día saltado) para aplicarlo con apply_plan.
+        
+        Args:
+            output (str): Ruta del fichero de plan (JSONL)
+            (resto): Mismo significado que en execute_monthly_filing
+        
+        Returns:
+            dict: Estadísticas de la planificación (success = días a fichar)
+        """
+        start_time = start_time or BASE_START_TIME
+        end_time = end_time or BASE_END_TIME
+        skip_weekends = skip_weekends if skip_weekends is not None else SKIP_WEEKENDS
+        start, end, label = self._resolve_period(year, month, from_date, to_date, year_all)
+
+        if self.show_progress:
+            print("=" * 60)
+        self._print_message(f"Planificando fichajes {label} en {output}", "info")
+        try:
+            strategy, base_intervals, weekly_intervals = self._resolve_schedule(
+                start_time, end_time, same_schedule, weekly_schedule)
         except ValueError as ve:
             self._print_message(f"Error en horarios: {ve}", "error")
             return {"success":0,"skipped":0,"errors":1}
+        self._print_schedule(strategy, base_intervals, weekly_intervals)
+        if self.show_progress:
+            print("=" * 60)
 
-        if strategy == 'simple':
-            self._print_message(f"Horario base simple: {start_time} - {end_time}", "info")
-        elif strategy == 'same':
-            self._print_message(f"Horario uniforme ({len(base_intervals)} intervalo(s)): {', '.join([f"{a}-{b}" for a,b in base_intervals])}", "info")
-        else:
-            desc = []
-            rev_day = {0:'L',1:'M',2:'X',3:'J',4:'V',5:'S',6:'D'}
-            for d, ints in sorted(weekly_intervals.items()):
-                desc.append(f"{rev_day[d]}: {', '.join([f"{a}-{b}" for a,b in ints])}")
-            self._print_message("Horario semanal → " + " | ".join(desc), "info")
-        self._print_message(f"Variación aleatoria: ±{RANDOM_VARIATION_SECONDS//60} minutos", "info")
-        if dry_run:
-            self._print_message("MODO DRY RUN - No se ejecutarán los comandos realmente", "warning")
-        print("=" * 60)
-        
         stats = {"success": 0, "skipped": 0, "errors": 0}
-        
-        for day in range(1, days_in_month + 1):
-            current_date = f"{year}-{month:02d}-{day:02d}"
-            
-            # Verificar si es día laboral
-            if skip_weekends and not self._is_weekday(year, month, day):
-                self._print_message(f"Saltando {current_date} (Fin de semana)", "skip")
-                stats["skipped"] += 1
-                continue
-            
-            # Seleccionar intervalos para el día
-            date_obj = date(year, month, day)
-            day_of_week = date_obj.weekday()  # Monday=0
-            if strategy == 'weekly':
-                if day_of_week in weekly_intervals:
-                    intervals_today = weekly_intervals[day_of_week]
-                else:
-                    self._print_message(f"Sin horario configurado para {current_date} (día {day_of_week}), se omite", "skip")
-                    stats["skipped"] += 1
-                    continue
-            else:
-                intervals_today = base_intervals
+        holiday_calendar = self._get_holiday_calendar()
+        planned_days, results = self._plan_range(start, end, strategy, base_intervals, weekly_intervals,
+                                                 skip_weekends, holiday_calendar)
+        for result in results:
+            self._render_result(result)
+            count_result(stats, result)
 
-            # Generar variación para cada intervalo y construir lista consolidada
-            randomized_intervals = []
-            for (base_start_i, base_end_i) in intervals_today:
-                if RANDOM_VARIATION_SECONDS > 0:
-                    r_start, r_end = self._generate_random_times(base_start_i, base_end_i)
+        user_data = self._load_user_data()
+        header = {
+            "data_file": self.data_file,
+            "user_id": user_data.get("user_id"),
+            "username": user_data.get("username"),
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "strategy": strategy,
+            "same_schedule": same_schedule,
+            "weekly_schedule": weekly_schedule,
+            "base": [list(i) for i in base_intervals],
+            "skip_weekends": skip_weekends,
+            "holidays": None if holiday_calendar is None else [holiday_calendar.country, holiday_calendar.subdivision],
+            "random_variation_seconds": RANDOM_VARIATION_SECONDS
+        }
+        # Días fichados, saltados y fallidos intercalados en orden de fecha (sort es estable)
+        records = [(d, None, intervals) for d, intervals in planned_days]
+        records += [(r["date"], r, None) for r in results]
+        records.sort(key=lambda record: record[0])
+        with PlanWriter(output, header) as plan:
+            for current_date, result, intervals in records:
+                if result is None:
+                    plan.file_day(current_date, intervals)
+                elif result["status"] == STATUS_FAILED:
+                    plan.fail_day(current_date, result["reason"], result["detail"], result["error"])
                 else:
-                    r_start, r_end = base_start_i, base_end_i
-                if self._is_future_time(year, month, day, r_end):
-                    self._print_message(f"Saltando intervalo {r_start}-{r_end} de {current_date} (futuro)", "skip")
-                    continue
-                randomized_intervals.append((r_start, r_end))
+                    plan.skip_day(current_date, result["reason"], result["detail"])
+        stats["success"] = len(planned_days)
 
-            if not randomized_intervals:
-                stats["skipped"] += 1
-                continue
+        if self.show_statistics:
+            print("=" * 60)
+            self._print_message(f"Plan guardado en {output}", "success")
+            self._print_message(f"Días a fichar: {stats['success']}", "stats")
+            self._print_message(f"Días saltados: {stats['skipped']}", "stats")
+            if stats["errors"] > 0:
+                self._print_message(f"Errores: {stats['errors']}", "error")
+            print("=" * 60)
+        return stats
 
-            # Ordenar y validar no solapamiento
-            randomized_intervals.sort(key=lambda x: x[0])
-            valid = True
-            for i in range(1, len(randomized_intervals)):
-                if randomized_intervals[i-1][1] > randomized_intervals[i][0]:
-                    self._print_message(f"Intervalos solapados detectados en {current_date}: {randomized_intervals[i-1]} y {randomized_intervals[i]}", "error")
-                    stats["errors"] += 1
-                    valid = False
-                    break
-            if not valid:
-                continue
+    def apply_plan(self, plan_file, max_errors: Optional[int]=None, **options):
+        """
+        Aplica un fichero de plan generado con write_plan, sin recalcular horas ni festivos
+        
+        Args:
+            plan_file (str): Ruta del fichero de plan
+            max_errors (int): Dejar de enviar días al llegar a este número de errores
+            **options: Opciones de iter_apply_plan
+        
+        Returns:
+            dict: Estadísticas del procesamiento
+        """
+        return self._consume_results(self.iter_apply_plan(plan_file, **options), max_errors)
 
-            # Si cualquier fin cae en futuro, omitir todo el día (consistente)
-            if any(self._is_future_time(year, month, day, end) for _, end in randomized_intervals):
-                self._print_message(f"Saltando {current_date} (intervalo con salida futura)", "skip")
-                stats["skipped"] += 1
-                continue
+    def iter_apply_plan(self, plan_file, dry_run=False, workers: Optional[int]=None,
+                        resume: Optional[bool]=None, force=False, sync=False, verify=False) -> Iterator[dict]:
+        """Como apply_plan, pero genera el resultado de cada día (ver woffu_events)"""
+        if not self._verify_woffu_script():
+            return
+        if self.show_progress:
+            print("=" * 60)
+        try:
+            header = read_plan_header(plan_file)
+        except (OSError, ValueError) as e:
+            yield day_result(None, STATUS_FAILED, error=f"No se pudo leer el plan {plan_file}: {e}")
+            return
 
-            interval_desc = ", ".join([f"{a}-{b}" for a,b in randomized_intervals])
-            self._print_message(f"Procesando {current_date} -> {interval_desc}", "progress")
+        user_id = self._load_user_data().get("user_id")
+        if header.get("user_id") is not None and user_id is not None and header["user_id"] != user_id:
+            yield day_result(None, STATUS_FAILED, error=f"El plan es del usuario {header['user_id']} pero "
+                                                        f"{self.data_file} es del usuario {user_id}")
+            return
 
-            if dry_run:
-                # Mostrar los comandos que se ejecutarían
-                for s,e in randomized_intervals:
-                    cmd = [sys.executable, WOFFU_SCRIPT, '-d', current_date, '-s', s, '-e', e]
-                    self._print_message(f"[DRY RUN] Comando que se ejecutaría: {' '.join(cmd)}", "info")
-                stats["success"] += 1
+        self._print_message(f"Aplicando plan {plan_file} (del {header['from']} al {header['to']}, "
+                            f"generado {header.get('generated_at')})", "info")
+        if dry_run:
+            self._print_message("MODO DRY RUN - No se ejecutarán los comandos realmente", "warning")
+        if self.show_progress:
+            print("=" * 60)
+
+        planned_days = []
+        for record in iter_plan_days(plan_file):
+            if record["action"] == "file":
+                planned_days.append(DayPlan(record["date"], record["intervals"]))
+            elif record["action"] == "fail":
+                yield day_result(record["date"], STATUS_FAILED, reason=record["reason"], detail=record.get("detail"),
+                                 error=record.get("error"))
             else:
-                if WOFFU_AVAILABLE and len(randomized_intervals) > 1:
-                    # Usar llamada múltiple
-                    try:
-                        if woffu_file_entry_multi(current_date, randomized_intervals, DATA_FILE):
-                            stats["success"] += 1
-                        else:
-                            stats["errors"] += 1
-                    except Exception as e:
-                        self._print_message(f"Error en fichaje múltiple {current_date}: {e}", "error")
-                        stats["errors"] += 1
-                else:
-                    # Fallback a fichajes individuales
-                    day_ok = True
-                    for s,e in randomized_intervals:
-                        if not self.execute_single_filing(current_date, s, e, dry_run):
-                            day_ok = False
-                    if day_ok:
-                        stats["success"] += 1
-                    else:
-                        stats["errors"] += 1
+                yield day_result(record["date"], STATUS_SKIPPED, reason=record["reason"], detail=record.get("detail"))
+
+        yield from self._iter_planned_days(planned_days, dry_run=dry_run, workers=workers,
+                                           resume=resume, force=force, sync=sync, verify=verify)
+
+    def execute_daemon(self, start_time=None, end_time=None, skip_weekends=None,
+                       same_schedule: Optional[str]=None, weekly_schedule: Optional[str]=None,
+                       dry_run=False, until: Optional[datetime]=None):
+        """
+        Función 5: Proceso residente que ficha en tiempo real a las horas planificadas
+        
+        Lee credenciales, horarios y festivos una sola vez y mantiene el token y la
+        conexión abiertos, de modo que cada fichaje sale a su segundo planificado.
         
-        # Mostrar estadísticas finales
-        if SHOW_STATISTICS:
+        Args:
+            (horarios): Mismo significado que en iter_range_filing
+            dry_run (bool): Mostrar los fichajes en lugar de enviarlos
+            until (datetime): Terminar al llegar a este instante (por defecto, nunca)
+        
+        Returns:
+            dict: Fichajes hechos, perdidos y con error
+        """
+        start_time = start_time or BASE_START_TIME
+        end_time = end_time or BASE_END_TIME
+        skip_weekends = skip_weekends if skip_weekends is not None else SKIP_WEEKENDS
+        if not WOFFU_AVAILABLE:
+            self._print_message("El modo daemon necesita poder importar woffu.py", "error")
+            return {"signed": 0, "missed": 0, "errors": 1}
+        from woffu_daemon import SignDaemon
+
+        if self.show_progress:
             print("=" * 60)
-            self._print_message("Proceso completado", "success")
-            self._print_message(f"Fichajes procesados: {stats['success']}", "stats")
-            self._print_message(f"Días saltados: {stats['skipped']}", "stats")
+        self._print_message(f"Daemon de fichaje en tiempo real ({self.data_file})", "info")
+        try:
+            strategy, base_intervals, weekly_intervals = self._resolve_schedule(
+                start_time, end_time, same_schedule, weekly_schedule)
+        except ValueError as ve:
+            self._print_message(f"Error en horarios: {ve}", "error")
+            return {"signed": 0, "missed": 0, "errors": 1}
+        self._print_schedule(strategy, base_intervals, weekly_intervals)
+        if dry_run:
+            self._print_message("MODO DRY RUN - No se enviarán los fichajes", "warning")
+        if self.show_progress:
+            print("=" * 60)
+
+        holiday_calendar = self._get_holiday_calendar()
+        def plan_day(day: date) -> List[Interval]:
+            planned, results = self._plan_range(day, day, strategy, base_intervals, weekly_intervals,
+                                                skip_weekends, holiday_calendar, include_future=True)
+            for result in results:
+                self._render_result(result)
+            return planned[0].intervals if planned else []
+
+        daemon = SignDaemon(self.data_file, plan_day, dry_run=dry_run,
+                            warmup_seconds=DAEMON_WARMUP_SECONDS,
+                            tick_seconds=DAEMON_TICK_SECONDS,
+                            missed_grace_seconds=DAEMON_MISSED_GRACE_SECONDS)
+        # SIGTERM (systemd, docker stop...) detiene el daemon igual que Ctrl+C
+        previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+        try:
+            stats = daemon.run(until=until)
+        except KeyboardInterrupt:
+            daemon.stop()
+            stats = daemon.stats
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+
+        if self.show_statistics:
+            print("=" * 60)
+            self._print_message("Daemon detenido", "success")
+            self._print_message(f"Fichajes realizados: {stats['signed']}", "stats")
+            self._print_message(f"Fichajes perdidos: {stats['missed']}", "stats")
             if stats["errors"] > 0:
                 self._print_message(f"Errores: {stats['errors']}", "error")
             print("=" * 60)
-        
         return stats
 
+    def execute_batch_filing(self, source, max_concurrency=None, **filing_options):
+        """
+        Función 3: Procesa el fichaje mensual de muchos usuarios en paralelo
+        
+        Args:
+            source (str): Directorio con ficheros de credenciales (*.json) o manifiesto .jsonl/.csv,
+                o directamente un iterable de perfiles (dicts con data_file y/o plan_file)
+            max_concurrency (int): Usuarios procesados a la vez (por defecto desde config)
+            **filing_options: Opciones de execute_monthly_filing comunes a todos los perfiles
+        
+        Returns:
+            dict: Estadísticas agregadas de todos los usuarios
+        """
+        max_concurrency = max(1, max_concurrency or BATCH_MAX_CONCURRENCY)
+        totals = {"success": 0, "skipped": 0, "errors": 0}
+        rows = []
+
+        if self.show_progress:
+            print("=" * 60)
+        if isinstance(source, str):
+            self._print_message(f"Procesando perfiles de {source} ({max_concurrency} a la vez)", "info")
+            profiles = iter_profiles(source)
+        else:
+            self._print_message(f"Procesando perfiles ({max_concurrency} a la vez)", "info")
+            profiles = source
+
+        # El manifiesto se lee en streaming: sólo hay en memoria los perfiles en curso
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            in_flight = set()
+            for profile in profiles:
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    rows.extend(self._collect_batch_results(done, totals))
+                in_flight.add(executor.submit(self._run_profile, profile, filing_options))
+            rows.extend(self._collect_batch_results(in_flight, totals))
+
+        if self.show_statistics:
+            self._print_batch_summary(rows, totals)
+        return totals
+
+    def _run_profile(self, profile, filing_options) -> dict:
+        """Ejecuta el fichaje mensual (o el plan) de un perfil y devuelve su fila de resumen"""
+        if profile.get("plan_file"):
+            return self._run_plan_profile(profile, filing_options)
+        options = dict(filing_options)
+        options.update({key: profile[key] for key in PROFILE_OVERRIDES if profile.get(key) not in (None, "")})
+        for key in ("year", "month"):
+            if key in options and options[key] is not None:
+                options[key] = int(options[key])
+        options["workers"] = 1  # La concurrencia global la limita el lote
+
+        data_file = profile["data_file"]
+        started = time.perf_counter()
+        user_label = data_file
+        try:
+            runner = WoffuAutologin(data_file=data_file, show_progress=False, show_statistics=False,
+                                    output=self.output, result_stream=self.result_stream)
+            user_label = runner._load_user_data().get("username") or data_file
+            stats = runner.execute_monthly_filing(**options)
+        except Exception as e:
+            print(f"[ERROR] Error procesando {data_file}: {e}")
+            stats = {"success": 0, "skipped": 0, "errors": 1}
+        return {"user": user_label, "seconds": time.perf_counter() - started, **stats}
+
+    def _run_plan_profile(self, profile, apply_options) -> dict:
+        plan_file = profile["plan_file"]
+        started = time.perf_counter()
+        user_label = plan_file
+        try:
+            data_file = plan_data_file(plan_file, profile.get("data_file"))
+            runner = WoffuAutologin(data_file=data_file, show_progress=False, show_statistics=False,
+                                    output=self.output, result_stream=self.result_stream)
+            user_label = runner._load_user_data().get("username") or plan_file
+            stats = runner.apply_plan(plan_file, workers=1, **apply_options)
+        except Exception as e:
+            print(f"[ERROR] Error aplicando {plan_file}: {e}")
+            stats = {"success": 0, "skipped": 0, "errors": 1}
+        return {"user": user_label, "seconds": time.perf_counter() - started, **stats}
+
+    @staticmethod
+    def _collect_batch_results(futures, totals) -> List[dict]:
+        rows = []
+        for future in futures:
+            row = future.result()
+            for key in totals:
+                totals[key] += row[key]
+            rows.append(row)
+        return rows
+
+    def _print_batch_summary(self, rows, totals):
+        print("=" * 60)
+        user_width = max([len("Usuario")] + [len(str(row["user"])) for row in rows])
+        print(f"{'Usuario':<{user_width}}  {'OK':>4}  {'Salt.':>5}  {'Err.':>4}  {'Tiempo':>8}")
+        for row in sorted(rows, key=lambda r: str(r["user"])):
+            print(f"{str(row['user']):<{user_width}}  {row['success']:>4}  {row['skipped']:>5}  "
+                  f"{row['errors']:>4}  {row['seconds']:>7.1f}s")
+        print("-" * 60)
+        self._print_message(f"Usuarios: {len(rows)}", "stats")
+        self._print_message(f"Fichajes procesados: {totals['success']}", "stats")
+        self._print_message(f"Días saltados: {totals['skipped']}", "stats")
+        if totals["errors"] > 0:
+            self._print_message(f"Errores: {totals['errors']}", "error")
+        self._print_concurrency_stats()
+        print("=" * 60)
+
+
+# Opciones que cada perfil de un lote puede sobrescribir
+PROFILE_OVERRIDES = ("year", "month", "start_time", "end_time", "same_schedule", "weekly_schedule")
+# Cachés que woffu.py guarda junto a cada data.json y que no son perfiles
+NON_PROFILE_FILES = ("token_cache.json", "holidays_cache.json")
+
+def iter_profiles(source) -> Iterator[dict]:
+    """Genera los perfiles de un lote sin cargar el manifiesto completo en memoria.
+
+    - Directorio: cada fichero *.json es un data.json de un usuario
+    - .jsonl: una línea por perfil con "data_file" y opcionalmente PROFILE_OVERRIDES
+    - .csv: columnas data_file y opcionalmente PROFILE_OVERRIDES
+
+    Las rutas relativas de data_file se resuelven respecto al manifiesto.
+    """
+    if os.path.isdir(source):
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".json") and entry.name not in NON_PROFILE_FILES:
+                    yield {"data_file": entry.path}
+        return
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    def resolve(profile):
+        if not profile.get("data_file"):
+            raise ValueError(f"Perfil sin data_file en {source}: {profile}")
+        profile["data_file"] = os.path.join(base_dir, profile["data_file"])
+        return profile
+
+    with open(source, "r", newline="") as manifest:
+        if source.endswith(".csv"):
+            for row in csv.DictReader(manifest):
+                yield resolve(row)
+        else:
+            for line in manifest:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield resolve(json.loads(line))
+
+
+def concurrency_policy():
+    """Control adaptativo de concurrencia según config.py (None si está desactivado)"""
+    if not ADAPTIVE_CONCURRENCY:
+        return None
+    from woffu_http import ConcurrencyPolicy
+    return ConcurrencyPolicy(min_limit=ADAPTIVE_MIN_CONCURRENCY, max_limit=ADAPTIVE_MAX_CONCURRENCY,
+                             initial_limit=ADAPTIVE_INITIAL_CONCURRENCY,
+                             latency_target=ADAPTIVE_LATENCY_TARGET_SECONDS)
+
+
+def plan_data_file(plan_file, override=None) -> str:
+    """Fichero de credenciales con el que aplicar un plan: el indicado o el de su cabecera"""
+    return override or read_plan_header(plan_file).get("data_file") or DATA_FILE
+
+
+def _add_period_arguments(subparser):
+    """Periodo a procesar, común a monthly, batch y plan"""
+    subparser.add_argument('--year', type=int, help=f'Año a procesar (por defecto: {YEAR})')
+    subparser.add_argument('--month', type=int, help=f'Mes a procesar (por defecto: {MONTH})')
+    subparser.add_argument('--from', dest='from_date', metavar='YYYY-MM-DD', help='Inicio de un rango de fechas (requiere --to)')
+    subparser.add_argument('--to', dest='to_date', metavar='YYYY-MM-DD', help='Fin del rango de fechas, incluido (requiere --from)')
+    subparser.add_argument('--year-all', action='store_true', help='Procesar el año completo (--year) en una sola ejecución')
+
+
+def _add_schedule_arguments(subparser):
+    """Horarios, comunes a monthly, batch, plan y daemon"""
+    subparser.add_argument('--start-time', help=f'Hora base de entrada (por defecto: {BASE_START_TIME})')
+    subparser.add_argument('--end-time', help=f'Hora base de salida (por defecto: {BASE_END_TIME})')
+    subparser.add_argument('--include-weekends', action='store_true', help='Incluir fines de semana')
+    # Nuevos flags de horarios avanzados
+    subparser.add_argument('--same-schedule', help='Mismos intervalos para todos los días laborables. Ej: "08:00-14:30,15:00-17:00"')
+    subparser.add_argument('--weekly-schedule', help='Horarios por día. Ej: "L=08:00-14:30,15:00-17:00;V=08:00-14:00"')
+
+
+def _add_submit_arguments(subparser):
+    """Opciones de envío, comunes a monthly, batch y apply"""
+    subparser.add_argument('--dry-run', action='store_true', help='Modo de prueba sin ejecución')
+    ledger_group = subparser.add_mutually_exclusive_group()
+    ledger_group.add_argument('--resume', action='store_true', default=None,
+                              help='Saltar los días ya confirmados en el registro local con el mismo horario')
+    ledger_group.add_argument('--force', action='store_true',
+                              help='Con LEDGER_RESUME = True en config.py, reenviar también los días ya '
+                                   'confirmados en el registro local (sin él ya se envían todos)')
+    subparser.add_argument('--sync', action='store_true',
+                           help='Enviar sólo los días sin fichajes o distintos del plan (con --dry-run muestra el diff)')
+    subparser.add_argument('--verify', action='store_true',
+                           help='Tras los envíos, comprobar con una lectura del rango que Woffu muestra lo enviado')
+    subparser.add_argument('--max-errors', type=int, metavar='N',
+                           help='Dejar de enviar días tras N errores (por perfil en batch)')
+    subparser.add_argument('--output', choices=('text', 'jsonl'), default='text',
+                           help='Resultado de cada día como texto o como una línea JSON por día en stdout')
+
+
+def _add_filing_arguments(subparser):
+    """Opciones de planificación y envío comunes a monthly y batch"""
+    _add_period_arguments(subparser)
+    _add_schedule_arguments(subparser)
+    _add_submit_arguments(subparser)
+
+
+def _period_options(args) -> dict:
+    """Traduce los argumentos de periodo a parámetros de execute_monthly_filing y write_plan"""
+    return {
+        "year": args.year,
+        "month": args.month,
+        "from_date": args.from_date,
+        "to_date": args.to_date,
+        "year_all": args.year_all
+    }
+
+
+def _schedule_options(args) -> dict:
+    """Traduce los argumentos de horarios a parámetros de write_plan y execute_daemon"""
+    return {
+        "start_time": args.start_time,
+        "end_time": args.end_time,
+        "skip_weekends": not args.include_weekends,
+        "same_schedule": args.same_schedule,
+        "weekly_schedule": args.weekly_schedule
+    }
+
+
+def _submit_options(args) -> dict:
+    """Traduce los argumentos de envío a parámetros de apply_plan"""
+    return {
+        "dry_run": args.dry_run,
+        "resume": args.resume,
+        "force": args.force,
+        "sync": args.sync,
+        "verify": args.verify,
+        "max_errors": args.max_errors
+    }
+
+
+def _filing_options(args) -> dict:
+    """Traduce los argumentos comunes a parámetros de execute_monthly_filing"""
+    return {**_period_options(args), **_schedule_options(args), **_submit_options(args)}
+
+
+def _validate_period(args):
+    if args.month and not (1 <= args.month <= 12):
+        print("[ERROR] Error: El mes debe estar entre 1 y 12")
+        sys.exit(1)
+    
+    if args.year and not (1 <= args.year <= 9999):
+        print("[ERROR] Error: Año inválido")
+        sys.exit(1)
+
+    if bool(args.from_date) != bool(args.to_date):
+        print("[ERROR] Error: --from y --to se indican juntos (para un solo día, la misma fecha en ambos)")
+        sys.exit(1)
+
+    if (args.from_date or args.to_date) and (args.month or args.year_all):
+        print("[ERROR] Error: --from/--to no se pueden combinar con --month ni --year-all")
+        sys.exit(1)
+
+    if args.year_all and args.month:
+        print("[ERROR] Error: --year-all no se puede combinar con --month")
+        sys.exit(1)
+
+    try:
+        dates = [datetime.strptime(d, "%Y-%m-%d") for d in (args.from_date, args.to_date) if d]
+    except ValueError:
+        print("[ERROR] Error: Formato de fecha inválido en --from/--to. Use YYYY-MM-DD")
+        sys.exit(1)
+    if len(dates) == 2 and dates[0] > dates[1]:
+        print("[ERROR] Error: --from debe ser anterior o igual a --to")
+        sys.exit(1)
+
 
 def main():
     """Función principal con interfaz de línea de comandos"""
@@ -431,38 +1436,133 @@ FICHAJE MENSUAL:
   python woffu_cli.py monthly --start-time "09:00:00" --end-time "17:00:00"
   python woffu_cli.py monthly --dry-run                          (modo de prueba)
   python woffu_cli.py monthly --include-weekends                 (incluir fines de semana)
+  python woffu_cli.py monthly --from 2025-01-01 --to 2025-03-31  (trimestre en una sola ejecución)
+  python woffu_cli.py monthly --year 2024 --year-all             (año completo)
+
+FICHAJE POR LOTES (varios usuarios):
+  python woffu_cli.py batch --profiles-dir perfiles/              (un data.json por usuario)
+  python woffu_cli.py batch --manifest equipo.jsonl --max-concurrency 8
+
+PLANIFICAR Y APLICAR POR SEPARADO:
+  python woffu_cli.py plan --year 2025 --month 11 -o noviembre.plan.jsonl
+  python woffu_cli.py apply noviembre.plan.jsonl --dry-run       (revisar sin enviar)
+  python woffu_cli.py apply planes/*.plan.jsonl --max-concurrency 8
+
+FICHAJE EN TIEMPO REAL:
+  python woffu_cli.py sign                                       (fichar ahora, entrada o salida)
+  python woffu_cli.py daemon                                     (proceso residente, en lugar de cron)
+  python woffu_cli.py daemon --weekly-schedule "L=08:00-14:30,15:00-17:00;V=08:00-14:00"
         """
     )
     
     subparsers = parser.add_subparsers(dest='command', help='Comandos disponibles')
+
+    # Opciones comunes a todos los subcomandos
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument('--trace', metavar='FICHERO',
+                               help='Medir cada fase y petición y guardar la traza en FICHERO (JSONL)')
+    common_parser.add_argument('--profile', metavar='FICHERO',
+                               help='Perfil de CPU (cProfile) de la ejecución en FICHERO (formato pstats) '
+                                    'e informe por función y por fase (CPU frente a espera)')
     
     # Subcomando para fichaje individual
-    single_parser = subparsers.add_parser('single', help='Fichaje individual para un día específico')
+    single_parser = subparsers.add_parser('single', parents=[common_parser],
+                                          help='Fichaje individual para un día específico')
     single_parser.add_argument('-d', '--date', required=True, help='Fecha en formato YYYY-MM-DD')
     single_parser.add_argument('-s', '--start-time', required=True, help='Hora de entrada (HH:MM:SS)')
     single_parser.add_argument('-e', '--end-time', required=True, help='Hora de salida (HH:MM:SS)')
     single_parser.add_argument('--dry-run', action='store_true', help='Modo de prueba sin ejecución')
     
     # Subcomando para fichaje mensual
-    monthly_parser = subparsers.add_parser('monthly', help='Fichaje mensual completo')
-    monthly_parser.add_argument('--year', type=int, help=f'Año a procesar (por defecto: {YEAR})')
-    monthly_parser.add_argument('--month', type=int, help=f'Mes a procesar (por defecto: {MONTH})')
-    monthly_parser.add_argument('--start-time', help=f'Hora base de entrada (por defecto: {BASE_START_TIME})')
-    monthly_parser.add_argument('--end-time', help=f'Hora base de salida (por defecto: {BASE_END_TIME})')
-    monthly_parser.add_argument('--include-weekends', action='store_true', help='Incluir fines de semana')
-    monthly_parser.add_argument('--dry-run', action='store_true', help='Modo de prueba sin ejecución')
-    # Nuevos flags de horarios avanzados
-    monthly_parser.add_argument('--same-schedule', help='Mismos intervalos para todos los días laborables. Ej: "08:00-14:30,15:00-17:00"')
-    monthly_parser.add_argument('--weekly-schedule', help='Horarios por día. Ej: "L=08:00-14:30,15:00-17:00;V=08:00-14:00"')
+    monthly_parser = subparsers.add_parser('monthly', parents=[common_parser], help='Fichaje mensual completo')
+    _add_filing_arguments(monthly_parser)
+    monthly_parser.add_argument('--workers', type=int, help=f'Días enviados en paralelo (por defecto: {MAX_WORKERS})')
+
+    # Subcomando para fichaje de varios usuarios
+    batch_parser = subparsers.add_parser('batch', parents=[common_parser],
+                                         help='Fichaje mensual para varios usuarios en paralelo')
+    source_group = batch_parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument('--profiles-dir', help='Directorio con un fichero de credenciales (*.json) por usuario')
+    source_group.add_argument('--manifest', help='Manifiesto .jsonl o .csv con una columna/campo data_file por usuario')
+    batch_parser.add_argument('--max-concurrency', type=int,
+                              help=f'Usuarios procesados a la vez (por defecto: {BATCH_MAX_CONCURRENCY})')
+    _add_filing_arguments(batch_parser)
+
+    # Subcomandos para planificar sin red y aplicar el plan más tarde
+    plan_parser = subparsers.add_parser('plan', parents=[common_parser],
+                                        help='Guardar el calendario resuelto (horas y días saltados) sin fichar')
+    _add_period_arguments(plan_parser)
+    _add_schedule_arguments(plan_parser)
+    plan_parser.add_argument('-o', '--output', required=True, help='Fichero de plan a generar (JSONL)')
+    plan_parser.add_argument('--data-file', help=f'Fichero de credenciales del usuario (por defecto: {DATA_FILE})')
+
+    apply_parser = subparsers.add_parser('apply', parents=[common_parser],
+                                         help='Fichar exactamente lo indicado en uno o varios ficheros de plan')
+    apply_parser.add_argument('plan_files', nargs='+', metavar='PLAN', help='Ficheros de plan generados con "plan"')
+    apply_parser.add_argument('--data-file', help='Credenciales a usar en lugar de las indicadas en el plan')
+    apply_parser.add_argument('--workers', type=int, help=f'Días enviados en paralelo (por defecto: {MAX_WORKERS})')
+    apply_parser.add_argument('--max-concurrency', type=int,
+                              help=f'Planes aplicados a la vez (por defecto: {BATCH_MAX_CONCURRENCY})')
+    _add_submit_arguments(apply_parser)
+
+    # Subcomando para fichar ahora (el resto de comandos sólo rellenan diarios)
+    sign_parser = subparsers.add_parser('sign', parents=[common_parser],
+                                        help='Fichar ahora (entrada o salida) en tiempo real')
+    sign_parser.add_argument('--data-file', help=f'Fichero de credenciales del usuario (por defecto: {DATA_FILE})')
+    sign_parser.add_argument('--dry-run', action='store_true', help='Mostrar el fichaje sin enviarlo')
+
+    # Subcomando para fichar en tiempo real sin relanzar el proceso en cada fichaje
+    daemon_parser = subparsers.add_parser('daemon', parents=[common_parser],
+                                          help='Proceso residente que ficha entrada y salida a su hora cada día')
+    _add_schedule_arguments(daemon_parser)
+    daemon_parser.add_argument('--data-file', help=f'Fichero de credenciales del usuario (por defecto: {DATA_FILE})')
+    daemon_parser.add_argument('--dry-run', action='store_true', help='Mostrar los fichajes sin enviarlos')
     
     args = parser.parse_args()
     
     if not args.command:
         parser.print_help()
         sys.exit(1)
+
+    # El perfil empieza antes de configurar la red para incluir también las importaciones
+    profiler = None
+    if args.profile:
+        from woffu_profile import Profiler
+        profiler = Profiler()
+        profiler.start()
     
+    # Pool de conexiones compartido por todas las llamadas a Woffu (una sesión por dominio).
+    # Las ejecuciones sin red (plan, --dry-run sin --sync) no llegan a importar requests
+    offline = args.command == 'plan' or (getattr(args, 'dry_run', False) and not getattr(args, 'sync', False))
+    if WOFFU_AVAILABLE and not offline:
+        from woffu_http import configure_default_client, RetryPolicy
+        pool_size = HTTP_POOL_SIZE
+        if args.command in ('batch', 'apply'):
+            pool_size = max(pool_size, args.max_concurrency or BATCH_MAX_CONCURRENCY)
+        http = configure_default_client(
+            pool_size=pool_size,
+            timeout=HTTP_TIMEOUT_SECONDS,
+            retry_policy=RetryPolicy(max_attempts=HTTP_MAX_ATTEMPTS, backoff_base=HTTP_BACKOFF_BASE_SECONDS),
+            breaker_threshold=CIRCUIT_BREAKER_THRESHOLD,
+            breaker_reset_seconds=CIRCUIT_BREAKER_RESET_SECONDS,
+            concurrency_policy=concurrency_policy()
+        )
+        from woffu_cache import configure_response_cache
+        configure_response_cache(enabled=HTTP_CACHE, max_bytes=HTTP_CACHE_MAX_BYTES, ttls=HTTP_CACHE_TTL_SECONDS)
+        if args.trace or args.profile:
+            enable_tracing(args.trace, http)
+    elif args.trace or args.profile:
+        enable_tracing(args.trace)
+
+    # Con --output jsonl stdout lleva sólo los resultados; el resto de mensajes van a stderr
+    output_options = {}
+    if getattr(args, 'output', 'text') == 'jsonl':
+        output_options = {"show_progress": False, "show_statistics": False,
+                          "output": "jsonl", "result_stream": sys.stdout}
+        sys.stdout = sys.stderr
+
     # Crear instancia del autologin
-    woffu = WoffuAutologin()
+    woffu = WoffuAutologin(**output_options)
     
     try:
         if args.command == 'single':
@@ -484,31 +1584,73 @@ FICHAJE MENSUAL:
             
         elif args.command == 'monthly':
             # Validaciones para fichaje mensual
-            if args.month and not (1 <= args.month <= 12):
-                print("[ERROR] Error: El mes debe estar entre 1 y 12")
-                sys.exit(1)
-            
-            if args.year and not (2020 <= args.year <= 2030):
-                print("[ERROR] Error: El año debe estar entre 2020 y 2030")
-                sys.exit(1)
+            _validate_period(args)
+
+            for value, flag in ((args.workers, '--workers'), (args.max_errors, '--max-errors')):
+                if value is not None and value < 1:
+                    print(f"[ERROR] Error: {flag} debe ser al menos 1")
+                    sys.exit(1)
             
             # Ejecutar fichaje mensual
-            stats = woffu.execute_monthly_filing(
-                year=args.year,
-                month=args.month,
-                start_time=args.start_time,
-                end_time=args.end_time,
-                skip_weekends=not args.include_weekends,
-                dry_run=args.dry_run,
-                same_schedule=args.same_schedule,
-                weekly_schedule=args.weekly_schedule
-            )
+            stats = woffu.execute_monthly_filing(workers=args.workers, **_filing_options(args))
             
             # Código de salida basado en resultados
             if stats["errors"] > 0:
                 sys.exit(1)
             else:
                 sys.exit(0)
+
+        elif args.command == 'batch':
+            _validate_period(args)
+
+            for value, flag in ((args.max_concurrency, '--max-concurrency'), (args.max_errors, '--max-errors')):
+                if value is not None and value < 1:
+                    print(f"[ERROR] Error: {flag} debe ser al menos 1")
+                    sys.exit(1)
+
+            stats = woffu.execute_batch_filing(
+                args.profiles_dir or args.manifest,
+                max_concurrency=args.max_concurrency,
+                **_filing_options(args)
+            )
+            sys.exit(1 if stats["errors"] > 0 else 0)
+
+        elif args.command == 'plan':
+            _validate_period(args)
+            woffu = WoffuAutologin(data_file=args.data_file)
+            stats = woffu.write_plan(args.output, **_period_options(args), **_schedule_options(args))
+            sys.exit(1 if stats["errors"] > 0 else 0)
+
+        elif args.command == 'apply':
+            for value, flag in ((args.workers, '--workers'), (args.max_concurrency, '--max-concurrency'),
+                                (args.max_errors, '--max-errors')):
+                if value is not None and value < 1:
+                    print(f"[ERROR] Error: {flag} debe ser al menos 1")
+                    sys.exit(1)
+
+            if len(args.plan_files) == 1:
+                plan_file = args.plan_files[0]
+                try:
+                    data_file = plan_data_file(plan_file, args.data_file)
+                except (OSError, ValueError) as e:
+                    print(f"[ERROR] Error: No se pudo leer el plan {plan_file}: {e}")
+                    sys.exit(1)
+                woffu = WoffuAutologin(data_file=data_file, **output_options)
+                stats = woffu.apply_plan(plan_file, workers=args.workers, **_submit_options(args))
+            else:
+                profiles = ({"plan_file": plan_file, "data_file": args.data_file} for plan_file in args.plan_files)
+                stats = woffu.execute_batch_filing(profiles, max_concurrency=args.max_concurrency,
+                                                   **_submit_options(args))
+            sys.exit(1 if stats["errors"] > 0 else 0)
+
+        elif args.command == 'sign':
+            woffu = WoffuAutologin(data_file=args.data_file)
+            sys.exit(0 if woffu.execute_sign(dry_run=args.dry_run) else 1)
+
+        elif args.command == 'daemon':
+            woffu = WoffuAutologin(data_file=args.data_file)
+            stats = woffu.execute_daemon(dry_run=args.dry_run, **_schedule_options(args))
+            sys.exit(1 if stats["errors"] > 0 else 0)
     
     except KeyboardInterrupt:
         print("\n[STOP] Proceso interrumpido por el usuario")
@@ -516,6 +1658,21 @@ FICHAJE MENSUAL:
     except Exception as e:
         print(f"[ERROR] Error inesperado: {e}")
         sys.exit(1)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            try:
+                profiler.dump(args.profile)
+                print("=" * 60)
+                print("[STAT] Funciones con más tiempo acumulado:")
+                print(profiler.report())
+                print(f"[STAT] Perfil completo en {args.profile} (python -m pstats {args.profile}, snakeviz...)")
+            except OSError as e:
+                print(f"[ERROR] No se pudo guardar el perfil en {args.profile}: {e}")
+        tracer = get_tracer()
+        if tracer.enabled and (SHOW_STATISTICS or profiler is not None):
+            tracer.print_summary()
+        tracer.close()
 
 
 if __name__ == "__main__":
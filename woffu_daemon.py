@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Woffu Daemon - Fichaje en tiempo real con sesión caliente
+Proceso de larga duración que lee las credenciales una sola vez, mantiene el token
+y la conexión con el dominio de la empresa abiertos y ficha (signIn) a las horas
+planificadas de cada día, en lugar de arrancar un proceso nuevo desde cron.
+"""
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+import requests
+
+from woffu import WoffuClient, invalidateAccessToken
+from woffu_http import get_default_client
+from woffu_interval import IntervalLike, as_intervals
+
+DEFAULT_WARMUP_SECONDS = 60          # Antelación con la que se renueva el token y se abre la conexión
+DEFAULT_TICK_SECONDS = 30            # Espera máxima entre comprobaciones del reloj
+DEFAULT_MISSED_GRACE_SECONDS = 300   # Retraso máximo con el que aún se ficha (p.ej. tras suspender el equipo)
+CLOCK_JUMP_SECONDS = 5               # Diferencia reloj/monotónico que se considera salto de reloj
+
+# plan_day(día) -> intervalos (Interval o (HH:MM:SS, HH:MM:SS)) a fichar ese día ([] si no se trabaja)
+DayPlanner = Callable[[date], List[IntervalLike]]
+
+
+class SignDaemon:
+    """Ficha entrada y salida de cada intervalo planificado a su hora exacta.
+
+    Cada intervalo genera dos fichajes (entrada y salida). Si un fichaje no se pudo
+    hacer a tiempo (equipo suspendido, salto de reloj...), se omite junto con el resto
+    de su intervalo para no invertir el estado de entrada/salida en Woffu; el día
+    puede completarse después con 'monthly --sync'.
+    """
+
+    def __init__(self, data_file: str, plan_day: DayPlanner, dry_run: bool = False,
+                 warmup_seconds: float = DEFAULT_WARMUP_SECONDS,
+                 tick_seconds: float = DEFAULT_TICK_SECONDS,
+                 missed_grace_seconds: float = DEFAULT_MISSED_GRACE_SECONDS,
+                 http=None):
+        self.data_file = data_file
+        self.plan_day = plan_day
+        self.dry_run = dry_run
+        self.warmup_seconds = warmup_seconds
+        self.tick_seconds = tick_seconds
+        self.missed_grace_seconds = missed_grace_seconds
+        self.http = http or get_default_client()
+        self.client = WoffuClient.from_file(data_file, self.http)
+        self.auth_headers = None
+        self.stats = {"signed": 0, "missed": 0, "errors": 0}
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Detiene run() en cuanto termine la espera o el fichaje en curso."""
+        self._stop.set()
+
+    def day_events(self, day: date) -> List[Tuple[datetime, str, int]]:
+        """Fichajes de un día como (instante, "in"/"out", índice del intervalo), en orden."""
+        events = []
+        midnight = datetime.combine(day, datetime.min.time())
+        for index, interval in enumerate(as_intervals(self.plan_day(day))):
+            for kind, seconds in (("in", interval.start), ("out", interval.end)):
+                events.append((midnight + timedelta(seconds=seconds), kind, index))
+        events.sort(key=lambda event: event[0])
+        return events
+
+    def run(self, until: Optional[datetime] = None) -> dict:
+        """Bucle principal: planifica cada día y ficha sus eventos hasta stop() o until."""
+        stats = self.stats = {"signed": 0, "missed": 0, "errors": 0}
+        started = datetime.now()
+        day = started.date()
+        while not self._stop.is_set():
+            events = self.day_events(day)
+            if events:
+                print(f"📅 {day.isoformat()}: " + ", ".join(
+                    f"{kind} {when.strftime('%H:%M:%S')}" for when, kind, _ in events))
+            skipped_intervals = set()
+            for when, kind, index in events:
+                if until is not None and when > until:
+                    return stats
+                if index in skipped_intervals:
+                    continue
+                if when < started - timedelta(seconds=self.missed_grace_seconds):
+                    # Intervalo ya empezado al arrancar el daemon: no es un fichaje perdido
+                    skipped_intervals.add(index)
+                    continue
+                lateness = self._wait_until(when)
+                if lateness is None:
+                    return stats
+                if lateness > self.missed_grace_seconds:
+                    print(f"⏭️ Fichaje '{kind}' de las {when.strftime('%H:%M:%S')} perdido "
+                          f"({lateness:.0f}s de retraso), se omite el intervalo")
+                    stats["missed"] += 1
+                    skipped_intervals.add(index)
+                    continue
+                if self._sign(when, kind):
+                    stats["signed"] += 1
+                else:
+                    stats["errors"] += 1
+            next_midnight = datetime.combine(day + timedelta(days=1), datetime.min.time())
+            if until is not None and next_midnight > until:
+                return stats
+            # Día sin fichajes: no se planifica el siguiente hasta que empiece
+            if not events and self._wait_until(next_midnight, warm_up=False) is None:
+                return stats
+            # Tras una suspensión larga el siguiente día a planificar puede ser hoy, no mañana
+            day = max(day + timedelta(days=1), date.today())
+        return stats
+
+    def _wait_until(self, when: datetime, warm_up: bool = True) -> Optional[float]:
+        """Espera hasta when según el reloj de pared y devuelve el retraso (None si se detiene).
+
+        Se duerme a trozos de como mucho tick_seconds y se recalcula con el reloj real en
+        cada despertar, así una suspensión o un ajuste de hora no desplazan el fichaje.
+        Con warm_up=False no se prepara la sesión antes (esperas que no acaban en un fichaje).
+        """
+        warmed = not warm_up
+        last_wall, last_monotonic = time.time(), time.monotonic()
+        while True:
+            wall, monotonic = time.time(), time.monotonic()
+            jump = (wall - last_wall) - (monotonic - last_monotonic)
+            if abs(jump) > CLOCK_JUMP_SECONDS:
+                print(f"⏰ Salto de reloj de {jump:+.0f}s (suspensión o ajuste de hora), se recalcula la espera")
+            last_wall, last_monotonic = wall, monotonic
+
+            remaining = (when - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return -remaining
+            if not warmed and remaining <= self.warmup_seconds:
+                self._warm_up()
+                warmed = True
+                continue
+            timeout = remaining if warmed else remaining - self.warmup_seconds
+            if self._stop.wait(min(timeout, self.tick_seconds)):
+                return None
+
+    def _warm_up(self):
+        """Renueva el token si hace falta y abre la conexión con el dominio antes del fichaje."""
+        if self.dry_run:
+            return
+        client = self.client
+        try:
+            self.auth_headers = client.auth_headers()
+            response = self.http.get(f"https://{client.domain}/api/users", headers=self.auth_headers)
+            if response.status_code == 401:
+                invalidateAccessToken(client.username, client.token_cache)
+                self.auth_headers = client.auth_headers()
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ No se pudo preparar la sesión: {e}")
+            self.auth_headers = None
+
+    def _sign(self, when: datetime, kind: str) -> bool:
+        label = "entrada" if kind == "in" else "salida"
+        if self.dry_run:
+            print(f"[DRY RUN] Fichaje de {label} a las {when.strftime('%H:%M:%S')}")
+            return True
+        try:
+            if self.auth_headers is None:
+                self.auth_headers = self.client.auth_headers()
+            ok = self.client.sign(self.auth_headers)
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Error al fichar la {label} de las {when.strftime('%H:%M:%S')}: {e}")
+            return False
+        delay_ms = (datetime.now() - when).total_seconds() * 1000
+        if ok:
+            print(f"✅ Fichaje de {label} a las {when.strftime('%H:%M:%S')} (+{delay_ms:.0f} ms)")
+        else:
+            print(f"❌ Woffu rechazó el fichaje de {label} de las {when.strftime('%H:%M:%S')}")
+            # Por si el token ya no es válido: el siguiente fichaje pedirá uno nuevo
+            invalidateAccessToken(self.client.username, self.client.token_cache)
+            self.auth_headers = None
+        return ok
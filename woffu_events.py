@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Woffu Events - Resultado estructurado de cada día procesado
+Los generadores de woffu_cli.py (iter_range_filing, iter_apply_plan...) emiten un
+dict por día en cuanto se conoce su resultado; la CLI los muestra como texto o JSONL.
+
+    {"date": "2025-03-03", "status": "filed", "intervals": [["08:01:12", "15:02:40"]],
+     "reason": null, "detail": null, "latency_ms": 182.4, "error": null}
+
+Los errores que no son de un día concreto (horario inválido, presencia no disponible...)
+llevan date None.
+"""
+
+from typing import List, Optional, Tuple
+
+# Estados
+STATUS_FILED = "filed"        # Enviado y aceptado por Woffu
+STATUS_PLANNED = "planned"    # Dry run: se habría enviado
+STATUS_SKIPPED = "skipped"    # No se envía (ver reason)
+STATUS_FAILED = "failed"      # Error (ver error)
+STATUS_VERIFIED = "verified"  # --verify: Woffu muestra lo enviado (segundo resultado del día)
+STATUS_MISMATCH = "mismatch"  # --verify: Woffu no muestra lo enviado tras los reintentos (ver error)
+
+# Motivos de salto (también se guardan en los ficheros de plan)
+SKIP_WEEKEND = "weekend"
+SKIP_HOLIDAY = "holiday"
+SKIP_NO_SCHEDULE = "no_schedule"
+SKIP_FUTURE = "future"
+SKIP_OVERLAP = "overlap"
+SKIP_CONFIRMED = "confirmed"  # Ya fichado según el registro local
+SKIP_UNCHANGED = "unchanged"  # --sync: lo que hay en Woffu ya coincide con el plan
+
+
+def day_result(work_date: Optional[str], status: str, intervals: Optional[List[Tuple[str, str]]] = None,
+               reason: Optional[str] = None, detail: Optional[str] = None,
+               latency_ms: Optional[float] = None, error: Optional[str] = None) -> dict:
+    return {
+        "date": work_date,
+        "status": status,
+        "intervals": [list(i) for i in intervals] if intervals is not None else None,
+        "reason": reason,
+        "detail": detail,
+        "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+        "error": error
+    }
+
+
+def count_result(stats: dict, result: dict):
+    """Suma un resultado a las estadísticas clásicas {success, skipped, errors}.
+
+    Los días verificados ya contaron como success al enviarse: van aparte, en verified.
+    Los que no superan la verificación pasan de success a errors.
+    """
+    if result["status"] in (STATUS_FILED, STATUS_PLANNED):
+        stats["success"] += 1
+    elif result["status"] == STATUS_SKIPPED:
+        stats["skipped"] += 1
+    elif result["status"] == STATUS_VERIFIED:
+        stats["verified"] = stats.get("verified", 0) + 1
+    elif result["status"] == STATUS_MISMATCH:
+        stats["success"] -= 1
+        stats["errors"] += 1
+    else:
+        stats["errors"] += 1
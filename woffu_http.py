@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Woffu HTTP - Cliente HTTP compartido
+Mantiene una requests.Session por host (app.woffu.com, dominio de la empresa...)
+para reutilizar conexiones TCP+TLS entre llamadas. Opcionalmente limita las
+peticiones en vuelo por host con un límite adaptativo (AIMD).
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10          # Conexiones keep-alive por host
+DEFAULT_TIMEOUT_SECONDS = 30    # Timeout por defecto de cada petición
+BASE_URL_ENV = "WOFFU_BASE_URL" # Redirige todas las peticiones (p.ej. al servidor de woffu_mock.py)
+
+DEFAULT_MAX_ATTEMPTS = 4        # Intentos totales por petición reintentable
+DEFAULT_BACKOFF_BASE_SECONDS = 0.5
+DEFAULT_BACKOFF_MAX_SECONDS = 30.0
+DEFAULT_BREAKER_THRESHOLD = 5   # Fallos seguidos que abren el circuito de un host
+DEFAULT_BREAKER_RESET_SECONDS = 30.0
+
+DEFAULT_MIN_CONCURRENCY = 1     # Límites del control adaptativo de peticiones en vuelo por host
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_LATENCY_TARGET_SECONDS = 2.0  # p95 por encima del cual el host se considera saturado
+LATENCY_WINDOW = 50             # Respuestas recientes con las que se calcula el p95
+DECREASE_FACTOR = 0.5           # Recorte multiplicativo ante 429/5xx o latencia alta
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# listener(method, url, status_code, elapsed_seconds, response_bytes, attempt)
+# status_code es None si falla la conexión; attempt empieza en 0 (los reintentos son > 0)
+ResponseListener = Callable[[str, str, Optional[int], float, int, int], None]
+
+
+def rewrite_url(base_url: Optional[str], url: str, headers: dict) -> str:
+    """Redirige url a base_url (si se indica) y añade a headers el host original en X-Woffu-Host."""
+    if not base_url:
+        return url
+    parts = urlsplit(url)
+    headers["X-Woffu-Host"] = parts.netloc
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{base_url}{parts.path}{query}"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """El circuito del host está abierto: no se envía la petición."""
+
+
+class RetryPolicy:
+    """Reintentos con backoff exponencial con jitter y respeto de Retry-After."""
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX_SECONDS):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def backoff(self, attempt: int) -> float:
+        """Espera antes del reintento attempt (1, 2...): full jitter sobre base * 2^(attempt-1)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return self.backoff(attempt)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convierte una cabecera Retry-After (segundos o fecha HTTP) en segundos de espera."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Circuito por host: tras varios fallos seguidos deja de enviar peticiones durante un tiempo.
+
+    Pasado reset_timeout deja pasar una petición de prueba (semiabierto); si va bien se cierra.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+                 reset_timeout: float = DEFAULT_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def abandon_probe(self):
+        """La petición terminó sin decir nada del host (p.ej. Ctrl+C): otra puede hacer de prueba."""
+        with self._lock:
+            self._probing = False
+
+
+class ConcurrencyPolicy:
+    """Límites del control adaptativo de concurrencia (uno por host, ver AdaptiveLimiter)."""
+
+    def __init__(self, min_limit: int = DEFAULT_MIN_CONCURRENCY, max_limit: int = DEFAULT_MAX_CONCURRENCY,
+                 initial_limit: int = DEFAULT_INITIAL_CONCURRENCY,
+                 latency_target: float = DEFAULT_LATENCY_TARGET_SECONDS):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.initial_limit = min(self.max_limit, max(self.min_limit, initial_limit))
+        self.latency_target = latency_target
+
+
+class AdaptiveLimiter:
+    """Límite de peticiones en vuelo a un host ajustado con AIMD.
+
+    Cada respuesta sana con el límite en uso suma 1/límite (+1 por ronda completa);
+    un 429, un 5xx, un fallo de conexión o un p95 reciente por encima de latency_target
+    lo multiplican por DECREASE_FACTOR. Sólo recortan las peticiones enviadas después
+    del último recorte, para que una ráfaga de errores simultáneos cuente como uno.
+    Sólo se crece mientras el límite se llega a usar: cada vez que sube un hueco entero
+    hay que volver a llenarlo antes de seguir creciendo.
+    """
+
+    def __init__(self, policy: ConcurrencyPolicy):
+        self.policy = policy
+        self._limit = float(policy.initial_limit)
+        self._in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._epoch = 0  # Recortes hechos; cada petición recuerda el de su envío
+        self._saturated = False
+        self.min_seen = self.max_seen = policy.initial_limit
+        self.decreases = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self) -> int:
+        """Espera un hueco libre; devuelve la marca que hay que pasar a release()."""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+            if self._in_flight >= int(self._limit):
+                self._saturated = True
+            return self._epoch
+
+    def release(self, epoch: int, elapsed: float, status_code: Optional[int]):
+        """Libera el hueco y ajusta el límite según el resultado (status None: fallo de conexión)."""
+        with self._cond:
+            self._in_flight -= 1
+            self._latencies.append(elapsed)
+            failed = status_code is None or status_code == 429 or status_code >= 500
+            if failed or self._p95() > self.policy.latency_target:
+                if epoch == self._epoch:
+                    self._limit = max(self.policy.min_limit, self._limit * DECREASE_FACTOR)
+                    self._epoch += 1
+                    self._saturated = False
+                    self._latencies.clear()  # El p95 se vuelve a medir con el nuevo límite
+                    self.decreases += 1
+            elif self._saturated:
+                # Sólo se crece si el límite actual se llega a usar
+                previous = self.limit
+                self._limit = min(self.policy.max_limit, self._limit + 1 / self._limit)
+                if self.limit > previous:
+                    self._saturated = self._in_flight >= self.limit
+            self.min_seen = min(self.min_seen, self.limit)
+            self.max_seen = max(self.max_seen, self.limit)
+            self._cond.notify_all()
+
+    def _p95(self) -> float:
+        if len(self._latencies) < 10:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self._in_flight, "min": self.min_seen,
+                    "max": self.max_seen, "decreases": self.decreases, "p95_ms": round(self._p95() * 1000, 1)}
+
+
+class WoffuHttpClient:
+    """Cliente HTTP con una sesión (pool de conexiones) por host.
+
+    Si se indica base_url, el esquema y host de cada URL se sustituyen por los de
+    base_url y el host original viaja en la cabecera X-Woffu-Host. Con concurrency_policy,
+    las peticiones a cada host esperan turno según su AdaptiveLimiter.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 base_url: Optional[str] = None, retry_policy: Optional[RetryPolicy] = None,
+                 breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+                 breaker_reset_seconds: float = DEFAULT_BREAKER_RESET_SECONDS,
+                 concurrency_policy: Optional[ConcurrencyPolicy] = None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self._sessions: Dict[str, requests.Session] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.concurrency_policy = concurrency_policy
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._listeners: List[ResponseListener] = []
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def session_for(self, host: str) -> requests.Session:
+        """Devuelve (creándola si hace falta) la sesión asociada a un host."""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._sessions[host] = self._new_session()
+            return session
+
+    def breaker_for(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_reset_seconds)
+            return breaker
+
+    def limiter_for(self, host: str) -> Optional[AdaptiveLimiter]:
+        if self.concurrency_policy is None:
+            return None
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = AdaptiveLimiter(self.concurrency_policy)
+            return limiter
+
+    def concurrency_stats(self) -> Dict[str, dict]:
+        """Límite actual (y mínimo/máximo alcanzados) de cada host usado, si hay control adaptativo."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {host: limiter.stats() for host, limiter in sorted(limiters.items())}
+
+    def add_listener(self, listener: ResponseListener):
+        """Registra una función a la que se notifica cada respuesta (métricas, trazas...)."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ResponseListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, method, url, status_code, elapsed, nbytes, attempt):
+        for listener in list(self._listeners):
+            listener(method, url, status_code, elapsed, nbytes, attempt)
+
+    def _rewrite(self, url: str, kwargs) -> str:
+        if not self.base_url:
+            return url
+        headers = dict(kwargs.get("headers") or {})
+        kwargs["headers"] = headers
+        return rewrite_url(self.base_url, url, headers)
+
+    def request(self, method: str, url: str, retry: Optional[bool] = None, **kwargs) -> requests.Response:
+        """Envía la petición reintentando errores transitorios.
+
+        Por defecto sólo se reintentan los métodos idempotentes; retry=True/False lo fuerza
+        (p.ej. el grant de /token es un POST que se puede repetir sin efectos). Un 429 se
+        reintenta siempre: el servidor lo rechaza sin procesarlo.
+        Tras agotar los intentos se devuelve la última respuesta o se relanza la excepción.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        session = self.session_for(host)
+        breaker = self.breaker_for(host)
+        limiter = self.limiter_for(host)
+        target = self._rewrite(url, kwargs)
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        max_attempts = self.retry_policy.max_attempts
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuito abierto para {host}: demasiados fallos seguidos")
+            epoch = limiter.acquire() if limiter is not None else None
+            started = time.perf_counter()
+            try:
+                response = session.request(method, target, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if limiter is not None:
+                    limiter.release(epoch, time.perf_counter() - started, None)
+                self._notify(method, url, None, time.perf_counter() - started, 0, attempt)
+                breaker.record_failure()
+                attempt += 1
+                if not retry or attempt >= max_attempts:
+                    raise
+                time.sleep(self.retry_policy.delay(attempt))
+                continue
+            except BaseException as e:
+                if limiter is not None:
+                    limiter.release(epoch, time.perf_counter() - started, None)
+                if isinstance(e, requests.exceptions.RequestException):
+                    breaker.record_failure()
+                else:
+                    breaker.abandon_probe()
+                raise
+            if limiter is not None:
+                limiter.release(epoch, time.perf_counter() - started, response.status_code)
+            self._notify(method, url, response.status_code, time.perf_counter() - started,
+                         len(response.content), attempt)
+
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                # 429 indica que el host está vivo pero nos limita: no abre el circuito
+                breaker.record_success()
+            attempt += 1
+            retryable = response.status_code == 429 or (retry and response.status_code in RETRYABLE_STATUSES)
+            if not retryable or attempt >= max_attempts:
+                return response
+            time.sleep(self.retry_policy.delay(attempt, response))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_default_client: Optional[WoffuHttpClient] = None
+_default_lock = threading.Lock()
+
+def get_default_client() -> WoffuHttpClient:
+    """Cliente compartido por todas las funciones de woffu.py."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = WoffuHttpClient(base_url=os.environ.get(BASE_URL_ENV))
+        return _default_client
+
+def configure_default_client(pool_size: int = DEFAULT_POOL_SIZE,
+                             timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                             base_url: Optional[str] = None,
+                             retry_policy: Optional[RetryPolicy] = None,
+                             breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+                             breaker_reset_seconds: float = DEFAULT_BREAKER_RESET_SECONDS,
+                             concurrency_policy: Optional[ConcurrencyPolicy] = None) -> WoffuHttpClient:
+    """Sustituye el cliente compartido por uno con la configuración indicada."""
+    global _default_client
+    with _default_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = WoffuHttpClient(pool_size=pool_size, timeout=timeout,
+                                          base_url=base_url or os.environ.get(BASE_URL_ENV),
+                                          retry_policy=retry_policy,
+                                          breaker_threshold=breaker_threshold,
+                                          breaker_reset_seconds=breaker_reset_seconds,
+                                          concurrency_policy=concurrency_policy)
+        return _default_client
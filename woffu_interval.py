@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Woffu Interval - Intervalos de fichaje en segundos desde medianoche
+Las horas se parsean una sola vez al entrar (argumentos de la CLI, fichero de plan,
+worker) y se formatean como HH:MM:SS sólo al salir (cuerpo del PUT, JSON, mensajes).
+Entre medias, planificar, aleatorizar, comparar y validar es aritmética de enteros.
+
+    Interval.parse("08:00:00", "15:00:00")  -> Interval(08:00:00-15:00:00)
+    start, end = interval                    -> ("08:00:00", "15:00:00")
+"""
+
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+SECONDS_PER_DAY = 86400
+
+
+def parse_time(value: str) -> int:
+    """HH:MM:SS (o HH:MM) -> segundos desde medianoche; ValueError si no es una hora válida."""
+    parts = value.strip().split(":")
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Formato de tiempo inválido: {value}. Use HH:MM:SS")
+    hours, minutes = int(parts[0]), int(parts[1])
+    seconds = int(parts[2]) if len(parts) == 3 else 0
+    if hours > 23 or minutes > 59 or seconds > 59:
+        raise ValueError(f"Hora fuera de rango: {value}")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def format_time(seconds: int) -> str:
+    """Segundos desde medianoche -> HH:MM:SS"""
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class Interval:
+    """Intervalo [start, end] en segundos desde medianoche.
+
+    Se ordena por inicio y, al desempaquetarlo o serializarlo (list(interval)),
+    da las horas como texto HH:MM:SS.
+    """
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def parse(cls, start: str, end: str) -> "Interval":
+        return cls(parse_time(start), parse_time(end))
+
+    @property
+    def minutes(self) -> int:
+        return int((self.end - self.start) / 60)
+
+    def overlaps(self, other: "Interval") -> bool:
+        """True si other empieza antes de que termine éste (other ordenado después)."""
+        return self.end > other.start
+
+    def __iter__(self) -> Iterator[str]:
+        yield format_time(self.start)
+        yield format_time(self.end)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Interval) and self.start == other.start and self.end == other.end
+
+    def __lt__(self, other: "Interval") -> bool:
+        return (self.start, self.end) < (other.start, other.end)
+
+    def __hash__(self) -> int:
+        return hash((self.start, self.end))
+
+    def __repr__(self) -> str:
+        return f"Interval({format_time(self.start)}-{format_time(self.end)})"
+
+
+# Intervalo ya parseado o par de horas texto (JSON, API pública de woffu.py, woffu_async)
+IntervalLike = Union[Interval, Sequence[str]]
+
+
+def as_interval(value: IntervalLike) -> Interval:
+    return value if isinstance(value, Interval) else Interval.parse(*value)
+
+
+def as_intervals(values: Iterable[IntervalLike]) -> List[Interval]:
+    """Convierte (sólo si hace falta) una lista de intervalos de cualquier origen."""
+    return [as_interval(value) for value in values]
+
+
+def first_overlap(intervals: List[Interval]) -> Optional[Tuple[Interval, Interval]]:
+    """Primer par de intervalos solapados de una lista ordenada, o None."""
+    for previous, current in zip(intervals, intervals[1:]):
+        if previous.overlaps(current):
+            return previous, current
+    return None
+
+
+class DayPlan:
+    """Día a fichar: fecha YYYY-MM-DD e intervalos ordenados.
+
+    base son los intervalos del horario antes de aleatorizarlos (None si el día viene
+    de un fichero de plan). Se desempaqueta como la tupla (fecha, intervalos) que usaba
+    el código anterior.
+    """
+
+    __slots__ = ("date", "intervals", "base")
+
+    def __init__(self, date: str, intervals: List[Interval], base: Optional[List[Interval]] = None):
+        self.date = date
+        self.intervals = intervals
+        self.base = base
+
+    def __iter__(self):
+        yield self.date
+        yield self.intervals
+
+    def __len__(self) -> int:
+        return 2
+
+    def __getitem__(self, index):
+        return (self.date, self.intervals)[index]
+
+    def __repr__(self) -> str:
+        return f"DayPlan({self.date}, {self.intervals!r})"
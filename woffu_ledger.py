@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Woffu Ledger - Registro local de días fichados
+Base de datos SQLite con una fila por (usuario, fecha) que permite repetir
+ejecuciones sin volver a enviar los días ya confirmados.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+LEDGER_FILE = "woffu_ledger.db"  # Se guarda junto a data.json
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS filings (
+    user_id   INTEGER NOT NULL,
+    date      TEXT    NOT NULL,
+    intervals TEXT    NOT NULL,
+    diary_id  INTEGER,
+    status    INTEGER,
+    filed_at  TEXT    NOT NULL,
+    PRIMARY KEY (user_id, date)
+)
+"""
+
+
+class FilingLedger:
+    """Registro persistente de los fichajes enviados, seguro entre hilos."""
+
+    def __init__(self, path: str = LEDGER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+
+    def record(self, user_id, work_date: str, intervals: List[Tuple[str, str]],
+               diary_id=None, status: Optional[int] = None):
+        """Guarda (o sustituye) el resultado del último envío de un día."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO filings (user_id, date, intervals, diary_id, status, filed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, work_date, json.dumps([list(i) for i in intervals]), diary_id, status,
+                 datetime.now().replace(microsecond=0).isoformat())
+            )
+            self._conn.commit()
+
+    def get(self, user_id, work_date: str) -> Optional[dict]:
+        """Devuelve el último registro de un día o None si nunca se envió."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT intervals, diary_id, status, filed_at FROM filings WHERE user_id = ? AND date = ?",
+                (user_id, work_date)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "date": work_date,
+            "intervals": [tuple(i) for i in json.loads(row[0])],
+            "diary_id": row[1],
+            "status": row[2],
+            "filed_at": row[3]
+        }
+
+    def confirmed_filings(self, user_id, from_date: str, to_date: str) -> Dict[str, List[Tuple[str, str]]]:
+        """Intervalos enviados de cada fecha del rango cuyo último envío terminó con un 2xx."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, intervals FROM filings WHERE user_id = ? AND date BETWEEN ? AND ? "
+                "AND status BETWEEN 200 AND 299",
+                (user_id, from_date, to_date)
+            ).fetchall()
+        return {row[0]: [tuple(i) for i in json.loads(row[1])] for row in rows}
+
+    def unconfirm(self, user_id, work_date: str):
+        """Deja un día como no confirmado (p.ej. si Woffu no muestra lo enviado)."""
+        with self._lock:
+            self._conn.execute("UPDATE filings SET status = NULL WHERE user_id = ? AND date = ?",
+                               (user_id, work_date))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
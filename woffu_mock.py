@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Woffu Mock - Servidor local que imita la API de Woffu
+Implementa los endpoints que usa woffu.py para poder medir y probar ejecuciones
+completas sin tocar el Woffu real. Latencia, errores 5xx y 429 configurables, y un
+límite de peticiones simultáneas del tenant (las que lo superan reciben 429). Los GET
+llevan ETag y responden 304 a un If-None-Match que coincide.
+
+Uso:
+    python woffu_mock.py --port 8765 --latency 0.05 --throttle-rate 0.02
+    WOFFU_BASE_URL=http://127.0.0.1:8765 python woffu_cli.py monthly --year 2024 --month 3
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+TOKEN_LIFETIME_SECONDS = 3600
+
+# (método, patrón de ruta) -> nombre del endpoint usado en las métricas
+ROUTES = [
+    ("POST", re.compile(r"^/token$"), "token"),
+    ("GET", re.compile(r"^/api/users$"), "users"),
+    ("GET", re.compile(r"^/api/companies/(?P<company_id>\d+)$"), "companies"),
+    ("POST", re.compile(r"^/api/svc/signs/signs$"), "signs"),
+    ("GET", re.compile(r"^/api/svc/core/diariesquery/users/(?P<user_id>\d+)/diaries/summary/presence$"), "presence"),
+    ("PUT", re.compile(r"^/api/diaries/(?P<diary_id>\d+)/workday/slots/self$"), "slots"),
+]
+
+
+class MockWoffuState:
+    """Estado en memoria: usuarios, tokens y diarios con sus slots."""
+
+    COMPANY_ID = 1000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users: Dict[str, int] = {}          # username -> user_id
+        self.tokens: Dict[str, str] = {}         # access/refresh token -> username
+        self.diaries: Dict[int, dict] = {}       # diary_id -> diario
+        self.counts: Counter = Counter()
+        self.in_flight = 0
+        self.throttled = 0                       # Respuestas 429 por superar max_in_flight
+
+    def user_id_for(self, username: str) -> int:
+        with self.lock:
+            if username not in self.users:
+                self.users[username] = len(self.users) + 1
+            return self.users[username]
+
+    def issue_token(self, username: str) -> dict:
+        with self.lock:
+            serial = len(self.tokens)
+            access_token = f"mock-access-{serial}"
+            refresh_token = f"mock-refresh-{serial}"
+            self.tokens[access_token] = username
+            self.tokens[refresh_token] = username
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": TOKEN_LIFETIME_SECONDS
+        }
+
+    @staticmethod
+    def diary_id_for(user_id: int, day: date) -> int:
+        return user_id * 1_000_000 + day.toordinal()
+
+    def diary(self, user_id: int, day: date) -> dict:
+        diary_id = self.diary_id_for(user_id, day)
+        with self.lock:
+            if diary_id not in self.diaries:
+                self.diaries[diary_id] = {
+                    "diaryId": diary_id,
+                    "userId": user_id,
+                    "date": f"{day.isoformat()}T00:00:00",
+                    "in": None,
+                    "out": None,
+                    "accepted": False,
+                    "isPending": False
+                }
+            return dict(self.diaries[diary_id])
+
+    def set_slots(self, diary_id: int, slots: list) -> bool:
+        with self.lock:
+            diary = self.diaries.get(diary_id)
+            if diary is None:
+                return False
+            times = [(slot["in"]["time"], slot["out"]["time"]) for slot in slots]
+            diary["in"] = min(t[0] for t in times) if times else None
+            diary["out"] = max(t[1] for t in times) if times else None
+            diary["isPending"] = bool(times)
+            return True
+
+
+class MockWoffuHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, como el Woffu real
+    disable_nagle_algorithm = True  # cabeceras y cuerpo van en escrituras separadas
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    # --- utilidades ---
+    def _send_json(self, status: int, body=None, headers: Optional[dict] = None):
+        payload = json.dumps(body if body is not None else {}).encode("utf-8")
+        if self.command == "GET" and status == 200:
+            # ETag del cuerpo: un GET condicional que coincide recibe 304 sin cuerpo
+            etag = '"' + hashlib.sha1(payload).hexdigest()[:16] + '"'
+            headers = {**(headers or {}), "ETag": etag}
+            if self.headers.get("If-None-Match") == etag:
+                with self.server.state.lock:
+                    self.server.state.counts["not_modified"] += 1
+                status, payload = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _username(self) -> Optional[str]:
+        auth = self.headers.get("Authorization", "")
+        if not auth.startswith("Bearer "):
+            return None
+        return self.server.state.tokens.get(auth[len("Bearer "):])
+
+    def _route(self, method: str, path: str) -> Tuple[Optional[str], dict]:
+        for route_method, pattern, name in ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                return name, match.groupdict()
+        return None, {}
+
+    def _dispatch(self, method: str):
+        parts = urlsplit(self.path)
+        body = self._read_body()
+        endpoint, params = self._route(method, parts.path)
+        state = self.server.state
+        with state.lock:
+            state.counts[endpoint or "unknown"] += 1
+            state.in_flight += 1
+            over_limit = bool(self.server.max_in_flight) and state.in_flight > self.server.max_in_flight
+            if over_limit:
+                state.throttled += 1
+        try:
+            if self.server.latency:
+                time.sleep(self.server.latency * random.uniform(0.5, 1.5))
+        finally:
+            # La petición deja de contar antes de responder: el cliente puede reenviar en cuanto la recibe
+            with state.lock:
+                state.in_flight -= 1
+        if over_limit:
+            return self._send_json(429, {"error": "Too Many Requests"}, {"Retry-After": "1"})
+        if endpoint is None:
+            return self._send_json(404, {"error": f"{method} {parts.path} no existe"})
+        roll = random.random()
+        if roll < self.server.throttle_rate:
+            return self._send_json(429, {"error": "Too Many Requests"}, {"Retry-After": "1"})
+        if roll < self.server.throttle_rate + self.server.error_rate:
+            return self._send_json(502, {"error": "Bad Gateway"})
+
+        if endpoint == "token":
+            return self._handle_token(body)
+        username = self._username()
+        if username is None:
+            return self._send_json(401, {"error": "invalid_token"})
+        user_id = state.user_id_for(username)
+        getattr(self, f"_handle_{endpoint}")(user_id, params, parse_qs(parts.query), body)
+
+    # --- endpoints ---
+    def _handle_token(self, body: bytes):
+        form = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+        state = self.server.state
+        if form.get("grant_type") == "password" and form.get("username") and form.get("password"):
+            return self._send_json(200, state.issue_token(form["username"]))
+        if form.get("grant_type") == "refresh_token" and form.get("refresh_token") in state.tokens:
+            return self._send_json(200, state.issue_token(state.tokens[form["refresh_token"]]))
+        return self._send_json(400, {"error": "invalid_grant"})
+
+    def _handle_users(self, user_id, params, query, body):
+        self._send_json(200, {"UserId": user_id, "CompanyId": MockWoffuState.COMPANY_ID})
+
+    def _handle_companies(self, user_id, params, query, body):
+        domain = self.headers.get("X-Woffu-Host") or "mock.woffu.com"
+        self._send_json(200, {"CompanyId": int(params["company_id"]), "Domain": domain})
+
+    def _handle_signs(self, user_id, params, query, body):
+        self._send_json(201, {"UserId": user_id})
+
+    def _handle_presence(self, user_id, params, query, body):
+        try:
+            from_date = datetime.strptime(query["fromDate"][0], "%Y-%m-%d").date()
+            to_date = datetime.strptime(query["toDate"][0], "%Y-%m-%d").date()
+            page_size = int(query.get("pageSize", ["31"])[0])
+            page_index = int(query.get("pageIndex", ["0"])[0])
+        except (KeyError, ValueError):
+            return self._send_json(400, {"error": "fromDate/toDate inválidos"})
+        days = [from_date + timedelta(days=i) for i in range((to_date - from_date).days + 1)]
+        page = days[page_index * page_size:(page_index + 1) * page_size]
+        diaries = [self.server.state.diary(int(params["user_id"]), day) for day in page]
+        self._send_json(200, {"diaries": diaries, "totalRecords": len(days)})
+
+    def _handle_slots(self, user_id, params, query, body):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "JSON inválido"})
+        if not self.server.state.set_slots(int(params["diary_id"]), payload.get("slots", [])):
+            return self._send_json(404, {"error": "diario no encontrado"})
+        self._send_json(200, {"diaryId": int(params["diary_id"])})
+
+
+class MockWoffuServer(ThreadingHTTPServer):
+    """Servidor mock arrancable en un hilo (para benchmarks) o en primer plano."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, max_in_flight: int = 0):
+        super().__init__((host, port), MockWoffuHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_in_flight = max_in_flight  # 0: sin límite
+        self.state = MockWoffuState()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def counts(self) -> Counter:
+        return self.state.counts
+
+    def start(self) -> "MockWoffuServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de Woffu")
+    parser.add_argument('--host', default="127.0.0.1", help='Interfaz de escucha')
+    parser.add_argument('--port', type=int, default=8765, help='Puerto de escucha')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latencia media por petición (segundos)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Proporción de respuestas 502 (0-1)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Proporción de respuestas 429 (0-1)')
+    parser.add_argument('--max-in-flight', type=int, default=0,
+                        help='Peticiones simultáneas que admite el tenant; el resto recibe 429 (0: sin límite)')
+    args = parser.parse_args()
+
+    server = MockWoffuServer(args.host, args.port, args.latency, args.error_rate, args.throttle_rate,
+                             args.max_in_flight)
+    print(f"Mock de Woffu escuchando en {server.url}")
+    print(f"Usa: WOFFU_BASE_URL={server.url} python woffu_cli.py ...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nPeticiones por endpoint: " + json.dumps(dict(server.counts)))
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
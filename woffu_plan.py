@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Woffu Plan - Fichero de plan serializado
+Guarda el calendario ya resuelto (fechas, intervalos aleatorizados y motivos de
+salto) para poder revisarlo y aplicarlo después sin recalcular nada.
+
+Formato JSONL: una cabecera y una línea por día, en orden de fecha.
+    {"type": "header", "version": 1, "data_file": "...", "user_id": 1, "from": "...", "to": "...", ...}
+    {"date": "2025-03-03", "action": "file", "intervals": [["08:01:12", "15:02:40"]]}
+    {"date": "2025-03-08", "action": "skip", "reason": "weekend"}
+    {"date": "2025-03-10", "action": "fail", "reason": "overlap", "error": "Intervalos solapados: ..."}
+"""
+
+import json
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from woffu_interval import IntervalLike, as_intervals
+
+PLAN_VERSION = 1
+
+
+class PlanWriter:
+    """Escribe un plan línea a línea (with PlanWriter(path, header) as plan: ...)."""
+
+    def __init__(self, path: str, header: dict):
+        self.path = path
+        self._file = open(path, "w")
+        self._write({"type": "header", "version": PLAN_VERSION,
+                     "generated_at": datetime.now().replace(microsecond=0).isoformat(), **header})
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def file_day(self, work_date: str, intervals: List[IntervalLike]):
+        self._write({"date": work_date, "action": "file", "intervals": [list(i) for i in intervals]})
+
+    def skip_day(self, work_date: str, reason: str, detail: Optional[str] = None):
+        record = {"date": work_date, "action": "skip", "reason": reason}
+        if detail:
+            record["detail"] = detail
+        self._write(record)
+
+    def fail_day(self, work_date: str, reason: str, detail: Optional[str] = None, error: Optional[str] = None):
+        """Día que no se puede fichar tal y como está planificado (apply lo cuenta como error)."""
+        record = {"date": work_date, "action": "fail", "reason": reason}
+        if detail:
+            record["detail"] = detail
+        if error:
+            record["error"] = error
+        self._write(record)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "PlanWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_plan_header(path: str) -> dict:
+    """Lee sólo la cabecera del plan y comprueba la versión."""
+    with open(path, "r") as plan_file:
+        header = json.loads(plan_file.readline() or "{}")
+    if header.get("type") != "header":
+        raise ValueError(f"{path} no es un fichero de plan (falta la cabecera)")
+    if header.get("version") != PLAN_VERSION:
+        raise ValueError(f"Versión de plan no soportada: {header.get('version')}")
+    return header
+
+
+def iter_plan_days(path: str) -> Iterator[dict]:
+    """Recorre los días del plan en streaming, sin cargar el fichero completo.
+
+    Los intervalos de los días a fichar se devuelven ya como Interval (segundos).
+    """
+    with open(path, "r") as plan_file:
+        plan_file.readline()  # cabecera
+        for line in plan_file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("action") == "file":
+                record["intervals"] = as_intervals(record["intervals"])
+            yield record
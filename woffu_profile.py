@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Woffu Profile - Perfil de CPU de una ejecución (--profile)
+Registra con cProfile el hilo principal y los hilos que se creen después (workers,
+lotes), junta los perfiles al terminar y los guarda en formato pstats, que abren
+python -m pstats, snakeviz o gprof2dot. El informe por función se ordena por tiempo
+acumulado; el reparto CPU/espera por fase lo da woffu_trace.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+from typing import List, Optional
+
+DEFAULT_REPORT_LIMIT = 25  # Funciones del informe impreso
+
+
+class Profiler:
+    """cProfile para todos los hilos: uno por hilo, combinados en stop()."""
+
+    def __init__(self):
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self.stats: Optional[pstats.Stats] = None
+
+    def _enable_profile(self):
+        """Activa un cProfile en el hilo actual y sólo entonces lo guarda para combinarlo."""
+        profile = cProfile.Profile()
+        profile.enable()
+        with self._lock:
+            self._profiles.append(profile)
+
+    def _thread_hook(self, frame, event, arg):
+        # Primera llamada en un hilo nuevo: se sustituye este hook por su propio cProfile
+        try:
+            self._enable_profile()
+        except ValueError:
+            # Python 3.12+: cProfile usa sys.monitoring y el perfil principal ya cubre todos
+            # los hilos; se quita el hook para no volver a intentarlo en cada llamada
+            sys.setprofile(None)
+
+    def start(self):
+        threading.setprofile(self._thread_hook)
+        self._enable_profile()
+
+    def stop(self) -> pstats.Stats:
+        threading.setprofile(None)
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            profile.disable()
+        self.stats = pstats.Stats(*profiles, stream=io.StringIO())
+        return self.stats
+
+    def dump(self, path: str):
+        """Guarda el perfil combinado en formato pstats."""
+        self.stats.dump_stats(path)
+
+    def report(self, limit: int = DEFAULT_REPORT_LIMIT, sort: str = "cumulative") -> str:
+        """Funciones con más tiempo (acumulado por defecto) como texto."""
+        stream = io.StringIO()
+        self.stats.stream = stream
+        self.stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
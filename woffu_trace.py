@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Woffu Trace - Instrumentación por fases y por petición
+Mide cada fase del fichaje (credenciales, token, festivos, fichaje, presencia, PUT)
+y cada petición HTTP, y lo exporta como JSONL más un resumen agregado. De cada fase se
+separa el tiempo de CPU del hilo (time.thread_time) de la espera (red, disco, locks).
+"""
+
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+def endpoint_name(url: str) -> str:
+    """Ruta de la URL con los identificadores numéricos normalizados (/api/diaries/{id}/...)."""
+    return re.sub(r"/\d+(?=/|$)", "/{id}", urlsplit(url).path)
+
+
+class Tracer:
+    """Registra fases y peticiones; si se indica path, escribe cada evento como una línea JSON."""
+
+    enabled = True
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._file = open(path, "a") if path else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._phases = defaultdict(lambda: {"count": 0, "errors": 0, "seconds": 0.0, "cpu_seconds": 0.0})
+        self._requests = defaultdict(lambda: {"count": 0, "errors": 0, "retries": 0, "seconds": 0.0, "bytes": 0})
+
+    def _emit(self, event: dict):
+        if self._file is None:
+            return
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def current_phase(self) -> Optional[str]:
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def phase(self, name: str, **attrs):
+        """Mide la duración de una fase; las peticiones hechas dentro quedan asociadas a ella."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - started
+            cpu = time.thread_time() - cpu_started
+            with self._lock:
+                totals = self._phases[name]
+                totals["count"] += 1
+                totals["seconds"] += elapsed
+                totals["cpu_seconds"] += cpu
+                totals["errors"] += 0 if ok else 1
+            self._emit({"type": "phase", "ts": time.time(), "phase": name,
+                        "duration_ms": round(elapsed * 1000, 3), "cpu_ms": round(cpu * 1000, 3),
+                        "ok": ok, **attrs})
+
+    def on_response(self, method, url, status_code, elapsed, nbytes, attempt=0):
+        """Listener para WoffuHttpClient.add_listener."""
+        endpoint = f"{method} {endpoint_name(url)}"
+        failed = status_code is None or status_code >= 400
+        with self._lock:
+            totals = self._requests[endpoint]
+            totals["count"] += 1
+            totals["seconds"] += elapsed
+            totals["bytes"] += nbytes
+            totals["errors"] += 1 if failed else 0
+            totals["retries"] += 1 if attempt else 0
+        self._emit({"type": "request", "ts": time.time(), "phase": self.current_phase(),
+                    "endpoint": endpoint, "status": status_code,
+                    "duration_ms": round(elapsed * 1000, 3), "bytes": nbytes, "retry": attempt})
+
+    def print_summary(self):
+        print("=" * 60)
+        print("[STAT] Tiempo por fase (total = CPU + espera):")
+        for name, totals in sorted(self._phases.items(), key=lambda item: -item[1]["seconds"]):
+            errors = f", {totals['errors']} con error" if totals["errors"] else ""
+            wait = max(totals["seconds"] - totals["cpu_seconds"], 0.0)
+            print(f"   {name:<12} {totals['count']:>5}x  {totals['seconds']:>8.3f}s  "
+                  f"CPU {totals['cpu_seconds']:>7.3f}s  espera {wait:>7.3f}s{errors}")
+        print("[STAT] Peticiones:")
+        width = max([len(endpoint) for endpoint in self._requests] + [10])
+        for endpoint, totals in sorted(self._requests.items(), key=lambda item: -item[1]["seconds"]):
+            average_ms = totals["seconds"] / totals["count"] * 1000
+            print(f"   {endpoint:<{width}} {totals['count']:>5}x  {average_ms:>7.1f} ms/pet  "
+                  f"{totals['bytes']:>9} B  {totals['errors']} err  {totals['retries']} reint.")
+        if self.path:
+            print(f"[STAT] Traza completa en {self.path}")
+        print("=" * 60)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class NullTracer:
+    """Tracer sin efecto, usado cuando la instrumentación está desactivada."""
+
+    enabled = False
+
+    @contextmanager
+    def phase(self, name: str, **attrs):
+        yield
+
+    def current_phase(self):
+        return None
+
+    def on_response(self, method, url, status_code, elapsed, nbytes, attempt=0):
+        pass
+
+    def print_summary(self):
+        pass
+
+    def close(self):
+        pass
+
+
+_tracer = NullTracer()
+
+def get_tracer():
+    return _tracer
+
+def enable_tracing(path: Optional[str] = None, http=None) -> Tracer:
+    """Activa la instrumentación global y la engancha al cliente HTTP indicado."""
+    global _tracer
+    _tracer = Tracer(path)
+    if http is not None:
+        http.add_listener(_tracer.on_response)
+    return _tracer
+
+def trace_phase(name: str, **attrs):
+    """Atajo: with trace_phase("token", date=...): ..."""
+    return _tracer.phase(name, **attrs)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Woffu Worker - Proceso auxiliar persistente para cuando woffu.py no se puede importar
+Se arranca una sola vez por ejecución y recibe los trabajos por una tubería, una línea
+JSON por petición y respuesta; así un mes completo es un único intérprete, un único
+token y un PUT con todos los intervalos de cada día.
+
+    -> {"id": 1, "op": "file_entry", "data_file": "data.json", "date": "2025-03-03",
+        "intervals": [["08:00:00", "15:00:00"]], "diary": null, "ledger_file": null}
+    <- {"id": 1, "ok": true, "result": true}
+    <- {"id": 1, "ok": false, "error": "..."}
+
+Los mensajes de woffu.py se escriben en stderr; stdout queda sólo para las respuestas.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+
+class WorkerError(RuntimeError):
+    """El proceso auxiliar no pudo completar la petición o terminó inesperadamente."""
+
+
+class WoffuWorker:
+    """Cliente del proceso auxiliar (lo arranca en el constructor).
+
+    Las peticiones se atienden de una en una: varios hilos pueden compartir el mismo
+    worker, pero sus envíos se serializan.
+    """
+
+    def __init__(self, python: Optional[str] = None, script_dir: Optional[str] = None):
+        script_dir = script_dir or os.path.dirname(WORKER_SCRIPT)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [script_dir, env.get("PYTHONPATH")]))
+        self._process = subprocess.Popen([python or sys.executable, "-u", WORKER_SCRIPT],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         text=True, env=env)
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def call(self, op: str, **params):
+        with self._lock:
+            if self._process.poll() is not None:
+                raise WorkerError(f"El proceso auxiliar terminó (código {self._process.returncode})")
+            self._next_id += 1
+            request = {"id": self._next_id, "op": op, **params}
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+                line = self._process.stdout.readline()
+            except OSError as e:
+                raise WorkerError(f"Error de comunicación con el proceso auxiliar: {e}")
+            if not line:
+                raise WorkerError("El proceso auxiliar terminó inesperadamente (ver stderr)")
+            response = json.loads(line)
+        if not response.get("ok"):
+            raise WorkerError(response.get("error") or "Error desconocido en el proceso auxiliar")
+        return response.get("result")
+
+    def file_entry(self, work_date: str, intervals: List[Tuple[str, str]], data_file: str,
+                   diary: Optional[dict] = None, ledger_file: Optional[str] = None) -> bool:
+        return self.call("file_entry", data_file=data_file, date=work_date,
+                         intervals=[list(i) for i in intervals], diary=diary, ledger_file=ledger_file)
+
+    def presence_index(self, from_date: str, to_date: str, data_file: str,
+                       use_cache: bool = True) -> Optional[Dict[str, dict]]:
+        return self.call("presence_index", data_file=data_file, use_cache=use_cache,
+                         **{"from": from_date, "to": to_date})
+
+    def sign(self, data_file: str) -> bool:
+        return self.call("sign", data_file=data_file)
+
+    def close(self):
+        """Cierra la tubería (el worker termina al leer EOF) y espera a que salga."""
+        if self._process.poll() is None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+        self._process.stdout.close()
+
+    def __enter__(self) -> "WoffuWorker":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _serve(requests_in, responses_out):
+    """Atiende peticiones hasta EOF, con un cliente y un registro local por data.json."""
+    import woffu
+    from woffu_ledger import FilingLedger
+
+    ledgers = {}
+    def ledger_for(path):
+        if path and path not in ledgers:
+            ledgers[path] = FilingLedger(path)
+        return ledgers.get(path)
+
+    def handle(request):
+        op = request["op"]
+        client = woffu.getWoffuClient(request["data_file"])
+        if op == "file_entry":
+            intervals = [tuple(i) for i in request["intervals"]]
+            return client.file_entry(request["date"], intervals, diary=request.get("diary"),
+                                     ledger=ledger_for(request.get("ledger_file")))
+        if op == "presence_index":
+            return client.presence_index(request["from"], request["to"], request.get("use_cache", True))
+        if op == "sign":
+            return woffu.woffu_sign(request["data_file"])
+        raise ValueError(f"Operación desconocida: {op}")
+
+    try:
+        for line in requests_in:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            try:
+                response = {"id": request.get("id"), "ok": True, "result": handle(request)}
+            except Exception as e:
+                response = {"id": request.get("id"), "ok": False, "error": f"{type(e).__name__}: {e}"}
+            responses_out.write(json.dumps(response) + "\n")
+            responses_out.flush()
+    finally:
+        for ledger in ledgers.values():
+            ledger.close()
+
+
+def main():
+    responses_out = sys.stdout
+    sys.stdout = sys.stderr
+    import config
+    from woffu_http import configure_default_client, ConcurrencyPolicy, RetryPolicy
+    from woffu_cache import configure_response_cache
+    configure_default_client(
+        pool_size=config.HTTP_POOL_SIZE,
+        timeout=config.HTTP_TIMEOUT_SECONDS,
+        retry_policy=RetryPolicy(max_attempts=config.HTTP_MAX_ATTEMPTS,
+                                 backoff_base=config.HTTP_BACKOFF_BASE_SECONDS),
+        breaker_threshold=config.CIRCUIT_BREAKER_THRESHOLD,
+        breaker_reset_seconds=config.CIRCUIT_BREAKER_RESET_SECONDS,
+        concurrency_policy=ConcurrencyPolicy(min_limit=config.ADAPTIVE_MIN_CONCURRENCY,
+                                             max_limit=config.ADAPTIVE_MAX_CONCURRENCY,
+                                             initial_limit=config.ADAPTIVE_INITIAL_CONCURRENCY,
+                                             latency_target=config.ADAPTIVE_LATENCY_TARGET_SECONDS)
+        if config.ADAPTIVE_CONCURRENCY else None
+    )
+    configure_response_cache(enabled=config.HTTP_CACHE, max_bytes=config.HTTP_CACHE_MAX_BYTES,
+                             ttls=config.HTTP_CACHE_TTL_SECONDS)
+    _serve(sys.stdin, responses_out)
+
+
+if __name__ == "__main__":
+    main()